@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+"""
+AI 响应缓存
+以模型、temperature、max_tokens、system prompt、prompt 和参考图内容为键，
+响应 zlib 压缩后存放在 SQLite 中，按最近使用淘汰；被截断的响应不缓存
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import zlib
+
+from blob_store import digest_file
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    content BLOB NOT NULL,
+    finish_reason TEXT,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses (last_used);
+"""
+
+
+def text_digest(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def image_digest(image):
+    """参考图内容的哈希：本地文件按内容，data URL / 网络地址按字符串"""
+    if image.startswith(('data:', 'http://', 'https://')):
+        return text_digest(image)
+    return digest_file(image)
+
+
+def cache_key(model_id, model_name, temperature, max_tokens, system_prompt, prompt, images):
+    key = {
+        'model': [model_id, model_name],
+        'temperature': temperature,
+        'max_tokens': max_tokens,
+        'system': text_digest(system_prompt or ''),
+        'prompt': text_digest(prompt or ''),
+        'images': [image_digest(image) for image in images],
+    }
+    return hashlib.sha256(json.dumps(key, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+class ResponseCache:
+    """AI 响应的持久化 LRU 缓存（线程安全，共用一个连接并串行执行）"""
+
+    def __init__(self, db_path, max_bytes=200 * 1024 * 1024, max_entries=1000):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.executescript(SCHEMA)
+        self.stats = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+
+    def get(self, key):
+        """返回 (content, finish_reason)；未命中返回 None"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT content, finish_reason FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.stats['misses'] += 1
+                return None
+            self.conn.execute(
+                "UPDATE responses SET last_used = ?, hits = hits + 1 WHERE key = ?", (time.time(), key))
+            self.conn.commit()
+            self.stats['hits'] += 1
+        return zlib.decompress(row[0]).decode('utf-8'), row[1]
+
+    def put(self, key, content, finish_reason=None):
+        if not content or finish_reason == 'length':
+            return
+        data = zlib.compress(content.encode('utf-8'))
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses (key, content, finish_reason, size, created_at, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)", (key, data, finish_reason, len(data), now, now))
+            self.stats['stores'] += 1
+            self.evict()
+            self.conn.commit()
+
+    def evict(self):
+        """删除最久未使用的条目，直到总大小和条目数都不超过上限（调用方持有锁）"""
+        count, total = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        victims = []
+        for key, size in self.conn.execute("SELECT key, size FROM responses ORDER BY last_used"):
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            victims.append((key,))
+            count -= 1
+            total -= size
+        self.conn.executemany("DELETE FROM responses WHERE key = ?", victims)
+        self.stats['evictions'] += len(victims)
+
+    def clear(self):
+        with self.lock:
+            self.conn.execute("DELETE FROM responses")
+            self.conn.commit()
+
+    def summary(self):
+        """{'entries', 'bytes', 'hits', 'misses', 'stores', 'evictions', 'hitRate'}"""
+        with self.lock:
+            count, total = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses").fetchone()
+            stats = dict(self.stats)
+        lookups = stats['hits'] + stats['misses']
+        stats.update(entries=count, bytes=total, hitRate=round(stats['hits'] / lookups, 3) if lookups else 0)
+        return stats
@@ -0,0 +1,223 @@
+# -*- coding: utf-8 -*-
+"""
+AI 接口重试策略与熔断（server.py 和 batch_generate.py 共用）
+超时、连接错误、429、5xx 按指数退避重试，其余 4xx 立即失败；
+同一模型连续失败后熔断，期间直接抛出 CircuitOpenError。
+同时兼容 requests 和 urllib 抛出的异常
+"""
+
+import email.utils
+import random
+import socket
+import threading
+import time
+import urllib.error
+
+try:
+    import requests
+except ImportError:  # batch_generate.py 只依赖标准库
+    requests = None
+
+RETRYABLE_STATUS = (408, 425, 429, 500, 502, 503, 504)
+MAX_RETRY_AFTER = 120  # Retry-After 超过该秒数时不再等待，直接失败
+
+# 失败类型
+KIND_TIMEOUT = 'timeout'
+KIND_CONNECTION = 'connection'  # 连接 / TLS 错误，请求可能未到达服务端
+KIND_RATE_LIMIT = 'rate_limit'
+KIND_SERVER = 'server'
+KIND_CLIENT = 'client'
+KIND_INVALID = 'invalid_response'
+
+
+class CircuitOpenError(Exception):
+    """模型处于熔断状态，请求未发出"""
+
+
+class Failure:
+    """一次失败的分类结果"""
+
+    def __init__(self, kind, status=None, retry_after=None):
+        self.kind = kind
+        self.status = status
+        self.retry_after = retry_after
+
+    @property
+    def retryable(self):
+        return self.kind != KIND_CLIENT and (self.retry_after is None or self.retry_after <= MAX_RETRY_AFTER)
+
+    @property
+    def unhealthy(self):
+        """是否说明服务端不可用（计入熔断）"""
+        return self.kind in (KIND_TIMEOUT, KIND_CONNECTION, KIND_RATE_LIMIT, KIND_SERVER)
+
+
+def parse_retry_after(value):
+    """Retry-After：秒数或 HTTP 日期，返回需要等待的秒数"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    return max(0.0, when.timestamp() - time.time())
+
+
+def response_status(error):
+    """从 requests.HTTPError / urllib.error.HTTPError 中取出 (状态码, 响应头)"""
+    response = getattr(error, 'response', None)
+    if response is not None and getattr(response, 'status_code', None):
+        return response.status_code, response.headers
+    if isinstance(error, urllib.error.HTTPError):
+        return error.code, error.headers
+    return None, None
+
+
+def classify(error):
+    """把异常归类为 Failure"""
+    status, headers = response_status(error)
+    if status is not None:
+        retry_after = parse_retry_after(headers.get('Retry-After')) if headers else None
+        if status == 429:
+            return Failure(KIND_RATE_LIMIT, status, retry_after)
+        if status in RETRYABLE_STATUS:
+            return Failure(KIND_SERVER, status, retry_after)
+        if 400 <= status < 500:
+            return Failure(KIND_CLIENT, status)
+        return Failure(KIND_SERVER, status, retry_after)
+    if requests is not None:
+        if isinstance(error, requests.exceptions.Timeout):
+            return Failure(KIND_TIMEOUT)
+        if isinstance(error, requests.exceptions.ConnectionError):
+            return Failure(KIND_CONNECTION)
+        if isinstance(error, requests.exceptions.RequestException):
+            return Failure(KIND_INVALID)
+    if isinstance(error, (socket.timeout, TimeoutError)):
+        return Failure(KIND_TIMEOUT)
+    if isinstance(error, urllib.error.URLError):
+        reason = getattr(error, 'reason', None)
+        return Failure(KIND_TIMEOUT if isinstance(reason, (socket.timeout, TimeoutError)) else KIND_CONNECTION)
+    if isinstance(error, (ConnectionError, OSError)):
+        return Failure(KIND_CONNECTION)
+    # 响应体无法解析、流式中断等：服务端返回了异常内容，可重试但不计入熔断
+    return Failure(KIND_INVALID)
+
+
+class CircuitBreaker:
+    """单个模型的熔断器（线程安全）"""
+
+    def __init__(self, threshold=5, reset_seconds=60):
+        self.threshold = threshold
+        self.reset_seconds = reset_seconds
+        self.lock = threading.Lock()
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+
+    def before_call(self):
+        """请求前调用：熔断中直接抛出 CircuitOpenError"""
+        if self.threshold <= 0:
+            return
+        with self.lock:
+            if self.opened_at is None:
+                return
+            remaining = self.opened_at + self.reset_seconds - time.monotonic()
+            if remaining > 0 or self.probing:
+                raise CircuitOpenError(f"模型接口连续失败，已熔断，约 {max(1, int(remaining))} 秒后重试")
+            # 熔断到期：放行一次试探请求
+            self.probing = True
+
+    def record_success(self):
+        with self.lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.probing or (self.threshold > 0 and self.failures >= self.threshold):
+                self.opened_at = time.monotonic()
+            self.probing = False
+
+    def release(self):
+        """请求因与服务端健康无关的原因失败：结束试探，不改变熔断状态"""
+        with self.lock:
+            self.probing = False
+
+    def state(self):
+        with self.lock:
+            if self.opened_at is None:
+                return 'closed'
+            return 'half_open' if time.monotonic() >= self.opened_at + self.reset_seconds else 'open'
+
+
+class BreakerRegistry:
+    """按模型区分的熔断器集合"""
+
+    def __init__(self, threshold=5, reset_seconds=60):
+        self.threshold = threshold
+        self.reset_seconds = reset_seconds
+        self.lock = threading.Lock()
+        self.breakers = {}
+
+    def get(self, key):
+        with self.lock:
+            breaker = self.breakers.get(key)
+            if breaker is None:
+                breaker = self.breakers[key] = CircuitBreaker(self.threshold, self.reset_seconds)
+            return breaker
+
+
+class RetryPolicy:
+    """指数退避 + 抖动的重试策略"""
+
+    def __init__(self, max_attempts=3, base_delay=1.0, max_delay=30.0):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    @classmethod
+    def from_options(cls, options):
+        """从 config.json 的 ai_options.retry 构造"""
+        return cls(
+            max_attempts=int(options.get('max_attempts', 3)),
+            base_delay=float(options.get('base_delay', 1.0)),
+            max_delay=float(options.get('max_delay', 30.0))
+        )
+
+    def delay(self, attempt, retry_after=None):
+        """第 attempt 次（从 0 开始）失败后的等待秒数"""
+        backoff = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        if retry_after is not None:
+            return max(retry_after, backoff)
+        return backoff
+
+    def call(self, func, breaker=None, label='[AI]'):
+        """执行 func()，按策略重试；返回 func 的结果，最终失败时抛出最后一次的异常"""
+        for attempt in range(self.max_attempts):
+            if breaker is not None:
+                breaker.before_call()
+            try:
+                result = func()
+            except Exception as e:
+                failure = classify(e)
+                if breaker is not None:
+                    if failure.unhealthy:
+                        breaker.record_failure()
+                    else:
+                        breaker.release()
+                status = f" HTTP {failure.status}" if failure.status else ''
+                print(f"{label} 调用失败 (第 {attempt + 1}/{self.max_attempts} 次，{failure.kind}{status}): {e}")
+                if not failure.retryable or attempt == self.max_attempts - 1:
+                    raise
+                wait = self.delay(attempt, failure.retry_after)
+                print(f"{label} {wait:.1f} 秒后重试...")
+                time.sleep(wait)
+                continue
+            if breaker is not None:
+                breaker.record_success()
+            return result
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+AI 接口 HTTP 会话池
+按 (base_url, api_key) 复用 requests.Session，空闲超过 idle_seconds 的会话在使用前重建；
+keep_alive 关闭时每次调用新建会话并发送 Connection: close
+"""
+
+import contextlib
+import hashlib
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
+
+def pool_key(base_url, api_key):
+    # 字典中不保存明文 api_key
+    return base_url.rstrip('/'), hashlib.sha256((api_key or '').encode('utf-8')).hexdigest()
+
+
+class SessionPool:
+    """按模型复用的 requests.Session 池（线程安全）"""
+
+    def __init__(self, keep_alive=True, pool_size=8, idle_seconds=60):
+        self.keep_alive = keep_alive
+        self.pool_size = pool_size
+        self.idle_seconds = idle_seconds
+        self.lock = threading.Lock()
+        self.sessions = {}  # pool_key -> [session, 最近使用时间]
+        self.stats = {'created': 0, 'reused': 0, 'discarded': 0}
+
+    def new_session(self):
+        session = requests.Session()
+        session.trust_env = False  # 强制直连，不使用系统代理 (针对国内 API 域名优化)
+        session.headers.update({'User-Agent': USER_AGENT})
+        if self.keep_alive:
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size, max_retries=0)
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+        else:
+            session.headers['Connection'] = 'close'
+        return session
+
+    def acquire(self, base_url, api_key):
+        """取得该模型的会话：不存在或空闲过久时新建"""
+        key = pool_key(base_url, api_key)
+        now = time.monotonic()
+        stale = None
+        with self.lock:
+            entry = self.sessions.get(key)
+            if entry and now - entry[1] > self.idle_seconds:
+                stale = entry[0]
+                entry = None
+            if entry:
+                entry[1] = now
+                self.stats['reused'] += 1
+                session = entry[0]
+            else:
+                session = self.new_session()
+                self.sessions[key] = [session, now]
+                self.stats['created'] += 1
+        if stale is not None:
+            stale.close()
+        return session
+
+    def discard(self, base_url, api_key, session=None):
+        """丢弃该模型的会话（连接出错后调用）；session 已被替换时不处理"""
+        key = pool_key(base_url, api_key)
+        with self.lock:
+            entry = self.sessions.get(key)
+            if entry is None or (session is not None and entry[0] is not session):
+                return
+            del self.sessions[key]
+            self.stats['discarded'] += 1
+        entry[0].close()
+
+    @contextlib.contextmanager
+    def session(self, base_url, api_key):
+        """with pool.session(base_url, api_key) as session: ...
+
+        连接错误时丢弃会话再抛出；未启用长连接时用完即关闭。
+        """
+        if not self.keep_alive:
+            session = self.new_session()
+            try:
+                yield session
+            finally:
+                session.close()
+            return
+        session = self.acquire(base_url, api_key)
+        try:
+            yield session
+        except requests.exceptions.ConnectionError:
+            self.discard(base_url, api_key, session)
+            raise
+
+    def close(self):
+        with self.lock:
+            sessions = [entry[0] for entry in self.sessions.values()]
+            self.sessions.clear()
+        for session in sessions:
+            session.close()
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+AI 接口备用传输（http.client）
+requests 因连接 / TLS 问题失败时的进程内兜底：不校验证书、允许较旧的加密套件、
+只使用 HTTP/1.1，请求体以 Transfer-Encoding: chunked 流式上传。
+
+HTTP 错误状态抛出 urllib.error.HTTPError，可直接交给 ai_retry.classify 分类。
+"""
+
+import http.client
+import json
+import ssl
+import urllib.error
+import urllib.parse
+
+UPLOAD_CHUNK_SIZE = 64 * 1024
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+
+
+def tls_context(verify=False):
+    """备用传输的 TLS 设置"""
+    if verify:
+        return ssl.create_default_context()
+    ctx = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+    ctx.check_hostname = False
+    ctx.verify_mode = ssl.CERT_NONE
+    ctx.minimum_version = ssl.TLSVersion.TLSv1_2
+    try:
+        ctx.set_ciphers('DEFAULT@SECLEVEL=1')
+    except ssl.SSLError:
+        pass
+    ctx.set_alpn_protocols(['http/1.1'])
+    return ctx
+
+
+def json_chunks(payload, chunk_size=UPLOAD_CHUNK_SIZE):
+    """分段生成 JSON 请求体（ensure_ascii 输出只含 ASCII）"""
+    buffer = []
+    size = 0
+    for chunk in json.JSONEncoder().iterencode(payload):
+        buffer.append(chunk)
+        size += len(chunk)
+        if size >= chunk_size:
+            yield ''.join(buffer).encode('ascii')
+            buffer = []
+            size = 0
+    if buffer:
+        yield ''.join(buffer).encode('ascii')
+
+
+class Response:
+    """http.client 响应的简单封装"""
+
+    def __init__(self, connection, response):
+        self.connection = connection
+        self.raw = response
+        self.status_code = response.status
+        self.headers = response.headers
+
+    def iter_lines(self):
+        while True:
+            line = self.raw.readline()
+            if not line:
+                return
+            yield line.rstrip(b'\r\n')
+
+    def json(self):
+        return json.loads(self.raw.read())
+
+    def close(self):
+        self.raw.close()
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class HttpClientTransport:
+    """基于 http.client 的 JSON POST"""
+
+    def __init__(self, verify=False):
+        self.context = tls_context(verify)
+
+    def connect(self, url, timeout):
+        parts = urllib.parse.urlsplit(url)
+        if parts.scheme == 'https':
+            connection = http.client.HTTPSConnection(parts.hostname, parts.port, timeout=timeout, context=self.context)
+        else:
+            connection = http.client.HTTPConnection(parts.hostname, parts.port, timeout=timeout)
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+        return connection, path
+
+    def post(self, url, payload, headers, timeout):
+        """发送 JSON 请求，返回 Response（调用方负责关闭）；HTTP 错误状态抛出 HTTPError"""
+        connection, path = self.connect(url, timeout)
+        request_headers = {'User-Agent': USER_AGENT, **headers,
+                           'Content-Type': 'application/json',
+                           'Transfer-Encoding': 'chunked',
+                           'Connection': 'close'}
+        try:
+            connection.request('POST', path, body=json_chunks(payload), headers=request_headers, encode_chunked=True)
+            response = connection.getresponse()
+        except Exception:
+            connection.close()
+            raise
+        if response.status >= 400:
+            body = response.read(4096)
+            connection.close()
+            raise urllib.error.HTTPError(url, response.status, f"{response.reason}: {body[:500].decode('utf-8', 'replace')}",
+                                         response.headers, None)
+        return Response(connection, response)
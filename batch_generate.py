@@ -15,6 +15,8 @@ import shutil
 import re
 import time
 
+from ai_retry import RetryPolicy, BreakerRegistry
+
 # ==================== 配置 ====================
 SOURCE_PROJECT = r"D:\ai project\ky_antigravity\原型生成器\projects\首页_+_扫码作答页_+_扫码结果页_+_题目详情页_+_A_20260125_5-41-16pm"
 PROJECTS_DIR = r"D:\ai project\ky_antigravity\原型生成器\projects"
@@ -39,6 +41,10 @@ BATCHES = [
     }
 ]
 
+# 按模型熔断：某个模型连续失败后，后续批次直接失败，不再逐批等待超时
+# （main() 加载配置后按 ai_options.retry 重建一次）
+ai_breakers = BreakerRegistry()
+
 # ==================== 工具函数 ====================
 
 def load_config():
@@ -216,8 +222,14 @@ def call_ai_api(prompt, images, config):
     timeout = ai_options.get('timeout', 300)
     print(f"[AI] 正在调用大模型... (超时: {timeout}s)")
     
-    with urllib.request.urlopen(req, context=ctx, timeout=timeout) as response:
-        result = json.loads(response.read().decode('utf-8'))
+    def attempt_request():
+        with urllib.request.urlopen(req, context=ctx, timeout=timeout) as response:
+            return json.loads(response.read().decode('utf-8'))
+    
+    # 与 server.py 共用重试策略：超时 / 5xx / 429 指数退避重试，4xx 直接失败
+    retry_options = ai_options.get('retry', {})
+    policy = RetryPolicy.from_options(retry_options)
+    result = policy.call(attempt_request, breaker=ai_breakers.get(api_config.get('model', 'gpt-4')))
     
     content = result['choices'][0]['message']['content']
     finish_reason = result['choices'][0].get('finish_reason', '')
@@ -418,6 +430,7 @@ def generate_full_prompt(record):
 # ==================== 主函数 ====================
 
 def main():
+    global ai_breakers
     print("="*60)
     print("AI智学 学生端原型 - 分批生成脚本")
     print("="*60)
@@ -425,6 +438,11 @@ def main():
     # 加载配置
     print("\n[加载] 配置文件...")
     config = load_config()
+    retry_options = config.get('ai_options', {}).get('retry', {})
+    ai_breakers = BreakerRegistry(
+        threshold=int(retry_options.get('breaker_threshold', 5)),
+        reset_seconds=float(retry_options.get('breaker_reset_seconds', 60))
+    )
     print(f"[配置] API: {config['api']['base_url']}")
     print(f"[配置] 模型: {config['api']['model']}")
     
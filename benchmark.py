@@ -0,0 +1,404 @@
+# -*- coding: utf-8 -*-
+"""
+服务端性能基准测试脚本
+
+在临时目录中启动一份独立的 server.py 副本（不影响当前项目数据），
+并用本地模拟的 AI 接口替代真实大模型，测量服务端在不同配置下的表现。
+
+用法:
+    python benchmark.py concurrency [--ai-delay 5] [--ai-calls 4] [--probes 30]
+        长耗时 AI 调用进行中时，静态文件 (/src/viewer.html) 的请求延迟，
+        对比 server.concurrency = single / threaded
+
+    python benchmark.py sendfile [--sizes 256,2048,20480] [--requests 40] [--clients 4]
+        静态文件下载吞吐量，对比 server.sendfile = false（copyfileobj）/ true（os.sendfile）
+
+    python benchmark.py copy [--images 200] [--image-kb 150] [--copies 5]
+        复制一个含大量图片的项目（/copy-project）的耗时和新增磁盘占用，
+        对比 assets.copy_mode = copy / cow，以及 cow + 图片去重存储
+"""
+
+import argparse
+import glob
+import http.client
+import http.server
+import json
+import os
+import shutil
+import socket
+import socketserver
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+# ==================== 工具函数 ====================
+
+def find_free_port():
+    """获取一个空闲端口"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def percentile(values, pct):
+    """计算百分位数（values 需非空）"""
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def format_ms(seconds):
+    return f"{seconds * 1000:8.1f} ms"
+
+
+class MockAIServer:
+    """模拟 OpenAI 兼容的 /chat/completions 接口，固定延迟后返回一个 HTML 原型"""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.port = find_free_port()
+        mock = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length', 0))
+                self.rfile.read(length)
+                time.sleep(mock.delay)
+                html = '<!DOCTYPE html><html><head><title>bench</title></head><body>ok</body></html>'
+                body = json.dumps({
+                    'choices': [{'message': {'content': html}, 'finish_reason': 'stop'}]
+                }).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        class Server(socketserver.ThreadingMixIn, http.server.HTTPServer):
+            daemon_threads = True
+
+        self.httpd = Server(('127.0.0.1', self.port), Handler)
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        return f'http://127.0.0.1:{self.port}/v1'
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class SandboxServer:
+    """在临时目录中运行的 server.py 副本"""
+
+    def __init__(self, server_options, ai_base_url, ai_options=None, extra_config=None):
+        self.port = find_free_port()
+        self.root = tempfile.mkdtemp(prefix='proto_bench_')
+        for py_file in glob.glob(os.path.join(SCRIPT_DIR, '*.py')):
+            shutil.copy2(py_file, self.root)
+        for folder in ('src', 'templates'):
+            src = os.path.join(SCRIPT_DIR, folder)
+            if os.path.isdir(src):
+                shutil.copytree(src, os.path.join(self.root, folder))
+
+        config = {
+            'server': dict(server_options, port=self.port),
+            'ai_options': dict({'max_tokens': 1000, 'temperature': 0.7, 'timeout': 300}, **(ai_options or {}))
+        }
+        config.update(extra_config or {})
+        with open(os.path.join(self.root, 'config.json'), 'w', encoding='utf-8') as f:
+            json.dump(config, f, ensure_ascii=False, indent=2)
+
+        models = {
+            'models': [{
+                'id': 'bench', 'name': 'Bench Mock', 'provider': 'mock',
+                'base_url': ai_base_url, 'api_key': 'bench-key', 'model': 'bench-model'
+            }],
+            'selected_model_id': 'bench'
+        }
+        with open(os.path.join(self.root, 'models.json'), 'w', encoding='utf-8') as f:
+            json.dump(models, f, ensure_ascii=False, indent=2)
+        self.process = None
+
+    @property
+    def base_url(self):
+        return f'http://127.0.0.1:{self.port}'
+
+    def __enter__(self):
+        self.process = subprocess.Popen(
+            [sys.executable, os.path.join(self.root, 'server.py')],
+            cwd=self.root,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL
+        )
+        deadline = time.time() + 20
+        while time.time() < deadline:
+            try:
+                with socket.create_connection(('127.0.0.1', self.port), timeout=0.5):
+                    return self
+            except OSError:
+                time.sleep(0.1)
+        self.__exit__()
+        raise RuntimeError('sandbox server did not start')
+
+    def __exit__(self, *exc):
+        if self.process:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        shutil.rmtree(self.root, ignore_errors=True)
+
+
+def http_get(url, timeout=120):
+    """GET 请求，返回 (耗时秒, 字节数)"""
+    start = time.perf_counter()
+    with urllib.request.urlopen(url, timeout=timeout) as resp:
+        size = len(resp.read())
+    return time.perf_counter() - start, size
+
+
+def http_post_json(url, payload, timeout=600):
+    req = urllib.request.Request(
+        url,
+        data=json.dumps(payload).encode('utf-8'),
+        headers={'Content-Type': 'application/json'},
+        method='POST'
+    )
+    with urllib.request.urlopen(req, timeout=timeout) as resp:
+        return json.loads(resp.read().decode('utf-8'))
+
+
+# ==================== 并发基准 ====================
+
+def run_concurrency_case(mock, server_options, ai_calls, probes):
+    """启动一份服务，发起 ai_calls 个同步 /generate，同时测量静态文件延迟"""
+    with SandboxServer(server_options, mock.base_url) as server:
+        # 预热
+        http_get(f'{server.base_url}/src/viewer.html')
+
+        def generate(i):
+            try:
+                http_post_json(f'{server.base_url}/generate', {
+                    'prompt': f'benchmark prompt {i}',
+                    'projectName': f'bench_{i}',
+                    'images': []
+                })
+            except Exception as e:
+                print(f"  [警告] /generate 失败: {e}")
+
+        workers = [threading.Thread(target=generate, args=(i,), daemon=True) for i in range(ai_calls)]
+        for t in workers:
+            t.start()
+        time.sleep(0.3)  # 确保 AI 调用已在服务端进行中
+
+        latencies = []
+        for _ in range(probes):
+            elapsed, _ = http_get(f'{server.base_url}/src/viewer.html')
+            latencies.append(elapsed)
+            time.sleep(0.05)
+
+        for t in workers:
+            t.join()
+    return latencies
+
+
+def bench_concurrency(args):
+    print(f"[基准] 并发服务: {args.ai_calls} 个进行中的 AI 调用 (每个 {args.ai_delay}s)，"
+          f"期间请求 /src/viewer.html {args.probes} 次")
+    cases = [
+        ('single', {'concurrency': 'single'}),
+        (f'threaded({args.max_workers})', {'concurrency': 'threaded', 'max_workers': args.max_workers}),
+    ]
+    with MockAIServer(args.ai_delay) as mock:
+        print(f"{'模式':<16}{'p50':>12}{'p95':>12}{'max':>12}")
+        for label, options in cases:
+            latencies = run_concurrency_case(mock, options, args.ai_calls, args.probes)
+            print(f"{label:<16}{format_ms(percentile(latencies, 50)):>12}"
+                  f"{format_ms(percentile(latencies, 95)):>12}{format_ms(max(latencies)):>12}")
+
+
+# ==================== 静态文件吞吐基准 ====================
+
+def download_loop(port, path, count, results):
+    """单个客户端：复用一条长连接连续下载 count 次，记录每次耗时和字节数"""
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=120)
+    try:
+        for _ in range(count):
+            start = time.perf_counter()
+            conn.request('GET', path)
+            resp = conn.getresponse()
+            size = 0
+            while True:
+                chunk = resp.read(1024 * 1024)
+                if not chunk:
+                    break
+                size += len(chunk)
+            results.append((time.perf_counter() - start, size))
+    finally:
+        conn.close()
+
+
+def run_sendfile_case(server_options, sizes_kb, requests_per_size, clients):
+    """启动一份服务，对每种文件大小并发下载，返回 {size_kb: (MB/s, p50 秒)}"""
+    server = SandboxServer(server_options, 'http://127.0.0.1:9/v1')
+    asset_dir = os.path.join(server.root, 'projects', 'bench_static', 'images')
+    os.makedirs(asset_dir)
+    for size_kb in sizes_kb:
+        with open(os.path.join(asset_dir, f'asset_{size_kb}.bin'), 'wb') as f:
+            f.write(os.urandom(size_kb * 1024))
+
+    stats = {}
+    with server:
+        for size_kb in sizes_kb:
+            path = f'/projects/bench_static/images/asset_{size_kb}.bin'
+            download_loop(server.port, path, 2, [])  # 预热（页缓存）
+            per_client = max(1, requests_per_size // clients)
+            results = []
+            workers = [threading.Thread(target=download_loop, args=(server.port, path, per_client, results))
+                       for _ in range(clients)]
+            start = time.perf_counter()
+            for t in workers:
+                t.start()
+            for t in workers:
+                t.join()
+            elapsed = time.perf_counter() - start
+            total_bytes = sum(size for _, size in results)
+            stats[size_kb] = (total_bytes / elapsed / (1024 * 1024), percentile([t for t, _ in results], 50))
+    return stats
+
+
+def bench_sendfile(args):
+    sizes_kb = [int(x) for x in args.sizes.split(',') if x.strip()]
+    print(f"[基准] 静态文件吞吐: 文件大小 {sizes_kb} KB，每种 {args.requests} 次请求，{args.clients} 个并发客户端")
+    if not hasattr(os, 'sendfile'):
+        print("  [提示] 当前平台不支持 os.sendfile，两组结果都将走 copyfileobj")
+    cases = [
+        ('copyfileobj', {'sendfile': False}),
+        ('sendfile', {'sendfile': True}),
+    ]
+    results = {label: run_sendfile_case(options, sizes_kb, args.requests, args.clients) for label, options in cases}
+    print(f"{'文件大小':<12}{'模式':<14}{'吞吐量':>14}{'p50':>12}")
+    for size_kb in sizes_kb:
+        for label, _ in cases:
+            mbps, p50 = results[label][size_kb]
+            print(f"{str(size_kb) + ' KB':<12}{label:<14}{mbps:>10.1f} MB/s{format_ms(p50):>12}")
+
+
+# ==================== 项目复制基准 ====================
+
+def disk_usage(folder):
+    """目录实际占用字节数（硬链接的同一文件只计一次）"""
+    seen = set()
+    total = 0
+    for dirpath, _, filenames in os.walk(folder):
+        for filename in filenames:
+            st = os.lstat(os.path.join(dirpath, filename))
+            if (st.st_dev, st.st_ino) not in seen:
+                seen.add((st.st_dev, st.st_ino))
+                total += st.st_size
+    return total
+
+
+def create_image_project(folder, images, image_kb):
+    """生成一个含 images/、reference/ 图片的测试项目"""
+    os.makedirs(os.path.join(folder, 'images'))
+    os.makedirs(os.path.join(folder, 'reference'))
+    os.makedirs(os.path.join(folder, 'prd'))
+    for i in range(images):
+        sub = 'reference' if i % 4 == 0 else 'images'
+        with open(os.path.join(folder, sub, f'img_{i:04d}.png'), 'wb') as f:
+            f.write(os.urandom(image_kb * 1024))
+    with open(os.path.join(folder, 'index.html'), 'w', encoding='utf-8') as f:
+        f.write('<!DOCTYPE html><html><head><title>bench</title></head><body>' + 'x' * 200000 + '</body></html>')
+    with open(os.path.join(folder, 'record.json'), 'w', encoding='utf-8') as f:
+        json.dump({'global': {}, 'pages': [{'name': 'home'}]}, f)
+    with open(os.path.join(folder, 'prd', 'home.md'), 'w', encoding='utf-8') as f:
+        f.write('# home\n')
+
+
+def run_copy_case(asset_options, images, image_kb, copies):
+    """启动一份服务，对同一个图片项目调用 copies 次 /copy-project，返回 (每次耗时列表, 新增磁盘占用字节)"""
+    server = SandboxServer({}, 'http://127.0.0.1:9/v1', extra_config={'assets': asset_options})
+    create_image_project(os.path.join(server.root, 'projects', 'bench_source'), images, image_kb)
+    with server:
+        # 等待启动时的后台任务（纳入去重存储等）完成
+        time.sleep(1.0)
+        before = disk_usage(server.root)
+        timings = []
+        for i in range(copies):
+            start = time.perf_counter()
+            result = http_post_json(f'{server.base_url}/copy-project', {
+                'sourceProjectId': 'bench_source',
+                'newProjectName': f'bench_copy_{i}'
+            })
+            timings.append(time.perf_counter() - start)
+            if not result.get('success'):
+                raise RuntimeError(f'copy-project failed: {result}')
+        growth = disk_usage(server.root) - before
+    return timings, growth
+
+
+def bench_copy(args):
+    print(f"[基准] 项目复制: {args.images} 张图片 × {args.image_kb} KB，复制 {args.copies} 次")
+    cases = [
+        ('copy', {'copy_mode': 'copy', 'dedupe': False}),
+        ('cow', {'copy_mode': 'cow', 'dedupe': False}),
+        ('cow+dedupe', {'copy_mode': 'cow', 'dedupe': True}),
+    ]
+    print(f"{'模式':<14}{'首次':>12}{'p50':>12}{'新增占用':>14}")
+    for label, options in cases:
+        timings, growth = run_copy_case(options, args.images, args.image_kb, args.copies)
+        print(f"{label:<14}{format_ms(timings[0]):>12}{format_ms(percentile(timings, 50)):>12}"
+              f"{growth / (1024 * 1024):>11.1f} MB")
+
+
+# ==================== 主函数 ====================
+
+def main():
+    parser = argparse.ArgumentParser(description='原型生成器服务端性能基准测试')
+    sub = parser.add_subparsers(dest='command')
+
+    p_conc = sub.add_parser('concurrency', help='长耗时 AI 调用期间的静态文件延迟')
+    p_conc.add_argument('--ai-delay', type=float, default=5, help='模拟 AI 调用耗时（秒）')
+    p_conc.add_argument('--ai-calls', type=int, default=4, help='并发进行中的 AI 调用数')
+    p_conc.add_argument('--probes', type=int, default=30, help='静态文件请求次数')
+    p_conc.add_argument('--max-workers', type=int, default=32, help='threaded 模式的工作线程数')
+    p_conc.set_defaults(func=bench_concurrency)
+
+    p_send = sub.add_parser('sendfile', help='静态文件吞吐量：sendfile 与 copyfileobj 对比')
+    p_send.add_argument('--sizes', default='256,2048,20480', help='测试文件大小列表（KB，逗号分隔）')
+    p_send.add_argument('--requests', type=int, default=40, help='每种文件大小的请求总数')
+    p_send.add_argument('--clients', type=int, default=4, help='并发客户端数')
+    p_send.set_defaults(func=bench_sendfile)
+
+    p_copy = sub.add_parser('copy', help='项目复制耗时：完整复制与写时复制对比')
+    p_copy.add_argument('--images', type=int, default=200, help='测试项目中的图片数量')
+    p_copy.add_argument('--image-kb', type=int, default=150, help='每张图片大小（KB）')
+    p_copy.add_argument('--copies', type=int, default=5, help='复制次数')
+    p_copy.set_defaults(func=bench_copy)
+
+    args = parser.parse_args()
+    if not getattr(args, 'func', None):
+        parser.print_help()
+        return
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+内容寻址的资源存储
+图片按 SHA-256 存放在 data/blobs/ab/abcdef...，项目中的文件是指向它的硬链接，
+引用计数即硬链接数（st_nlink - 1）。
+
+存储中的文件视为不可变，不能原地修改（替换文件应写新文件后 os.replace）。
+文件系统不支持硬链接时自动退回普通复制。
+"""
+
+import hashlib
+import os
+import shutil
+import threading
+
+HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def digest_file(path):
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def write_new_file(path, data):
+    """写入文件内容：先写同目录临时文件再替换，目标若是共享的硬链接也不会被原地修改
+
+    data 为 str 时按 UTF-8 文本写入。
+    """
+    temp_path = f"{path}.{threading.get_ident()}.tmp"
+    try:
+        if isinstance(data, str):
+            f = open(temp_path, 'w', encoding='utf-8')
+        else:
+            f = open(temp_path, 'wb')
+        with f:
+            f.write(data)
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+class BlobStore:
+    """按内容寻址、以硬链接引用的文件存储（线程安全）
+
+    所有建立硬链接的操作与 gc() 持同一把锁：检查 blob / 引用到建立链接之间，
+    gc 不会把链接数暂时为 1 的 blob 删掉。
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def blob_path(self, digest):
+        return os.path.join(self.root, digest[:2], digest)
+
+    def ingest(self, path):
+        """把文件纳入存储，并让 path 成为 blob 的硬链接；返回是否成功共享"""
+        digest = digest_file(path)
+        with self.lock:
+            return self.link_blob(path, digest)
+
+    def link_blob(self, path, digest):
+        """让 path 成为 digest 对应 blob 的硬链接（调用方需持有 self.lock）"""
+        blob = self.blob_path(digest)
+        if not os.path.exists(blob):
+            os.makedirs(os.path.dirname(blob), exist_ok=True)
+            try:
+                os.link(path, blob)
+                return True
+            except OSError:
+                return False
+        try:
+            if os.path.samefile(blob, path):
+                return True
+            # 内容已存在：用指向 blob 的硬链接替换文件，释放重复的副本
+            temp_path = f"{path}.{threading.get_ident()}.link"
+            os.link(blob, temp_path)
+            os.replace(temp_path, path)
+            return True
+        except OSError:
+            return False
+
+    def ingest_tree(self, folder):
+        """纳入目录下所有尚未共享的文件（已是硬链接的文件跳过），返回新纳入的数量"""
+        count = 0
+        for dirpath, _, filenames in os.walk(folder):
+            for filename in filenames:
+                path = os.path.join(dirpath, filename)
+                try:
+                    if os.lstat(path).st_nlink > 1:
+                        continue
+                    if self.ingest(path):
+                        count += 1
+                except OSError:
+                    continue
+        return count
+
+    def link_copy(self, src, dst):
+        """复制文件：纳入存储后为 dst 新建硬链接，不支持时退回普通复制"""
+        try:
+            with self.lock:
+                if os.lstat(src).st_nlink > 1:
+                    os.link(src, dst)
+                    return dst
+            digest = digest_file(src)
+            with self.lock:
+                if self.link_blob(src, digest):
+                    os.link(src, dst)
+                    return dst
+        except OSError:
+            pass
+        return shutil.copy2(src, dst)
+
+    def gc(self):
+        """删除没有任何项目引用（硬链接数为 1）的 blob，返回 (删除数量, 释放字节数)"""
+        removed = 0
+        freed = 0
+        with self.lock:
+            for dirpath, _, filenames in os.walk(self.root):
+                for filename in filenames:
+                    path = os.path.join(dirpath, filename)
+                    try:
+                        st = os.lstat(path)
+                        if st.st_nlink <= 1:
+                            os.remove(path)
+                            removed += 1
+                            freed += st.st_size
+                    except OSError:
+                        continue
+        return removed, freed
+
+    def stats(self):
+        """{'blobs': 数量, 'bytes': 实际占用字节, 'references': 项目中的引用总数}"""
+        blobs = size = references = 0
+        for dirpath, _, filenames in os.walk(self.root):
+            for filename in filenames:
+                try:
+                    st = os.lstat(os.path.join(dirpath, filename))
+                except OSError:
+                    continue
+                blobs += 1
+                size += st.st_size
+                references += st.st_nlink - 1
+        return {'blobs': blobs, 'bytes': size, 'references': references}
@@ -0,0 +1,347 @@
+# -*- coding: utf-8 -*-
+"""
+项目目录（SQLite）
+保存项目列表和回收站列表，首次启动时从 data/projects.json / data/deleted_projects.json 迁移，
+可选导出为旧版 JSON 文件
+"""
+
+import json
+import os
+import sqlite3
+import threading
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL DEFAULT '',
+    date TEXT NOT NULL DEFAULT '',
+    status TEXT,
+    model_name TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_projects_date ON projects (date DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_projects_status ON projects (status, date DESC);
+CREATE INDEX IF NOT EXISTS idx_projects_model ON projects (model_name, date DESC);
+
+CREATE TABLE IF NOT EXISTS deleted_projects (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL DEFAULT '',
+    date TEXT NOT NULL DEFAULT '',
+    deleted_at TEXT NOT NULL DEFAULT '',
+    data TEXT NOT NULL,
+    size_bytes INTEGER,
+    reclaimable_bytes INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_deleted_projects_deleted_at ON deleted_projects (deleted_at DESC, id DESC);
+
+-- 页面列表缓存（/api/pages 使用），不放在项目记录中，列表接口的响应不随页面数增长
+CREATE TABLE IF NOT EXISTS project_pages (
+    project_id TEXT PRIMARY KEY,
+    html_mtime INTEGER,
+    pages TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def project_row(project):
+    """项目记录 -> projects 表的一行（完整记录以 JSON 保存在 data 列）"""
+    return (
+        project['id'],
+        project.get('name') or '',
+        project.get('date') or '',
+        project.get('status'),
+        project.get('model_name'),
+        json.dumps(project, ensure_ascii=False)
+    )
+
+
+def deleted_row(project):
+    return (
+        project['id'],
+        project.get('name') or '',
+        project.get('date') or '',
+        project.get('deletedAt') or '',
+        json.dumps(project, ensure_ascii=False)
+    )
+
+
+def write_json_file(path, data):
+    """写入临时文件后替换，外部工具不会读到写了一半的文件"""
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(temp_path, path)
+
+
+class ProjectCatalog:
+    """项目 / 回收站列表的 SQLite 存储（线程安全，所有操作共用一个连接并串行执行）"""
+
+    def __init__(self, db_path, export_files=None, writer=None):
+        """export_files: (projects.json 路径, deleted_projects.json 路径)，设置后每次修改同步导出
+        writer: MetadataWriter，设置后导出交给它合并写入，短时间内的多次修改只导出一次
+        """
+        self.db_path = db_path
+        self.export_files = export_files
+        self.writer = writer
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+        self.migrate_schema()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    # ---------- 迁移 / 导出 ----------
+
+    def migrate_schema(self):
+        """为旧版数据库补充新增的列"""
+        with self.lock, self.conn:
+            columns = {row[1] for row in self.conn.execute('PRAGMA table_info(deleted_projects)')}
+            for column in ('size_bytes', 'reclaimable_bytes'):
+                if column not in columns:
+                    self.conn.execute(f'ALTER TABLE deleted_projects ADD COLUMN {column} INTEGER')
+
+    def migrate_json(self, projects_file, deleted_file):
+        """从旧版 JSON 文件一次性导入（只执行一次，原文件保留不动）"""
+        with self.lock, self.conn:
+            if self.conn.execute("SELECT 1 FROM meta WHERE key = 'json_migrated'").fetchone():
+                return False
+            projects = self.read_json_list(projects_file)
+            deleted = self.read_json_list(deleted_file)
+            # 旧列表中可能有重复 ID，保留第一个
+            self.conn.executemany(
+                'INSERT OR IGNORE INTO projects (id, name, date, status, model_name, data) VALUES (?, ?, ?, ?, ?, ?)',
+                [project_row(p) for p in projects if p.get('id')]
+            )
+            self.conn.executemany(
+                'INSERT OR IGNORE INTO deleted_projects (id, name, date, deleted_at, data) VALUES (?, ?, ?, ?, ?)',
+                [deleted_row(p) for p in deleted if p.get('id')]
+            )
+            self.conn.execute("INSERT INTO meta (key, value) VALUES ('json_migrated', '1')")
+        print(f"[迁移] 已从 JSON 导入 {len(projects)} 个项目、{len(deleted)} 个已删除项目 -> {self.db_path}")
+        return True
+
+    @staticmethod
+    def read_json_list(path):
+        if not os.path.exists(path):
+            return []
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            return data if isinstance(data, list) else []
+        except Exception as e:
+            print(f"[迁移] 读取 {path} 失败: {e}")
+            return []
+
+    def export_json(self, projects_file, deleted_file):
+        """把当前列表导出为旧版 JSON 格式"""
+        write_json_file(projects_file, self.list_projects())
+        write_json_file(deleted_file, self.list_deleted())
+
+    def changed(self):
+        if not self.export_files:
+            return
+        if self.writer:
+            projects_file, deleted_file = self.export_files
+            self.writer.write_deferred(projects_file, self.list_projects)
+            self.writer.write_deferred(deleted_file, self.list_deleted)
+        else:
+            self.export_json(*self.export_files)
+
+    # ---------- 项目 ----------
+
+    def list_projects(self):
+        """全部项目，按日期倒序"""
+        with self.lock:
+            rows = self.conn.execute('SELECT data FROM projects ORDER BY date DESC, id DESC').fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def get_project(self, project_id):
+        with self.lock:
+            row = self.conn.execute('SELECT data FROM projects WHERE id = ?', (project_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def query_projects(self, limit, after=None, q=None, status=None, model=None):
+        """按日期倒序分页查询项目（keyset 分页）
+
+        after: 上一页最后一条的 (date, id)；q: 名称子串；
+        status: 状态值，'completed' 匹配已完成（无状态）的项目；model: 模型名称。
+        返回 (项目列表, 是否还有下一页)。
+        """
+        where, params = [], []
+        if after:
+            where.append('(date < ? OR (date = ? AND id < ?))')
+            params.extend([after[0], after[0], after[1]])
+        if q:
+            escaped = q.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            where.append("name LIKE ? ESCAPE '\\'")
+            params.append(f'%{escaped}%')
+        if status == 'completed':
+            where.append("(status IS NULL OR status = '' OR status = 'completed')")
+        elif status:
+            where.append('status = ?')
+            params.append(status)
+        if model:
+            where.append('model_name = ?')
+            params.append(model)
+        sql = 'SELECT data FROM projects'
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        sql += ' ORDER BY date DESC, id DESC LIMIT ?'
+        params.append(limit + 1)
+        with self.lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        projects = [json.loads(row[0]) for row in rows[:limit]]
+        return projects, len(rows) > limit
+
+    def upsert_projects(self, projects):
+        with self.lock:
+            with self.conn:
+                self.conn.executemany(
+                    'INSERT OR REPLACE INTO projects (id, name, date, status, model_name, data) VALUES (?, ?, ?, ?, ?, ?)',
+                    [project_row(p) for p in projects]
+                )
+            self.changed()
+
+    def upsert_project(self, project):
+        self.upsert_projects([project])
+
+    def update_project(self, project_id, project):
+        """用新的记录替换 project_id 对应的行（记录中的 id 可以与原 id 不同，用于重命名）"""
+        with self.lock:
+            with self.conn:
+                if project['id'] != project_id:
+                    self.conn.execute('DELETE FROM projects WHERE id = ?', (project_id,))
+                    self.conn.execute('DELETE FROM project_pages WHERE project_id = ?', (project_id,))
+                self.conn.execute(
+                    'INSERT OR REPLACE INTO projects (id, name, date, status, model_name, data) VALUES (?, ?, ?, ?, ?, ?)',
+                    project_row(project)
+                )
+            self.changed()
+
+    def delete_projects(self, project_ids):
+        with self.lock:
+            with self.conn:
+                self.conn.executemany('DELETE FROM projects WHERE id = ?', [(pid,) for pid in project_ids])
+                self.conn.executemany('DELETE FROM project_pages WHERE project_id = ?', [(pid,) for pid in project_ids])
+            self.changed()
+
+    def delete_project(self, project_id):
+        self.delete_projects([project_id])
+
+    def replace_projects(self, projects):
+        with self.lock:
+            with self.conn:
+                self.conn.execute('DELETE FROM projects')
+                self.conn.executemany(
+                    'INSERT OR IGNORE INTO projects (id, name, date, status, model_name, data) VALUES (?, ?, ?, ?, ?, ?)',
+                    [project_row(p) for p in projects]
+                )
+            self.changed()
+
+    # ---------- 页面列表缓存 ----------
+
+    def get_pages(self, project_id):
+        """返回 (html_mtime, pages)；没有缓存时返回 (None, None)"""
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT html_mtime, pages FROM project_pages WHERE project_id = ?', (project_id,)).fetchone()
+        return (row[0], json.loads(row[1])) if row else (None, None)
+
+    def set_pages(self, project_id, html_mtime, pages):
+        with self.lock, self.conn:
+            self.conn.execute(
+                'INSERT OR REPLACE INTO project_pages (project_id, html_mtime, pages) VALUES (?, ?, ?)',
+                (project_id, html_mtime, json.dumps(pages, ensure_ascii=False)))
+
+    # ---------- 回收站 ----------
+
+    def list_deleted(self):
+        """全部已删除项目，按删除时间倒序"""
+        with self.lock:
+            rows = self.conn.execute('SELECT data FROM deleted_projects ORDER BY deleted_at DESC, id DESC').fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def query_deleted(self, limit, after=None):
+        """按删除时间倒序分页查询回收站（keyset 分页），附带占用字节数
+
+        after: 上一页最后一条的 (deleted_at, id)；返回 (项目列表, 是否还有下一页)。
+        sizeBytes / reclaimableBytes 为 None 表示尚未统计。
+        """
+        sql = 'SELECT data, size_bytes, reclaimable_bytes FROM deleted_projects'
+        params = []
+        if after:
+            sql += ' WHERE (deleted_at < ? OR (deleted_at = ? AND id < ?))'
+            params.extend([after[0], after[0], after[1]])
+        sql += ' ORDER BY deleted_at DESC, id DESC LIMIT ?'
+        params.append(limit + 1)
+        with self.lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        projects = []
+        for data, size_bytes, reclaimable_bytes in rows[:limit]:
+            project = json.loads(data)
+            project['sizeBytes'] = size_bytes
+            project['reclaimableBytes'] = reclaimable_bytes
+            projects.append(project)
+        return projects, len(rows) > limit
+
+    def deleted_stats(self):
+        """回收站统计：项目数、总字节数、可回收字节数（只含已统计的项目）"""
+        with self.lock:
+            count, size_bytes, reclaimable_bytes = self.conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size_bytes), 0), COALESCE(SUM(reclaimable_bytes), 0) FROM deleted_projects'
+            ).fetchone()
+        return {'count': count, 'sizeBytes': size_bytes, 'reclaimableBytes': reclaimable_bytes}
+
+    def set_deleted_size(self, project_id, size_bytes, reclaimable_bytes):
+        with self.lock:
+            with self.conn:
+                self.conn.execute(
+                    'UPDATE deleted_projects SET size_bytes = ?, reclaimable_bytes = ? WHERE id = ?',
+                    (size_bytes, reclaimable_bytes, project_id)
+                )
+
+    def deleted_oldest_first(self):
+        """[(id, deleted_at, 可回收字节数)]，按删除时间正序，供回收站清理使用"""
+        with self.lock:
+            return self.conn.execute(
+                'SELECT id, deleted_at, COALESCE(reclaimable_bytes, 0) FROM deleted_projects ORDER BY deleted_at, id'
+            ).fetchall()
+
+    def get_deleted(self, project_id):
+        with self.lock:
+            row = self.conn.execute('SELECT data FROM deleted_projects WHERE id = ?', (project_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def upsert_deleted(self, project):
+        with self.lock:
+            with self.conn:
+                self.conn.execute(
+                    'INSERT OR REPLACE INTO deleted_projects (id, name, date, deleted_at, data) VALUES (?, ?, ?, ?, ?)',
+                    deleted_row(project)
+                )
+            self.changed()
+
+    def delete_deleted(self, project_id):
+        with self.lock:
+            with self.conn:
+                self.conn.execute('DELETE FROM deleted_projects WHERE id = ?', (project_id,))
+            self.changed()
+
+    def replace_deleted(self, projects):
+        with self.lock:
+            with self.conn:
+                self.conn.execute('DELETE FROM deleted_projects')
+                self.conn.executemany(
+                    'INSERT OR IGNORE INTO deleted_projects (id, name, date, deleted_at, data) VALUES (?, ?, ?, ?, ?)',
+                    [deleted_row(p) for p in projects]
+                )
+            self.changed()
@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""
+项目冷存储
+长时间未修改的项目逐文件压缩为同目录下的 <文件名>.gz，并放置 .cold 标记
+（逐行记录被压缩文件的相对路径）；record.json、共享的硬链接文件和压缩收益不足的文件保持原样。
+
+读取统一经由 exists / stat / open_file / read_text，冷热文件对调用方透明；
+修改项目前调用 thaw() 解压回热存储。
+"""
+
+import gzip
+import os
+import shutil
+import struct
+import threading
+import time
+
+GZ_SUFFIX = '.gz'
+COLD_MARKER = '.cold'
+HOT_ONLY_FILES = ('record.json',)
+COMPRESS_LEVEL = 6
+COPY_CHUNK_SIZE = 64 * 1024
+
+
+def cold_path(path):
+    return path + GZ_SUFFIX
+
+
+def is_cold(folder):
+    return os.path.exists(os.path.join(folder, COLD_MARKER))
+
+
+def exists(path):
+    """文件是否存在（热文件或冷存储中的压缩文件）"""
+    return os.path.exists(path) or os.path.exists(cold_path(path))
+
+
+def gzip_original_size(path):
+    """gzip 尾部记录的原始长度（ISIZE，原文件小于 4GB 时准确）"""
+    with open(path, 'rb') as f:
+        f.seek(-4, os.SEEK_END)
+        return struct.unpack('<I', f.read(4))[0]
+
+
+def stat(path):
+    """返回 (原始字节数, mtime_ns)；文件不存在时抛出 OSError"""
+    try:
+        st = os.stat(path)
+        return st.st_size, st.st_mtime_ns
+    except FileNotFoundError:
+        st = os.stat(cold_path(path))
+        return gzip_original_size(cold_path(path)), st.st_mtime_ns
+
+
+def open_file(path, mode='rb', encoding=None, errors=None):
+    """以只读方式打开文件，冷存储中的文件透明解压"""
+    try:
+        return open(path, mode, encoding=encoding, errors=errors)
+    except FileNotFoundError:
+        if not os.path.exists(cold_path(path)):
+            raise
+        gz_mode = 'rt' if 'b' not in mode else 'rb'
+        return gzip.open(cold_path(path), gz_mode, encoding=encoding, errors=errors)
+
+
+def read_text(path, default=''):
+    try:
+        with open_file(path, 'r', encoding='utf-8', errors='replace') as f:
+            return f.read()
+    except OSError:
+        return default
+
+
+def last_modified(folder):
+    """项目文件夹中最近一次修改的时间（含文件夹自身，新建 / 删除 / 替换文件都会更新）"""
+    latest = os.stat(folder).st_mtime
+    for dirpath, dirnames, filenames in os.walk(folder):
+        for name in dirnames + filenames:
+            try:
+                latest = max(latest, os.lstat(os.path.join(dirpath, name)).st_mtime)
+            except OSError:
+                continue
+    return latest
+
+
+class ColdStorage:
+    """项目文件夹的冷热切换（按文件夹串行，线程安全）"""
+
+    def __init__(self, min_saving=0.1):
+        self.min_saving = min_saving
+        self.lock = threading.RLock()
+
+    def compress_file(self, path, st):
+        """压缩单个文件，返回节省的字节数；不值得压缩时返回 0 并保留原文件"""
+        target = cold_path(path)
+        temp_path = f"{target}.{threading.get_ident()}.tmp"
+        try:
+            with open(path, 'rb') as src, open(temp_path, 'wb') as raw:
+                with gzip.GzipFile(filename='', mode='wb', fileobj=raw, compresslevel=COMPRESS_LEVEL, mtime=0) as gz:
+                    shutil.copyfileobj(src, gz, COPY_CHUNK_SIZE)
+            compressed = os.path.getsize(temp_path)
+            if compressed > st.st_size * (1 - self.min_saving):
+                return 0
+            current = os.lstat(path)
+            if (current.st_ino, current.st_mtime_ns, current.st_size) != (st.st_ino, st.st_mtime_ns, st.st_size):
+                # 压缩期间文件被替换：保留新文件
+                return 0
+            os.utime(temp_path, ns=(st.st_atime_ns, st.st_mtime_ns))
+            os.replace(temp_path, target)
+            os.remove(path)
+            return st.st_size - compressed
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def freeze(self, folder):
+        """把项目文件夹转入冷存储，返回 (压缩的文件数, 节省的字节数)"""
+        files = saved = 0
+        with self.lock:
+            if is_cold(folder) or not os.path.isdir(folder):
+                return files, saved
+            # 先放标记，每压缩一个文件记录一行：中途失败时已压缩的文件也能被 thaw 解压回来
+            with open(os.path.join(folder, COLD_MARKER), 'w', encoding='utf-8') as marker:
+                for dirpath, _, filenames in os.walk(folder):
+                    for filename in filenames:
+                        path = os.path.join(dirpath, filename)
+                        if (filename in HOT_ONLY_FILES and dirpath == folder) or filename == COLD_MARKER \
+                                or filename.endswith((GZ_SUFFIX, '.tmp')):
+                            continue
+                        try:
+                            st = os.lstat(path)
+                            if st.st_nlink > 1 or not st.st_size:
+                                continue
+                            saving = self.compress_file(path, st)
+                        except OSError as e:
+                            print(f"[冷存储] 压缩失败 {path}: {e}")
+                            continue
+                        if saving:
+                            marker.write(os.path.relpath(path, folder) + '\n')
+                            marker.flush()
+                            files += 1
+                            saved += saving
+        return files, saved
+
+    def thaw(self, folder):
+        """把项目文件夹解压回热存储，返回解压的文件数；不在冷存储中时直接返回 0"""
+        count = 0
+        with self.lock:
+            marker_path = os.path.join(folder, COLD_MARKER)
+            try:
+                with open(marker_path, 'r', encoding='utf-8') as f:
+                    rel_paths = [line.rstrip('\n') for line in f if line.strip()]
+            except FileNotFoundError:
+                return count
+            for rel_path in rel_paths:
+                path = os.path.join(folder, rel_path)
+                source = cold_path(path)
+                if not os.path.exists(source):
+                    continue
+                if os.path.exists(path):
+                    # 原文件已存在（压缩中途中断）：以原文件为准
+                    os.remove(source)
+                    continue
+                st = os.stat(source)
+                temp_path = f"{path}.{threading.get_ident()}.tmp"
+                try:
+                    with gzip.open(source, 'rb') as src, open(temp_path, 'wb') as dst:
+                        shutil.copyfileobj(src, dst, COPY_CHUNK_SIZE)
+                    os.utime(temp_path, ns=(st.st_atime_ns, st.st_mtime_ns))
+                    os.replace(temp_path, path)
+                finally:
+                    if os.path.exists(temp_path):
+                        os.remove(temp_path)
+                os.remove(source)
+                count += 1
+            os.remove(marker_path)
+        return count
+
+    def is_idle(self, folder, idle_days, now=None):
+        """项目文件夹是否已超过 idle_days 天未修改"""
+        now = now or time.time()
+        try:
+            return now - last_modified(folder) >= idle_days * 86400
+        except OSError:
+            return False
@@ -15,20 +15,22 @@ import base64
 import urllib.request
 from datetime import datetime
 
+from cold_storage import ColdStorage
+from project_layout import ProjectLayout
+
 # 获取脚本所在目录
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECTS_DIR = os.path.join(SCRIPT_DIR, 'projects')
 EXPORTS_DIR = os.path.join(SCRIPT_DIR, 'exports')
+# 项目文件夹可能是平铺或分片布局，按 ID 解析实际位置
+project_layout = ProjectLayout(PROJECTS_DIR)
 
 # CDN 资源缓存目录
 CDN_CACHE_DIR = os.path.join(SCRIPT_DIR, '.cdn_cache')
 
 def list_projects():
     """列出所有项目"""
-    if not os.path.exists(PROJECTS_DIR):
-        return []
-    return [d for d in os.listdir(PROJECTS_DIR) 
-            if os.path.isdir(os.path.join(PROJECTS_DIR, d))]
+    return [entry.name for entry in project_layout.scan()]
 
 def read_file(path, default=''):
     """读取文件内容"""
@@ -527,7 +529,7 @@ def inline_cdn_resources(html_content):
 
 def export_preview_only(project_name):
     """纯预览模式导出 - 只导出原型本身"""
-    project_dir = os.path.join(PROJECTS_DIR, project_name)
+    project_dir = project_layout.path(project_name)
     export_dir = os.path.join(EXPORTS_DIR, project_name + '_预览版')
     
     # 清理并创建导出目录
@@ -615,7 +617,7 @@ def export_preview_only(project_name):
 
 def export_embedded(project_name):
     """内嵌模式导出 - 原型内嵌到预览框架中，单文件可分享"""
-    project_dir = os.path.join(PROJECTS_DIR, project_name)
+    project_dir = project_layout.path(project_name)
     export_dir = os.path.join(EXPORTS_DIR, project_name + '_内嵌版')
     
     # 清理并创建导出目录
@@ -931,20 +933,24 @@ def export_embedded(project_name):
     return export_dir
 
 
-def export_project(project_name, mode='dev'):
+def export_project(project_name, mode='dev', cold_tier=None):
     """导出项目
     
     Args:
         project_name: 项目名称
         mode: 导出模式 - 'dev' 研发模式, 'preview' 纯预览模式, 'embedded' 内嵌模式
+        cold_tier: 服务端共享的 ColdStorage 实例（与后台冷存储线程共用锁）；
+                   命令行运行时为 None，使用本次导出私有的实例
     """
+    # 冷存储中的项目先解压回原文件
+    (cold_tier or ColdStorage()).thaw(project_layout.path(project_name))
     if mode == 'preview':
         return export_preview_only(project_name)
     elif mode == 'embedded':
         return export_embedded(project_name)
     
     # 以下是原有的研发模式导出逻辑
-    project_dir = os.path.join(PROJECTS_DIR, project_name)
+    project_dir = project_layout.path(project_name)
     export_dir = os.path.join(EXPORTS_DIR, project_name)
     
     # 清理并创建导出目录
@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+"""
+元数据合并写入器
+record.json、导出的 projects.json 等 JSON 元数据的读写入口，
+短时间内的多次修改合并为一次原子落盘。
+
+加锁顺序固定为：文件的修改锁（write / update）→ 文件的落盘锁（commit）→ self.condition，
+持有 self.condition 时不读写磁盘、也不获取其它锁。
+
+移动 / 复制项目文件夹、或交给外部进程读取之前，需先调用 flush_dir 落盘；
+删除文件夹之前调用 discard_dir。
+"""
+
+import copy
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+class MetadataWriter:
+    """带写入合并的 JSON 元数据存储（线程安全）"""
+
+    def __init__(self, delay=0.2, cache_size=2048):
+        self.delay = delay
+        self.cache_size = cache_size
+        self.condition = threading.Condition()
+        self.entries = OrderedDict()  # 绝对路径 -> 最新数据（已提交或待写入），按最近使用排序
+        self.pending = {}  # 绝对路径 -> 最晚落盘时间
+        self.producers = {}  # 绝对路径 -> 落盘时才生成数据的函数（write_deferred）
+        self.file_locks = {}  # 落盘锁：同一文件的落盘串行
+        self.update_locks = {}  # 修改锁：同一文件的 write / update 串行
+        self.committing = set()  # 正在落盘的文件
+        self.closed = False
+        self.thread = threading.Thread(target=self.run, name='metadata-writer', daemon=True)
+        self.thread.start()
+
+    # ---------- 读取 ----------
+
+    def read(self, path, default=None):
+        """返回文件的最新版本（副本）；文件不存在或无法解析时返回 default"""
+        key = os.path.abspath(path)
+        if key in self.producers:
+            self.flush(path)
+        with self.condition:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return copy.deepcopy(self.entries[key])
+        try:
+            with open(key, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return copy.deepcopy(default)
+        with self.condition:
+            # 读盘期间可能已有新的写入，以内存中的版本为准
+            if key not in self.entries:
+                self.entries[key] = data
+                self.evict()
+            return copy.deepcopy(self.entries[key])
+
+    # ---------- 写入 ----------
+
+    def update_lock(self, key):
+        with self.condition:
+            return self.update_locks.setdefault(key, threading.RLock())
+
+    def write(self, path, data):
+        """写入新版本：立即对读取可见，稍后合并落盘"""
+        key = os.path.abspath(path)
+        data = copy.deepcopy(data)
+        with self.update_lock(key):
+            with self.condition:
+                self.producers.pop(key, None)
+                self.entries[key] = data
+                self.entries.move_to_end(key)
+                self.schedule(key)
+
+    def update(self, path, func, default=None):
+        """读-改-写：func 接收最新数据副本并原地修改（或返回新数据），与同一文件的其它写入串行
+
+        读取（可能落盘或读磁盘）在 self.condition 之外进行，不阻塞其它文件的读写。
+        """
+        key = os.path.abspath(path)
+        with self.update_lock(key):
+            data = self.read(path, default)
+            if data is None:
+                return None
+            result = func(data)
+            if result is not None:
+                data = result
+            self.write(path, data)
+            return copy.deepcopy(data)
+
+    def write_deferred(self, path, producer):
+        """登记一次写入，落盘时才调用 producer() 生成数据（适合导出整张列表）"""
+        key = os.path.abspath(path)
+        with self.update_lock(key), self.condition:
+            self.entries.pop(key, None)
+            self.producers[key] = producer
+            self.schedule(key)
+
+    def schedule(self, key):
+        if key not in self.pending:
+            # 只在窗口开始时设置落盘时间，持续写入也不会无限推迟
+            self.pending[key] = time.monotonic() + self.delay
+            self.condition.notify_all()
+
+    def has_pending(self, path):
+        """文件是否有尚未落盘的修改"""
+        return os.path.abspath(path) in self.pending
+
+    # ---------- 落盘 ----------
+
+    def flush(self, path=None):
+        """立即落盘指定文件（不传则全部）的待写入修改"""
+        with self.condition:
+            if path is None:
+                keys = list(self.pending)
+            else:
+                key = os.path.abspath(path)
+                keys = [key] if key in self.pending else []
+        for key in keys:
+            self.commit(key)
+
+    def flush_dir(self, folder):
+        """落盘某个目录下所有待写入的文件，并丢弃该目录的缓存（移动 / 复制目录前调用）"""
+        prefix = os.path.join(os.path.abspath(folder), '')
+        with self.condition:
+            keys = [key for key in self.pending if key.startswith(prefix)]
+        for key in keys:
+            self.commit(key)
+        with self.condition:
+            # 等待后台线程正在进行的写入完成，避免目录移走后才 os.replace
+            while any(key.startswith(prefix) for key in self.committing):
+                self.condition.wait()
+            for key in [key for key in self.entries if key.startswith(prefix) and key not in self.pending]:
+                del self.entries[key]
+
+    def discard_dir(self, folder):
+        """丢弃某个目录下所有待写入的修改和缓存（删除目录前调用）"""
+        prefix = os.path.join(os.path.abspath(folder), '')
+        with self.condition:
+            for key in [key for key in self.entries if key.startswith(prefix)]:
+                del self.entries[key]
+            for key in [key for key in self.pending if key.startswith(prefix)]:
+                del self.pending[key]
+                self.producers.pop(key, None)
+
+    def commit(self, key):
+        with self.condition:
+            lock = self.file_locks.setdefault(key, threading.Lock())
+        with lock:
+            with self.condition:
+                if key not in self.pending:
+                    return
+                del self.pending[key]
+                producer = self.producers.pop(key, None)
+                data = self.entries.get(key)
+                self.committing.add(key)
+            try:
+                if producer is not None:
+                    data = producer()
+                write_json_atomic(key, data)
+            except Exception as e:
+                print(f"[元数据] 写入失败 {key}: {e}")
+            finally:
+                with self.condition:
+                    self.committing.discard(key)
+                    self.evict()
+                    self.condition.notify_all()
+
+    def evict(self):
+        """超出缓存上限时淘汰最久未用的已提交条目（待写入的条目不会被淘汰）"""
+        if len(self.entries) <= self.cache_size:
+            return
+        for key in list(self.entries):
+            if len(self.entries) <= self.cache_size:
+                break
+            if key not in self.pending:
+                del self.entries[key]
+
+    def run(self):
+        while True:
+            with self.condition:
+                while not self.closed:
+                    now = time.monotonic()
+                    due = [key for key, deadline in self.pending.items() if deadline <= now]
+                    if due:
+                        break
+                    timeout = min(self.pending.values()) - now if self.pending else None
+                    self.condition.wait(timeout)
+                if self.closed:
+                    return
+            for key in due:
+                self.commit(key)
+
+    def close(self):
+        """停止后台线程并落盘全部待写入修改"""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        self.thread.join(timeout=5)
+        self.flush()
+
+
+def write_json_atomic(path, data):
+    """原子写入 JSON：同目录临时文件写完并 fsync 后再替换目标文件"""
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
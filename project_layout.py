@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+"""
+项目文件夹布局
+- flat（默认）：projects/<id>/
+- sharded：按项目 ID 中的日期分片，projects/2026/10/<id>/；
+  ID 中没有日期（名称_年月日_时间）的项目放在 projects/0000/00/<id>/
+path() 按 ID 解析实际位置，两种布局可以共存。
+
+迁移工具（迁移前请先停止服务）：
+    python project_layout.py migrate --to sharded [--dry-run]
+    python project_layout.py migrate --to flat
+"""
+
+import argparse
+import os
+import re
+import shutil
+import sys
+
+# 项目 ID：名称_年月日_时间（见 server.generate_project_id）
+ID_DATE_RE = re.compile(r'_(\d{4})(\d{2})\d{2}_[^_]+$')
+YEAR_RE = re.compile(r'^\d{4}$')
+MONTH_RE = re.compile(r'^\d{2}$')
+UNDATED_SHARD = ('0000', '00')
+LAYOUTS = ('flat', 'sharded')
+
+
+def is_project_folder(path):
+    return os.path.exists(os.path.join(path, 'index.html')) or os.path.exists(os.path.join(path, 'record.json'))
+
+
+class ProjectLayout:
+    """项目 ID → 文件夹路径的解析，以及两种布局下的目录遍历"""
+
+    def __init__(self, root, sharded=False):
+        self.root = root
+        self.sharded = sharded
+
+    # ---------- 路径 ----------
+
+    @staticmethod
+    def shard_of(project_id):
+        match = ID_DATE_RE.search(project_id)
+        return match.groups() if match else UNDATED_SHARD
+
+    def flat_path(self, project_id):
+        return os.path.join(self.root, project_id)
+
+    def sharded_path(self, project_id):
+        return os.path.join(self.root, *self.shard_of(project_id), project_id)
+
+    def preferred_path(self, project_id):
+        return self.sharded_path(project_id) if self.sharded else self.flat_path(project_id)
+
+    def path(self, project_id):
+        """项目文件夹的实际位置；两种布局下都不存在时返回当前布局下的位置"""
+        preferred = self.preferred_path(project_id)
+        if os.path.isdir(preferred):
+            return preferred
+        other = self.flat_path(project_id) if self.sharded else self.sharded_path(project_id)
+        return other if os.path.isdir(other) else preferred
+
+    def new_path(self, project_id):
+        """新建 / 移入项目时使用的位置（同时创建分片目录）"""
+        path = self.preferred_path(project_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return path
+
+    # ---------- 遍历 ----------
+
+    def is_shard_dir(self, path, name):
+        # 名称为四位数字的文件夹也可能是旧项目：有 index.html / record.json 的视为项目
+        return YEAR_RE.match(name) is not None and not is_project_folder(path)
+
+    def shard_dirs(self):
+        """[(年份目录, [月份目录...])]"""
+        shards = []
+        if not os.path.isdir(self.root):
+            return shards
+        for year in os.scandir(self.root):
+            if year.is_dir() and self.is_shard_dir(year.path, year.name):
+                months = [month.path for month in os.scandir(year.path)
+                          if month.is_dir() and MONTH_RE.match(month.name)]
+                shards.append((year.path, months))
+        return shards
+
+    def scan(self):
+        """遍历所有项目文件夹（两种布局），返回 os.DirEntry；跳过 . 开头的内部目录"""
+        if not os.path.isdir(self.root):
+            return
+        shard_roots = []
+        for entry in os.scandir(self.root):
+            if not entry.is_dir() or entry.name.startswith('.'):
+                continue
+            if self.is_shard_dir(entry.path, entry.name):
+                shard_roots.append(entry.path)
+            else:
+                yield entry
+        for year_path in shard_roots:
+            for month in os.scandir(year_path):
+                if not month.is_dir() or not MONTH_RE.match(month.name):
+                    continue
+                for entry in os.scandir(month.path):
+                    if entry.is_dir() and not entry.name.startswith('.'):
+                        yield entry
+
+    def signature(self):
+        """projects/ 及各分片目录的 mtime，任一变化说明有文件夹新增 / 删除"""
+        try:
+            mtimes = [os.stat(self.root).st_mtime_ns]
+        except OSError:
+            return None
+        for year_path, months in self.shard_dirs():
+            for path in [year_path] + months:
+                try:
+                    mtimes.append(os.stat(path).st_mtime_ns)
+                except OSError:
+                    return None
+        return tuple(mtimes)
+
+    # ---------- 迁移 ----------
+
+    def migrate(self, sharded, dry_run=False, log=print):
+        """把所有项目移到指定布局，返回移动的数量；目标已存在的项目跳过"""
+        target = ProjectLayout(self.root, sharded)
+        moved = 0
+        for entry in list(self.scan()):
+            destination = target.preferred_path(entry.name)
+            if os.path.abspath(entry.path) == os.path.abspath(destination):
+                continue
+            if os.path.exists(destination):
+                log(f"[跳过] 目标已存在: {destination}")
+                continue
+            log(f"{entry.path} -> {destination}")
+            if not dry_run:
+                os.makedirs(os.path.dirname(destination), exist_ok=True)
+                shutil.move(entry.path, destination)
+            moved += 1
+        if not sharded and not dry_run:
+            # 删除迁移后留下的空分片目录
+            for year_path, months in self.shard_dirs():
+                for month_path in months:
+                    if not os.listdir(month_path):
+                        os.rmdir(month_path)
+                if not os.listdir(year_path):
+                    os.rmdir(year_path)
+        return moved
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='项目文件夹布局迁移')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    migrate_parser = subparsers.add_parser('migrate', help='把 projects/ 下的项目迁移到指定布局')
+    migrate_parser.add_argument('--to', choices=LAYOUTS, required=True, help='目标布局')
+    migrate_parser.add_argument('--root', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'projects'),
+                                help='项目目录（默认为脚本所在目录下的 projects/）')
+    migrate_parser.add_argument('--dry-run', action='store_true', help='只打印将要移动的项目')
+    args = parser.parse_args(argv)
+
+    layout = ProjectLayout(args.root)
+    moved = layout.migrate(args.to == 'sharded', dry_run=args.dry_run)
+    action = '将移动' if args.dry_run else '已移动'
+    print(f"{action} {moved} 个项目到 {args.to} 布局")
+    if not args.dry_run and moved:
+        print("请在 config.json 中设置 projects.layout 与之一致后再启动服务")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+"""
+项目全文检索（倒排索引）
+索引项目名称、prompt.txt、record.json 和 prd/*.md，存放在 catalog.db 中；
+英文按单词、中文按相邻两字切分，BM25 排序
+"""
+
+import heapq
+import math
+import re
+from collections import Counter
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS search_docs (
+    project_id TEXT PRIMARY KEY,
+    length REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS search_postings (
+    term TEXT NOT NULL,
+    project_id TEXT NOT NULL,
+    tf REAL NOT NULL,
+    PRIMARY KEY (term, project_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_search_postings_project ON search_postings (project_id);
+"""
+
+# 各字段的词频权重：名称命中比正文命中更重要
+FIELD_WEIGHTS = {
+    'name': 3.0,
+    'record': 2.0,
+    'prd': 1.0,
+    'prompt': 1.0,
+}
+
+# BM25 参数
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+MAX_QUERY_TERMS = 32
+MAX_TERM_LENGTH = 40
+
+TOKEN_RE = re.compile(r'[a-z0-9]+|[\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+')
+
+
+def tokenize(text):
+    """切分为检索词：英文 / 数字按单词，中文按相邻两字；单个汉字保留为单字"""
+    terms = []
+    for match in TOKEN_RE.finditer(text.lower()):
+        run = match.group()
+        if run[0] < '\u0080':
+            if len(run) <= MAX_TERM_LENGTH:
+                terms.append(run)
+        elif len(run) == 1:
+            terms.append(run)
+        else:
+            terms.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return terms
+
+
+def record_text(record, skip_keys=('images', 'createdAt', 'sourceProjectId', 'copiedFrom', 'similarity',
+                                   'status', 'github_url', 'github_published_at', 'github_mode')):
+    """取出 record.json 中的文本内容（页面名称、布局、功能、交互、全局设置等）"""
+    parts = []
+
+    def walk(value):
+        if isinstance(value, str):
+            parts.append(value)
+        elif isinstance(value, dict):
+            for key, item in value.items():
+                if key not in skip_keys:
+                    walk(item)
+        elif isinstance(value, list):
+            for item in value:
+                walk(item)
+
+    walk(record)
+    return '\n'.join(parts)
+
+
+class SearchIndex:
+    """保存在项目目录数据库中的倒排索引，与 ProjectCatalog 共用连接和锁"""
+
+    def __init__(self, catalog):
+        self.catalog = catalog
+        with catalog.lock:
+            catalog.conn.executescript(SCHEMA)
+            # 文档长度常驻内存，查询时无需再关联 search_docs
+            self.lengths = dict(catalog.conn.execute('SELECT project_id, length FROM search_docs'))
+
+    def index_document(self, project_id, fields):
+        """重建一个项目的倒排记录；fields: {字段名: 文本}"""
+        counts = Counter()
+        for field, text in fields.items():
+            if not text:
+                continue
+            weight = FIELD_WEIGHTS.get(field, 1.0)
+            for term in tokenize(text):
+                counts[term] += weight
+        length = sum(counts.values())
+        conn = self.catalog.conn
+        with self.catalog.lock:
+            with conn:
+                conn.execute('DELETE FROM search_postings WHERE project_id = ?', (project_id,))
+                conn.executemany(
+                    'INSERT INTO search_postings (term, project_id, tf) VALUES (?, ?, ?)',
+                    [(term, project_id, tf) for term, tf in counts.items()]
+                )
+                conn.execute(
+                    'INSERT OR REPLACE INTO search_docs (project_id, length) VALUES (?, ?)',
+                    (project_id, length)
+                )
+            self.lengths[project_id] = length
+
+    def remove(self, project_id):
+        conn = self.catalog.conn
+        with self.catalog.lock:
+            with conn:
+                conn.execute('DELETE FROM search_postings WHERE project_id = ?', (project_id,))
+                conn.execute('DELETE FROM search_docs WHERE project_id = ?', (project_id,))
+            self.lengths.pop(project_id, None)
+
+    def unindexed_projects(self):
+        """项目目录中尚未建立索引的项目 ID（外部工具创建、或旧版本遗留的项目）"""
+        with self.catalog.lock:
+            rows = self.catalog.conn.execute(
+                'SELECT p.id FROM projects p LEFT JOIN search_docs d ON d.project_id = p.id '
+                'WHERE d.project_id IS NULL'
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def prune(self):
+        """删除已不在项目列表中的项目的索引，返回删除数量"""
+        with self.catalog.lock:
+            rows = self.catalog.conn.execute(
+                'SELECT d.project_id FROM search_docs d LEFT JOIN projects p ON p.id = d.project_id '
+                'WHERE p.id IS NULL'
+            ).fetchall()
+        for row in rows:
+            self.remove(row[0])
+        return len(rows)
+
+    def search(self, query, limit=20):
+        """BM25 排序检索，返回 [(project_id, score)]，分数从高到低"""
+        terms = list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TERMS]
+        if not terms:
+            return []
+        conn = self.catalog.conn
+        lengths = self.lengths
+        scores = Counter()
+        matched = Counter()
+        with self.catalog.lock:
+            total = len(lengths)
+            if not total:
+                return []
+            avg_length = sum(lengths.values()) / total or 1.0
+            for term in terms:
+                if len(term) == 1 and term >= '\u0080':
+                    # 单个汉字：匹配以该字开头的两字词（以及单字词）
+                    rows = conn.execute(
+                        'SELECT project_id, SUM(tf) FROM search_postings '
+                        'WHERE term >= ? AND term < ? GROUP BY project_id',
+                        (term, term + '\uffff')
+                    ).fetchall()
+                else:
+                    rows = conn.execute(
+                        'SELECT project_id, tf FROM search_postings WHERE term = ?', (term,)
+                    ).fetchall()
+                if not rows:
+                    continue
+                idf = math.log(1 + (total - len(rows) + 0.5) / (len(rows) + 0.5))
+                k1_plus = idf * (BM25_K1 + 1)
+                for project_id, tf in rows:
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths.get(project_id, avg_length) / avg_length)
+                    scores[project_id] += k1_plus * tf / (tf + norm)
+                    matched[project_id] += 1
+        # 命中的查询词越多越靠前：按覆盖比例缩放分数
+        term_count = len(terms)
+        return heapq.nlargest(
+            limit,
+            ((project_id, score * matched[project_id] / term_count) for project_id, score in scores.items()),
+            key=lambda item: item[1]
+        )
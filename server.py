@@ -17,15 +17,36 @@ import datetime
 import urllib.request
 import urllib.parse
 import base64
+import binascii
+import email.utils
+import gzip
+import io
+import mimetypes
 import ssl
 import hashlib
+import math
 import requests # Add requests import
 import subprocess
 import tempfile
 import shlex
+import shutil
 import threading
 import time
 import sys
+import types
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+from catalog import ProjectCatalog
+from metadata_writer import MetadataWriter
+from search_index import SearchIndex, record_text
+from blob_store import BlobStore, write_new_file
+from project_layout import ProjectLayout
+import cold_storage
+from ai_sessions import SessionPool
+from ai_retry import RetryPolicy, BreakerRegistry, classify, KIND_CONNECTION
+from ai_transport import HttpClientTransport
+from ai_cache import ResponseCache, cache_key
 
 # ==================== PyInstaller 兼容 ====================
 def get_base_path():
@@ -40,6 +61,7 @@ os.chdir(get_base_path())
 # ==================== 异步任务管理 ====================
 generating_tasks = {}  # {project_id: {status, progress, error, thread}}
 tasks_lock = threading.Lock()  # 线程锁
+projects_lock = threading.RLock()  # 项目列表读-改-写锁（多线程服务下串行化 projects.json 的修改）
 
 # 状态常量
 STATUS_PENDING = 'pending'
@@ -47,6 +69,73 @@ STATUS_GENERATING = 'generating'
 STATUS_COMPLETED = 'completed'
 STATUS_FAILED = 'failed'
 
+
+class TaskEventBus:
+    """生成任务事件总线
+
+    generating_tasks 每次变化都会记录一条带递增 id 的事件，/api/events 的
+    SSE 连接据此推送；最近的事件保留在环形缓冲区中，用于断线重连时按
+    Last-Event-ID 补发。
+    """
+
+    def __init__(self, history_size=500):
+        self.condition = threading.Condition()
+        self.history = deque(maxlen=history_size)  # [(event_id, event_type, data)]
+        # 以启动时间为起点，服务重启后旧的 Last-Event-ID 不会与新事件混淆
+        self.last_id = int(time.time() * 1000)
+        self.closed = False
+
+    def publish(self, event_type, data):
+        with self.condition:
+            self.last_id += 1
+            self.history.append((self.last_id, event_type, data))
+            self.condition.notify_all()
+            return self.last_id
+
+    def events_after(self, event_id):
+        """返回 event_id 之后的事件；若中间事件已被挤出缓冲区则返回 None"""
+        with self.condition:
+            if event_id > self.last_id:
+                return None
+            if event_id < self.last_id and (not self.history or self.history[0][0] > event_id + 1):
+                return None
+            return [e for e in self.history if e[0] > event_id]
+
+    def wait(self, event_id, timeout):
+        """阻塞等待 event_id 之后的新事件，超时或总线关闭时返回"""
+        with self.condition:
+            self.condition.wait_for(lambda: self.closed or self.last_id > event_id, timeout)
+            return self.last_id
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+
+task_events = TaskEventBus()
+
+
+def task_snapshot(project_id, task_info):
+    """生成任务状态的对外表示（SSE 事件 / 状态查询共用）"""
+    return {
+        'id': project_id,
+        'status': task_info['status'],
+        'progress': task_info.get('progress', 0),
+        'error': task_info.get('error', ''),
+        'ttft_ms': task_info.get('ttft_ms'),
+        'bytes_received': task_info.get('bytes_received', 0)
+    }
+
+
+def update_task(project_id, **fields):
+    """更新 generating_tasks 中的任务状态并推送事件"""
+    with tasks_lock:
+        task_info = generating_tasks.setdefault(project_id, {'status': STATUS_PENDING, 'progress': 0, 'error': ''})
+        task_info.update(fields)
+        snapshot = task_snapshot(project_id, task_info)
+    task_events.publish('task', snapshot)
+
 # ==================== 模型配置 ====================
 MODELS_FILE = 'models.json'
 
@@ -98,13 +187,29 @@ def load_config():
         print("请创建 config.json 文件，内容格式如下:")
         print(json.dumps({
             "server": {
-                "port": 8080
+                "port": 8080,
+                "concurrency": "threaded",
+                "max_workers": 32,
+                "gzip": True,
+                "gzip_cache_mb": 64,
+                "keep_alive_timeout": 15
             },
             "ai_options": {
                 "max_tokens": 100000,
                 "temperature": 0.7,
                 "timeout": 300,
                 "system_prompt": "You are a professional UI/UX Developer."
+            },
+            "upload": {
+                "max_file_mb": 20,
+                "max_request_mb": 100
+            },
+            "catalog": {
+                "export_json": False
+            },
+            "recycle_bin": {
+                "retention_days": 0,
+                "max_size_mb": 0
             }
         }, indent=2, ensure_ascii=False))
         print("")
@@ -136,7 +241,8 @@ def load_config():
 CONFIG = load_config()
 
 # 从配置文件读取设置
-PORT = CONFIG.get('server', {}).get('port', 8080)
+SERVER_OPTIONS = CONFIG.get('server', {})
+PORT = SERVER_OPTIONS.get('port', 8080)
 API_CONFIG = CONFIG.get('api', {})
 AI_OPTIONS = CONFIG.get('ai_options', {
     'max_tokens': 100000,
@@ -144,27 +250,66 @@ AI_OPTIONS = CONFIG.get('ai_options', {
     'timeout': 300,
     'system_prompt': 'You are a professional UI/UX Developer. Generate complete, standalone HTML prototypes with realistic data.'
 })
+# AI 接口长连接会话池：同一模型的多次调用 / 重试复用连接；ai_options.keep_alive: false 恢复每次新建连接
+ai_session_pool = SessionPool(
+    keep_alive=AI_OPTIONS.get('keep_alive', True),
+    pool_size=int(AI_OPTIONS.get('pool_size', 8)),
+    idle_seconds=float(AI_OPTIONS.get('keep_alive_idle_seconds', 60))
+)
+# AI 调用重试与按模型熔断（ai_options.retry）：指数退避 + 抖动，遵循 Retry-After，4xx 不重试
+AI_RETRY_OPTIONS = AI_OPTIONS.get('retry', {})
+ai_retry_policy = RetryPolicy.from_options(AI_RETRY_OPTIONS)
+ai_breakers = BreakerRegistry(
+    threshold=int(AI_RETRY_OPTIONS.get('breaker_threshold', 5)),
+    reset_seconds=float(AI_RETRY_OPTIONS.get('breaker_reset_seconds', 60))
+)
+# requests 连接 / TLS 失败后的兜底（ai_options.fallback_transport）：
+# http_client（默认，进程内、请求体流式上传）、curl（系统 curl 命令）、none（不兜底）
+AI_FALLBACK_TRANSPORT = AI_OPTIONS.get('fallback_transport', 'http_client')
+ai_fallback_transport = HttpClientTransport(verify=False)
 
 
 UPLOAD_DIR = 'uploads'
 DATA_DIR = 'data'
 PROJECTS_DIR = 'projects'
 DELETED_DIR = 'deleted'
+# 项目列表 / 回收站列表保存在 SQLite 中；旧版 JSON 文件仅用于首次迁移和可选导出
+CATALOG_FILE = os.path.join(DATA_DIR, 'catalog.db')
 PROJECTS_FILE = os.path.join(DATA_DIR, 'projects.json')
 DELETED_PROJECTS_FILE = os.path.join(DATA_DIR, 'deleted_projects.json')
+CATALOG_OPTIONS = CONFIG.get('catalog', {})
+# record.json / 导出的 projects.json 的合并写入器：窗口内的多次修改只落盘一次
+metadata_writer = MetadataWriter(delay=SERVER_OPTIONS.get('metadata_flush_ms', 200) / 1000)
 
 # 创建必要的目录
 for dir_path in [UPLOAD_DIR, DATA_DIR, PROJECTS_DIR, DELETED_DIR]:
     if not os.path.exists(dir_path):
         os.makedirs(dir_path)
 
-if not os.path.exists(PROJECTS_FILE):
-    with open(PROJECTS_FILE, 'w', encoding='utf-8') as f:
-        json.dump([], f, ensure_ascii=False, indent=2)
-
-if not os.path.exists(DELETED_PROJECTS_FILE):
-    with open(DELETED_PROJECTS_FILE, 'w', encoding='utf-8') as f:
-        json.dump([], f, ensure_ascii=False, indent=2)
+# 项目文件夹布局：flat（projects/<id>/）或 sharded（projects/年/月/<id>/），
+# 处理函数统一经由 project_layout.path(id) 定位项目文件夹，URL 不变
+PROJECT_LAYOUT = CONFIG.get('projects', {}).get('layout', 'flat')
+project_layout = ProjectLayout(PROJECTS_DIR, sharded=PROJECT_LAYOUT == 'sharded')
+
+# 项目图片（images/、reference/）的内容寻址存储：相同图片只存一份，项目中为硬链接
+ASSET_OPTIONS = CONFIG.get('assets', {})
+ASSET_DEDUPE = ASSET_OPTIONS.get('dedupe', True)
+ASSET_GC_INTERVAL = float(ASSET_OPTIONS.get('gc_interval_hours', 6)) * 3600
+ASSET_DIRS = ('images', 'reference')
+# 复制项目的方式：cow = 硬链接共享、修改时才分离（写时复制）；copy = 完整复制
+PROJECT_COPY_MODE = ASSET_OPTIONS.get('copy_mode', 'cow')
+BLOB_DIR = os.path.join(DATA_DIR, 'blobs')
+blob_store = BlobStore(BLOB_DIR)
+
+# AI 响应缓存（data/ai_cache.db）：prompt、参考图、模型和参数都相同时直接返回上次的输出；
+# 请求中带 noCache: true 时跳过缓存（仍会写入新结果）
+AI_CACHE_OPTIONS = CONFIG.get('ai_cache', {})
+AI_CACHE_ENABLED = AI_CACHE_OPTIONS.get('enabled', True)
+ai_response_cache = ResponseCache(
+    os.path.join(DATA_DIR, 'ai_cache.db'),
+    max_bytes=int(AI_CACHE_OPTIONS.get('max_size_mb', 200)) * 1024 * 1024,
+    max_entries=int(AI_CACHE_OPTIONS.get('max_entries', 1000))
+) if AI_CACHE_ENABLED else None
 
 
 def chinese_to_pinyin(text):
@@ -261,8 +406,7 @@ def download_image(url, save_folder, filename=None):
                 filename = f"img_{url_hash}{ext}"
             
             save_path = os.path.join(save_folder, filename)
-            with open(save_path, 'wb') as f:
-                f.write(data)
+            write_new_file(save_path, data)
             
             return filename
     except Exception as e:
@@ -294,8 +438,7 @@ def save_base64_image(base64_data, save_folder, filename):
             filename = filename + ext
         
         save_path = os.path.join(save_folder, filename)
-        with open(save_path, 'wb') as f:
-            f.write(base64.b64decode(data))
+        write_new_file(save_path, base64.b64decode(data))
         
         return filename
     except Exception as e:
@@ -328,15 +471,1621 @@ def download_html_images(html_content, save_folder):
     return html_content
 
 
+# ==================== 图片去重存储 ====================
+
+def share_project_assets(project_folder):
+    """把项目 images/、reference/ 中新写入的图片纳入去重存储，返回新纳入的数量"""
+    if not ASSET_DEDUPE:
+        return 0
+    count = 0
+    for name in ASSET_DIRS:
+        folder = os.path.join(project_folder, name)
+        if os.path.isdir(folder):
+            count += blob_store.ingest_tree(folder)
+    return count
+
+
+def link_or_copy(src, dst):
+    """为 dst 新建指向 src 的硬链接；文件系统不支持（跨分区、FAT 等）时退回普通复制"""
+    try:
+        os.link(src, dst)
+        return dst
+    except OSError:
+        return shutil.copy2(src, dst)
+
+
+def copy_asset_file(src, dst):
+    """复制图片：启用去重时为去重存储中的硬链接，写时复制模式下直接硬链接，否则普通复制"""
+    if ASSET_DEDUPE:
+        return blob_store.link_copy(src, dst)
+    if PROJECT_COPY_MODE == 'cow':
+        return link_or_copy(src, dst)
+    return shutil.copy2(src, dst)
+
+
+def copy_project_folder(src, dst):
+    """复制项目文件夹
+
+    cow（默认）：images/、reference/ 下的图片以硬链接与源项目共享，其余文件完整复制；
+    copy：完整复制。
+    """
+    if PROJECT_COPY_MODE != 'cow':
+        shutil.copytree(src, dst)
+        return
+    src_root = os.path.abspath(src)
+    
+    def copy_function(src_path, dst_path):
+        top = os.path.relpath(os.path.abspath(src_path), src_root).split(os.sep, 1)[0]
+        if top in ASSET_DIRS:
+            return copy_asset_file(src_path, dst_path)
+        return shutil.copy2(src_path, dst_path)
+    
+    shutil.copytree(src, dst, copy_function=copy_function)
+
+
+def backfill_shared_assets():
+    """纳入升级前已有项目（含回收站）中的图片，并清理无引用的 blob"""
+    if not ASSET_DEDUPE:
+        return
+    count = 0
+    for entry in list(project_layout.scan()) + list(os.scandir(DELETED_DIR)):
+        if entry.is_dir() and not entry.name.startswith('.'):
+            count += share_project_assets(entry.path)
+    removed, freed = blob_store.gc()
+    if count or removed:
+        print(f"[资源] 纳入去重存储 {count} 个文件，清理无引用 blob {removed} 个（{freed // 1024} KB）")
+
+
+def asset_gc_loop():
+    """定期删除不再被任何项目引用的 blob（项目被彻底删除后）"""
+    backfill_shared_assets()
+    while ASSET_DEDUPE and ASSET_GC_INTERVAL > 0:
+        time.sleep(ASSET_GC_INTERVAL)
+        try:
+            removed, freed = blob_store.gc()
+            if removed:
+                print(f"[资源] 清理无引用 blob {removed} 个（{freed // 1024} KB）")
+        except Exception as e:
+            print(f"[资源] 清理失败: {e}")
+
+
+# ==================== 冷存储 ====================
+
+# 超过 idle_days 天未修改的项目压缩存放（cold_storage.py），静态请求透明解压 / 直接发送 gzip；
+# 保存、微调、PRD 保存、导出、发布及作为增量生成来源时解压回热存储。idle_days 为 0 时关闭
+COLD_OPTIONS = CONFIG.get('cold_storage', {})
+COLD_IDLE_DAYS = float(COLD_OPTIONS.get('idle_days', 0))
+COLD_SCAN_INTERVAL = float(COLD_OPTIONS.get('scan_interval_hours', 6)) * 3600
+cold_tier = cold_storage.ColdStorage(min_saving=float(COLD_OPTIONS.get('min_saving', 0.1)))
+
+
+def freeze_idle_projects():
+    """把长时间未修改的项目转入冷存储，返回 (项目数, 节省字节数)"""
+    with tasks_lock:
+        busy = set(generating_tasks)
+    projects = saved = 0
+    for entry in list(project_layout.scan()):
+        if entry.name in busy or cold_storage.is_cold(entry.path):
+            continue
+        if not cold_tier.is_idle(entry.path, COLD_IDLE_DAYS):
+            continue
+        # 有尚未落盘的元数据说明项目刚被修改过
+        if metadata_writer.has_pending(os.path.join(entry.path, 'record.json')):
+            continue
+        _, saving = cold_tier.freeze(entry.path)
+        projects += 1
+        saved += saving
+    return projects, saved
+
+
+def cold_storage_loop():
+    while COLD_IDLE_DAYS > 0:
+        try:
+            projects, saved = freeze_idle_projects()
+            if projects:
+                print(f"[冷存储] {projects} 个项目转入冷存储，节省 {saved // 1024} KB")
+        except Exception as e:
+            print(f"[冷存储] 扫描失败: {e}")
+        time.sleep(COLD_SCAN_INTERVAL)
+
+
+# ==================== 流式生成 ====================
+
+# ai_options.stream（或模型配置中的 stream）为 true 时以 SSE 流式接收 chat/completions，
+# 内容边收边追加到项目文件夹中的 response.partial.txt，连接中断时已收到的部分保留在磁盘上
+PARTIAL_RESPONSE_FILE = 'response.partial.txt'
+STREAM_PROGRESS_INTERVAL = 0.5
+STREAM_EXPECTED_BYTES = 40 * 1024  # 进度估算用的典型响应大小（无法预知总长度）
+
+
+class StreamIncompleteError(Exception):
+    """流式响应在结束标记之前中断"""
+
+
+class StreamProgress:
+    """流式响应的落盘与进度上报：追加写入 partial 文件，节流更新 generating_tasks"""
+
+    def __init__(self, project_id=None, folder=None, progress_range=(20, 80)):
+        self.project_id = project_id
+        self.path = os.path.join(folder, PARTIAL_RESPONSE_FILE) if folder else None
+        self.progress_range = progress_range
+        self.file = None
+        self.started = time.monotonic()
+        self.last_report = 0.0
+        self.ttft_ms = None
+        self.bytes_received = 0
+
+    def start(self):
+        """开始一次请求（重试时重新计时；partial 文件在收到第一段内容时才覆盖）"""
+        self.close()
+        self.started = time.monotonic()
+        self.ttft_ms = None
+        self.bytes_received = 0
+
+    def feed(self, text):
+        now = time.monotonic()
+        if self.ttft_ms is None:
+            self.ttft_ms = round((now - self.started) * 1000)
+            print(f"[AI] 首个 token 耗时 {self.ttft_ms} ms")
+            if self.path:
+                self.file = open(self.path, 'w', encoding='utf-8')
+        self.bytes_received += len(text.encode('utf-8'))
+        if self.file:
+            self.file.write(text)
+            self.file.flush()
+        if now - self.last_report >= STREAM_PROGRESS_INTERVAL:
+            self.last_report = now
+            self.report()
+
+    def report(self):
+        if not self.project_id:
+            return
+        low, high = self.progress_range
+        ratio = 1 - math.exp(-self.bytes_received / STREAM_EXPECTED_BYTES)
+        update_task(self.project_id, progress=min(high - 1, int(low + (high - low) * ratio)),
+                    ttft_ms=self.ttft_ms, bytes_received=self.bytes_received)
+
+    def close(self):
+        if self.file:
+            self.file.close()
+            self.file = None
+
+    def finish(self, success):
+        """请求结束：成功时删除 partial 文件，失败时保留"""
+        self.close()
+        self.report()
+        if success and self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def read_chat_stream(response, on_delta):
+    """解析 chat/completions 的 SSE 流，返回与非流式响应相同结构的结果"""
+    parts = []
+    finish_reason = None
+    done = False
+    for line in response.iter_lines():
+        if not line or not line.startswith(b'data:'):
+            continue
+        data = line[5:].strip()
+        if data == b'[DONE]':
+            done = True
+            break
+        chunk = json.loads(data.decode('utf-8'))
+        if chunk.get('error'):
+            raise Exception(f"AI 接口返回错误: {chunk['error']}")
+        for choice in chunk.get('choices') or []:
+            text = (choice.get('delta') or {}).get('content')
+            if text:
+                parts.append(text)
+                on_delta(text)
+            if choice.get('finish_reason'):
+                finish_reason = choice['finish_reason']
+    if not done and finish_reason is None:
+        raise StreamIncompleteError(f"流式响应中断，已接收 {len(''.join(parts))} 字符")
+    return {'choices': [{'message': {'content': ''.join(parts)}, 'finish_reason': finish_reason}]}
+
+
+# ==================== 上传处理 ====================
+
+UPLOAD_OPTIONS = CONFIG.get('upload', {})
+UPLOAD_MAX_FILE_SIZE = int(UPLOAD_OPTIONS.get('max_file_mb', 20)) * 1024 * 1024
+UPLOAD_MAX_REQUEST_SIZE = int(UPLOAD_OPTIONS.get('max_request_mb', 100)) * 1024 * 1024
+UPLOAD_CHUNK_SIZE = 64 * 1024
+MULTIPART_MAX_HEADER_SIZE = 16 * 1024
+
+
+class MultipartError(Exception):
+    """multipart 请求体格式错误"""
+
+
+class UploadTooLarge(Exception):
+    """上传文件超过大小限制"""
+
+
+class MultipartStreamParser:
+    """流式 multipart/form-data 解析器
+
+    按块读取请求体，文件内容边解析边写入磁盘（先写临时文件，整个请求体解析完成后
+    再统一改名），内存峰值只与块大小有关，与上传文件大小无关；
+    请求中途失败时只删除临时文件，不影响已存在的同名文件。
+    """
+
+    def __init__(self, rfile, content_length, boundary, save_dir, max_file_size):
+        self.rfile = rfile
+        self.remaining = content_length
+        self.delimiter = b'--' + boundary
+        self.part_separator = b'\r\n' + self.delimiter
+        self.save_dir = save_dir
+        self.max_file_size = max_file_size
+        self.buffer = bytearray()
+        self.staged = []  # [(临时文件, 目标文件)]
+
+    def read_more(self):
+        """从请求体读取下一块到缓冲区，没有更多数据时返回 False"""
+        if self.remaining <= 0:
+            return False
+        chunk = self.rfile.read(min(UPLOAD_CHUNK_SIZE, self.remaining))
+        if not chunk:
+            raise MultipartError("请求体提前结束")
+        self.remaining -= len(chunk)
+        self.buffer += chunk
+        return True
+
+    def read_until(self, marker, limit):
+        """读取到 marker 为止（不含 marker），用于前导区和分段头"""
+        while True:
+            idx = self.buffer.find(marker)
+            if idx != -1:
+                data = bytes(self.buffer[:idx])
+                del self.buffer[:idx + len(marker)]
+                return data
+            if len(self.buffer) > limit:
+                raise MultipartError("multipart 分段头过长")
+            if not self.read_more():
+                raise MultipartError("multipart 格式不完整")
+
+    def read_exact(self, size):
+        while len(self.buffer) < size:
+            if not self.read_more():
+                raise MultipartError("multipart 格式不完整")
+        data = bytes(self.buffer[:size])
+        del self.buffer[:size]
+        return data
+
+    def parse(self):
+        """解析整个请求体，返回保存的文件名列表"""
+        saved = []
+        try:
+            # 前导区 + 第一个分隔符
+            self.read_until(self.delimiter, MULTIPART_MAX_HEADER_SIZE)
+            while True:
+                ending = self.read_exact(2)
+                if ending == b'--':
+                    break
+                if ending != b'\r\n':
+                    raise MultipartError("multipart 分隔符格式错误")
+                
+                headers = self.read_until(b'\r\n\r\n', MULTIPART_MAX_HEADER_SIZE).decode('utf-8', errors='ignore')
+                filename_match = re.search(r'filename="([^"]+)"', headers)
+                if filename_match:
+                    saved.append(self.save_part(filename_match.group(1)))
+                else:
+                    # 普通表单字段：不需要，丢弃内容
+                    self.stream_part(None)
+            # 丢弃结尾分隔符之后的剩余数据
+            while self.read_more():
+                self.buffer.clear()
+            # 请求体完整接收后才替换目标文件
+            for temp_path, save_path in self.staged:
+                os.replace(temp_path, save_path)
+        finally:
+            for temp_path, _ in self.staged:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+        return saved
+
+    @staticmethod
+    def part_filename(raw_name):
+        """分段头中的文件名只保留最后一级（/ 和 \\ 都视为分隔符）；空名、. 和 .. 视为格式错误"""
+        filename = os.path.basename(raw_name.replace('\\', '/')).strip()
+        if filename in ('', '.', '..') or '\x00' in filename:
+            raise MultipartError(f"无效的文件名: {raw_name!r}")
+        return filename
+
+    def save_part(self, raw_name):
+        """将当前分段写入临时文件，由 parse 在请求体解析完成后改名为目标文件；返回保存的文件名"""
+        filename = self.part_filename(raw_name)
+        save_path = os.path.join(self.save_dir, filename)
+        temp_path = os.path.join(self.save_dir, f'.{filename}.{threading.get_ident()}.{len(self.staged)}.part')
+        self.staged.append((temp_path, save_path))
+        with open(temp_path, 'wb') as f:
+            self.stream_part(f)
+        return filename
+
+    def stream_part(self, f):
+        """输出当前分段内容直到下一个分隔符；f 为 None 时只丢弃"""
+        written = 0
+        keep = len(self.part_separator) - 1  # 缓冲区尾部可能是被截断的分隔符
+        while True:
+            idx = self.buffer.find(self.part_separator)
+            if idx != -1:
+                written += idx
+                if f is not None:
+                    self.check_size(written)
+                    f.write(self.buffer[:idx])
+                del self.buffer[:idx + len(self.part_separator)]
+                return
+            if len(self.buffer) > keep:
+                flush_size = len(self.buffer) - keep
+                written += flush_size
+                if f is not None:
+                    self.check_size(written)
+                    f.write(self.buffer[:flush_size])
+                del self.buffer[:flush_size]
+            if not self.read_more():
+                raise MultipartError("multipart 格式不完整")
+
+    def check_size(self, written):
+        if written > self.max_file_size:
+            raise UploadTooLarge(f"单个文件超过大小限制 ({self.max_file_size // (1024 * 1024)}MB)")
+
+
+# ==================== 参考图片流式接收 ====================
+
+# 生成请求中的参考图片先解码到这里，确定项目 ID 后再移入 projects/<id>/reference/
+# 目录名以 . 开头且不含 index.html / record.json，不会被当成项目
+INCOMING_DIR = os.path.join(PROJECTS_DIR, '.incoming')
+BASE64_HEADER_LIMIT = 256
+BASE64_IGNORED = re.compile(rb'[^A-Za-z0-9+/=]')
+JSON_STRUCTURAL = re.compile(rb'["{}\[\],:]')
+JSON_STRING_SPECIAL = re.compile(rb'["\\]')
+
+# 上次运行中断遗留的暂存图片
+shutil.rmtree(INCOMING_DIR, ignore_errors=True)
+
+
+class Base64ImageWriter:
+    """把 base64 data URL 分块解码写入文件（扩展名规则同 save_base64_image）"""
+
+    def __init__(self, folder, name, max_size):
+        self.folder = folder
+        self.name = name
+        self.max_size = max_size
+        self.head = bytearray()
+        self.file = None
+        self.path = None
+        self.carry = b''
+        self.size = 0
+        self.error = None
+
+    def open(self, header):
+        ext = '.jpg'
+        if header is not None:
+            if b'png' in header:
+                ext = '.png'
+            elif b'gif' in header:
+                ext = '.gif'
+            elif b'webp' in header:
+                ext = '.webp'
+        self.path = os.path.join(self.folder, self.name + ext)
+        self.file = open(self.path, 'wb')
+
+    def write(self, data):
+        data = bytes(data).replace(b'\\/', b'/')
+        if self.file is None:
+            # data URL 前缀（data:image/png;base64,）可能跨块，先攒够再判断
+            self.head += data
+            comma = self.head.find(b',')
+            if comma == -1 and len(self.head) < BASE64_HEADER_LIMIT:
+                return
+            if comma == -1:
+                self.open(None)
+                data = bytes(self.head)
+            else:
+                self.open(bytes(self.head[:comma]))
+                data = bytes(self.head[comma + 1:])
+            self.head = None
+        if self.error:
+            return
+        data = self.carry + BASE64_IGNORED.sub(b'', data)
+        usable = len(data) // 4 * 4
+        self.carry = data[usable:]
+        try:
+            self.decode(data[:usable])
+        except binascii.Error as e:
+            # 与 save_base64_image 一致：无效图片跳过，不影响整个请求
+            self.error = e
+
+    def decode(self, data):
+        if not data:
+            return
+        decoded = base64.b64decode(data)
+        self.size += len(decoded)
+        if self.size > self.max_size:
+            raise UploadTooLarge(f"单张图片超过大小限制 ({self.max_size // (1024 * 1024)}MB)")
+        self.file.write(decoded)
+
+    def close(self):
+        """结束写入，返回文件路径；base64 无效时删除文件并返回 None"""
+        try:
+            if self.file is None:
+                # 整张图片不足 BASE64_HEADER_LIMIT 字节，前缀尚未判断
+                comma = self.head.find(b',')
+                if comma == -1:
+                    self.open(None)
+                else:
+                    self.open(bytes(self.head[:comma]))
+                    del self.head[:comma + 1]
+                self.carry = BASE64_IGNORED.sub(b'', bytes(self.head))
+                self.head = None
+            if self.error:
+                raise self.error
+            self.decode(self.carry)
+            self.file.close()
+            return self.path
+        except (ValueError, binascii.Error) as e:
+            print(f"[Base64图片保存失败] {self.name}: {e}")
+            self.discard()
+            return None
+
+    def discard(self):
+        if self.file is not None:
+            self.file.close()
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+
+class JSONImageStreamReader:
+    """流式读取 JSON 请求体，把顶层 images 数组中的 base64 图片边读边解码到暂存目录
+
+    请求体其余部分原样拼成一份不含图片的 JSON 再解析；images 中每个字符串
+    在 JSON 中替换为暂存文件路径，解析后的 dict 不再持有大段 base64 文本。
+    """
+
+    def __init__(self, rfile, content_length, field='images', max_image_size=None):
+        self.rfile = rfile
+        self.remaining = content_length
+        self.field = field.encode('utf-8')
+        self.max_image_size = max_image_size or UPLOAD_MAX_FILE_SIZE
+        self.staging_dir = os.path.join(INCOMING_DIR, f'{os.getpid()}-{threading.get_ident()}-{time.time_ns()}')
+        self.skeleton = bytearray()
+        self.depth = 0
+        self.in_string = False
+        self.key_start = None
+        self.expect_key = False
+        self.last_key = None
+        self.in_images = False
+        self.image = None
+        self.images = []  # 暂存图片路径，解码失败的为 None
+
+    def read(self):
+        """读取并解析请求体，返回 (data, images)；data 中已去掉 images 字段"""
+        pending = b''
+        try:
+            while self.remaining > 0:
+                chunk = self.rfile.read(min(UPLOAD_CHUNK_SIZE, self.remaining))
+                if not chunk:
+                    raise ValueError("请求体提前结束")
+                self.remaining -= len(chunk)
+                pending = self.feed(pending + chunk if pending else chunk)
+            if pending or self.in_string or self.image is not None:
+                raise ValueError("JSON 格式不完整")
+            data = json.loads(self.skeleton.decode('utf-8'))
+            if not isinstance(data, dict):
+                raise ValueError("请求体必须是 JSON 对象")
+        except BaseException:
+            if self.image is not None:
+                self.image.discard()
+            self.cleanup()
+            raise
+        data.pop(self.field.decode('utf-8'), None)
+        images = [path for path in self.images if path]
+        if not images:
+            self.cleanup()
+        return data, images
+
+    def feed(self, buf):
+        """处理一块数据，返回需要留到下一块的尾部（被截断的转义序列）"""
+        pos, n = 0, len(buf)
+        while pos < n:
+            if self.image is not None:
+                end = buf.find(b'"', pos)
+                if end == -1:
+                    stop = n - 1 if buf[n - 1] == 0x5c else n
+                    self.image.write(buf[pos:stop])
+                    return buf[stop:]
+                self.image.write(buf[pos:end])
+                path = self.image.close()
+                self.image = None
+                self.images.append(path)
+                self.skeleton += json.dumps(path).encode('utf-8')
+                pos = end + 1
+                continue
+
+            if self.in_string:
+                m = JSON_STRING_SPECIAL.search(buf, pos)
+                if not m:
+                    self.skeleton += buf[pos:]
+                    return b''
+                i = m.start()
+                if buf[i] == 0x5c:
+                    if i + 1 >= n:
+                        self.skeleton += buf[pos:i]
+                        return buf[i:]
+                    self.skeleton += buf[pos:i + 2]
+                    pos = i + 2
+                    continue
+                self.skeleton += buf[pos:i + 1]
+                pos = i + 1
+                self.in_string = False
+                if self.key_start is not None:
+                    self.last_key = bytes(self.skeleton[self.key_start + 1:-1])
+                    self.key_start = None
+                continue
+
+            m = JSON_STRUCTURAL.search(buf, pos)
+            if not m:
+                self.skeleton += buf[pos:]
+                return b''
+            i = m.start()
+            self.skeleton += buf[pos:i]
+            ch = buf[i]
+            pos = i + 1
+            if ch == 0x22:  # "
+                if self.in_images and self.depth == 2:
+                    os.makedirs(self.staging_dir, exist_ok=True)
+                    self.image = Base64ImageWriter(self.staging_dir, f"ref_{len(self.images) + 1}", self.max_image_size)
+                    continue
+                self.skeleton.append(ch)
+                self.in_string = True
+                if self.depth == 1 and self.expect_key:
+                    self.key_start = len(self.skeleton) - 1
+                    self.expect_key = False
+                continue
+            self.skeleton.append(ch)
+            if ch == 0x7b or ch == 0x5b:  # { [
+                if ch == 0x5b and self.depth == 1 and self.last_key == self.field:
+                    self.in_images = True
+                self.depth += 1
+                if self.depth == 1:
+                    self.expect_key = True
+            elif ch == 0x7d or ch == 0x5d:  # } ]
+                self.depth -= 1
+                if self.in_images and self.depth == 1:
+                    self.in_images = False
+            elif ch == 0x2c and self.depth == 1:  # ,
+                self.expect_key = True
+                self.last_key = None
+        return b''
+
+    def cleanup(self):
+        """删除暂存目录（已移走的图片不受影响）"""
+        shutil.rmtree(self.staging_dir, ignore_errors=True)
+
+
+def adopt_staged_images(staged_images, dest_folder):
+    """将暂存的参考图片移入项目目录，返回 (文件路径列表, 文件名列表)"""
+    paths, names = [], []
+    for staged in staged_images:
+        name = os.path.basename(staged)
+        dest = os.path.join(dest_folder, name)
+        os.replace(staged, dest)
+        paths.append(os.path.abspath(dest))
+        names.append(name)
+    remove_staging_dir(staged_images)
+    return paths, names
+
+
+def discard_staged_images(staged_images):
+    """请求提前结束时删除暂存的参考图片及其暂存目录"""
+    for staged in staged_images:
+        try:
+            os.remove(staged)
+        except OSError:
+            pass
+    remove_staging_dir(staged_images)
+
+
+def remove_staging_dir(staged_images):
+    if staged_images:
+        shutil.rmtree(os.path.dirname(staged_images[0]), ignore_errors=True)
+
+
+def image_to_data_url(image):
+    """参考图片转为 AI 接口需要的 data URL；本地文件在调用时才读取编码"""
+    if image.startswith(('data:', 'http://', 'https://')):
+        return image
+    mime = mimetypes.guess_type(image)[0] or 'image/jpeg'
+    with open(image, 'rb') as f:
+        return f"data:{mime};base64,{base64.b64encode(f.read()).decode('ascii')}"
+
+
+# ==================== 静态文件缓存 ====================
+
+# JSON API 等动态响应：完全禁用缓存
+CACHE_NO_STORE = 'no-cache, no-store, must-revalidate'
+# 普通静态文件：允许缓存，但每次使用前需用 ETag / Last-Modified 协商
+CACHE_REVALIDATE = 'no-cache'
+# 项目图片和参考图：写入后内容不变，长期缓存
+CACHE_IMMUTABLE = 'public, max-age=31536000, immutable'
+
+# 内容稳定的资源目录：/projects/<id>/images/...、/deleted/<id>/reference/...
+IMMUTABLE_ASSET_DIRS = ASSET_DIRS
+
+
+def static_cache_control(url_path):
+    """根据 URL 路径返回静态文件的 Cache-Control 策略"""
+    parts = url_path.strip('/').split('/')
+    if len(parts) >= 4 and parts[0] in (PROJECTS_DIR, DELETED_DIR) and parts[2] in IMMUTABLE_ASSET_DIRS:
+        return CACHE_IMMUTABLE
+    return CACHE_REVALIDATE
+
+
+def make_etag(stat_result, encoding=None):
+    """基于 mtime 和文件大小生成 ETag（压缩变体追加编码后缀）"""
+    suffix = f'-{encoding}' if encoding else ''
+    return f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}{suffix}"'
+
+
+def etag_matches(if_none_match, etag):
+    """判断 If-None-Match 请求头是否命中当前 ETag（弱比较）"""
+    if if_none_match.strip() == '*':
+        return True
+    current = etag[2:] if etag.startswith('W/') else etag
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == current:
+            return True
+    return False
+
+
+# ==================== Gzip 压缩 ====================
+
+GZIP_ENABLED = SERVER_OPTIONS.get('gzip', True)
+GZIP_MIN_SIZE = 1024  # 小于该字节数的响应不压缩
+GZIP_LEVEL = 6
+GZIP_TYPES = ('text/', 'application/javascript', 'application/json', 'image/svg+xml')
+
+
+def is_compressible_type(content_type):
+    """判断 Content-Type 是否值得压缩（图片等二进制格式本身已压缩）"""
+    return content_type.startswith(GZIP_TYPES)
+
+
+class GzipCache:
+    """静态文件的 gzip 压缩结果缓存（内存 LRU，按路径 + mtime + 大小失效）
+
+    同一文件只在首次请求或修改后压缩一次，总占用超过上限时淘汰最久未使用的条目。
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()  # {path: (mtime_ns, size, gzip_bytes)}
+        self.total_bytes = 0
+        self.lock = threading.Lock()
+
+    def get(self, path, stat_result, f):
+        """返回文件的 gzip 字节；f 为已打开的原文件（未命中缓存时读取并压缩）"""
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry and entry[0] == stat_result.st_mtime_ns and entry[1] == stat_result.st_size:
+                self.entries.move_to_end(path)
+                return entry[2]
+        
+        data = gzip.compress(f.read(), compresslevel=GZIP_LEVEL, mtime=0)
+        if len(data) > self.max_bytes:
+            return data
+        
+        with self.lock:
+            old = self.entries.pop(path, None)
+            if old:
+                self.total_bytes -= len(old[2])
+            self.entries[path] = (stat_result.st_mtime_ns, stat_result.st_size, data)
+            self.total_bytes += len(data)
+            while self.total_bytes > self.max_bytes and self.entries:
+                _, evicted = self.entries.popitem(last=False)
+                self.total_bytes -= len(evicted[2])
+        return data
+
+
+gzip_cache = GzipCache(int(SERVER_OPTIONS.get('gzip_cache_mb', 64)) * 1024 * 1024)
+
+
+# ==================== Range 请求 ====================
+
+# 支持断点续传 / 分段加载的目录（项目、回收站、上传文件、导出结果中的大文件）
+RANGE_DIRS = ('/projects/', '/deleted/', '/uploads/', '/exports/')
+MAX_RANGES = 16  # 超过则忽略 Range，直接返回完整文件
+
+
+def parse_range_header(value, size):
+    """解析 Range 请求头
+
+    返回按起点排序并合并重叠后的 [(start, end)]（end 含），
+    语法不支持时返回 None（忽略 Range），全部区间不可满足时返回 []（416）。
+    """
+    unit, _, spec = value.partition('=')
+    if unit.strip().lower() != 'bytes' or not spec.strip():
+        return None
+    ranges = []
+    for item in spec.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        first, sep, last = item.partition('-')
+        if not sep:
+            return None
+        try:
+            if first:
+                start = int(first)
+                end = int(last) if last else size - 1
+                if start < 0 or (last and end < start):
+                    return None
+            else:
+                suffix = int(last)
+                if suffix <= 0:
+                    continue
+                start, end = max(0, size - suffix), size - 1
+        except ValueError:
+            return None
+        if start >= size:
+            continue
+        ranges.append((start, min(end, size - 1)))
+    if len(ranges) > MAX_RANGES:
+        return None
+    ranges.sort()
+    merged = []
+    for start, end in ranges:
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+class RangeBody:
+    """206 响应体：由若干固定字节串和文件区间 (offset, length) 组成，按需读取"""
+
+    def __init__(self, f, segments):
+        self.file = f
+        self.segments = deque(segments)  # bytes 或 (offset, length)
+        self.length = sum(len(seg) if isinstance(seg, bytes) else seg[1] for seg in segments)
+
+    @classmethod
+    def single(cls, f, start, end):
+        return cls(f, [(start, end - start + 1)])
+
+    @classmethod
+    def multipart(cls, f, ranges, size, content_type, boundary):
+        segments = []
+        for start, end in ranges:
+            segments.append((
+                f"\r\n--{boundary}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Range: bytes {start}-{end}/{size}\r\n\r\n"
+            ).encode('latin-1'))
+            segments.append((start, end - start + 1))
+        segments.append(f"\r\n--{boundary}--\r\n".encode('latin-1'))
+        return cls(f, segments)
+
+    def read(self, n=-1):
+        if n is None or n < 0:
+            n = self.length
+        while self.segments:
+            seg = self.segments[0]
+            if isinstance(seg, bytes):
+                self.segments.popleft()
+                if seg:
+                    return seg
+                continue
+            offset, length = seg
+            if length <= 0:
+                self.segments.popleft()
+                continue
+            self.file.seek(offset)
+            data = self.file.read(min(n, length))
+            if not data:
+                raise OSError("文件在发送过程中被截断")
+            self.segments[0] = (offset + len(data), length - len(data))
+            return data
+        return b''
+
+    def close(self):
+        self.file.close()
+
+
+# ==================== 零拷贝发送 ====================
+
+# 较大的普通文件用 socket.sendfile（底层 os.sendfile）直接由内核发送，
+# 不经过 Python 层的读写循环；小文件、gzip 内存数据及不支持 sendfile 的平台仍走 copyfileobj
+SENDFILE_ENABLED = SERVER_OPTIONS.get('sendfile', True) and hasattr(os, 'sendfile')
+SENDFILE_MIN_SIZE = int(SERVER_OPTIONS.get('sendfile_min_kb', 64)) * 1024
+
+
+# ==================== 项目索引 ====================
+
+def project_from_folder(folder_name):
+    """根据文件夹名称（项目名_年月日_时间）生成项目记录，用于同步新发现的文件夹"""
+    parts = folder_name.rsplit('_', 2)
+    if len(parts) >= 3:
+        name = parts[0]
+        date_part = parts[1]
+        time_part = parts[2]
+        
+        # 解析日期
+        try:
+            year = date_part[:4]
+            month = date_part[4:6]
+            day = date_part[6:8]
+            date_str = f"{year}-{month}-{day}"
+        except:
+            date_str = datetime.datetime.now().strftime('%Y-%m-%d')
+        
+        # 解析时间 (format: 4-15-23pm)
+        try:
+            # 移除am/pm后缀
+            is_pm = time_part.lower().endswith('pm')
+            time_pure = time_part[:-2] if (time_part.lower().endswith('am') or time_part.lower().endswith('pm')) else time_part
+            
+            t_parts = time_pure.split('-')
+            if len(t_parts) >= 3:
+                h = int(t_parts[0])
+                m = int(t_parts[1])
+                s = int(t_parts[2])
+                
+                # 转换12小时制到24小时制
+                if is_pm and h < 12:
+                    h += 12
+                elif not is_pm and h == 12:  # 12am is 00:00
+                    h = 0
+                    
+                time_str = f"{h:02d}:{m:02d}:{s:02d}"
+            else:
+                time_str = "00:00:00"
+        except:
+            time_str = "00:00:00"
+            
+        date = f"{date_str} {time_str}"
+    else:
+        name = folder_name
+        date = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    
+    return {
+        'id': folder_name,
+        'name': name,
+        'url': f'/projects/{folder_name}/index.html',
+        'date': date
+    }
+
+
+def has_record_file(folder_path):
+    """文件夹中是否有 record.json（包括合并写入器中尚未落盘的）"""
+    record_path = os.path.join(folder_path, 'record.json')
+    return os.path.exists(record_path) or metadata_writer.has_pending(record_path)
+
+
+class ProjectIndex:
+    """进程内常驻的项目列表索引，持久化在 SQLite 项目目录（catalog.py）中
+
+    - projects/（分片布局下含各分片目录）mtime 变化（新增 / 删除 / 重命名文件夹）时才重新扫描目录，
+      只把新增 / 消失的项目写入数据库；
+    - 新建、重命名、删除、恢复、复制通过 upsert / update / remove 原地更新，每次只改一行；
+    - pending_external 占位项目、以及已创建但尚未写入 index.html / record.json 的文件夹
+      每次访问单独检查，外部生成完成后及时转为正常状态。
+    """
+
+    def __init__(self, catalog, layout):
+        self.catalog = catalog
+        self.layout = layout
+        self.projects = None  # 按日期倒序
+        self.dir_signature = None
+        self.incomplete_folders = set()
+
+    # ---------- 读取 ----------
+
+    def list(self):
+        """返回项目列表副本（调用方可自由修改）"""
+        with projects_lock:
+            self.refresh()
+            return [dict(p) for p in self.projects]
+
+    def get(self, project_id):
+        with projects_lock:
+            self.refresh()
+            project = self.find(project_id)
+            return dict(project) if project else None
+
+    def find(self, project_id):
+        return next((p for p in self.projects if p['id'] == project_id), None)
+
+    def sync(self):
+        """与 projects/ 目录同步，保证数据库中的列表是最新的（供分页查询前调用）"""
+        with projects_lock:
+            self.refresh()
+
+    def ensure_loaded(self):
+        if self.projects is None:
+            self.projects = self.catalog.list_projects()
+            self.dir_signature = None
+
+    def refresh(self):
+        """按需与 projects/ 目录同步，调用方需持有 projects_lock"""
+        self.ensure_loaded()
+        signature = self.layout.signature()
+        if signature is None or signature != self.dir_signature or self.has_completed_folder():
+            if self.sync_folders():
+                print(f"[同步] 项目列表已更新: {len(self.projects)}个项目")
+            # mtime 精度有限：刚发生变化的目录下次访问再扫描一次，避免漏掉同一时间片内的新文件夹
+            recent = signature is not None and time.time_ns() - max(signature) < 2 * 10 ** 9
+            self.dir_signature = None if recent else signature
+        self.flip_pending_projects()
+
+    def has_completed_folder(self):
+        """此前没有 index.html / record.json 的文件夹现在是否已写入（或已被删除）"""
+        for folder_name in self.incomplete_folders:
+            folder_path = self.layout.path(folder_name)
+            if (not os.path.isdir(folder_path)
+                    or cold_storage.exists(os.path.join(folder_path, 'index.html'))
+                    or has_record_file(folder_path)):
+                return True
+        return False
+
+    def sync_folders(self):
+        """扫描 projects/ 文件夹，与列表对齐；返回列表是否有变化"""
+        # 包含有 index.html 的项目 和 有 record.json 的占位项目
+        existing_folders = set()
+        incomplete_folders = set()
+        for entry in self.layout.scan():
+            has_html = cold_storage.exists(os.path.join(entry.path, 'index.html'))
+            has_record = has_html or has_record_file(entry.path)
+            if has_record:
+                existing_folders.add(entry.name)
+            else:
+                incomplete_folders.add(entry.name)
+        self.incomplete_folders = incomplete_folders
+        
+        # 1. 移除不存在的项目
+        known_ids = {p['id'] for p in self.projects}
+        removed_ids = known_ids - existing_folders
+        if removed_ids:
+            self.projects = [p for p in self.projects if p['id'] not in removed_ids]
+            self.catalog.delete_projects(removed_ids)
+        
+        # 2. 添加新发现的项目（不在列表中的文件夹）
+        added = [project_from_folder(folder_name) for folder_name in existing_folders - known_ids]
+        if added:
+            for project in added:
+                print(f"[同步] 发现新项目: {project['id']}")
+                project['summary'] = compute_project_summary(project['id'])
+            self.projects.extend(added)
+            # 按日期排序（新的在前）
+            self.projects.sort(key=lambda p: p.get('date', ''), reverse=True)
+            self.catalog.upsert_projects(added)
+            # 外部工具新建的项目在后台补建检索索引，不阻塞当前请求
+            schedule_search_backfill()
+        return bool(removed_ids or added)
+
+    def flip_pending_projects(self):
+        """占位项目有了 index.html 后转为正常状态"""
+        for p in self.projects:
+            if p.get('status') == 'pending_external' and \
+                    cold_storage.exists(os.path.join(self.layout.path(p['id']), 'index.html')):
+                print(f"[状态更新] 项目 {p['id']} 已完成外部生成")
+                p['status'] = None  # 清除 pending 状态
+                p['name'] = p['name'].replace(' (待外部生成)', '')  # 移除后缀
+                p['url'] = f"/projects/{p['id']}/index.html"  # 更新URL
+                p['summary'] = compute_project_summary(p['id'])
+                self.catalog.update_project(p['id'], p)
+
+    # ---------- 修改 ----------
+    # 修改操作通常紧跟在文件夹移动之后，这里不扫描目录，
+    # 以免记录在更新前就被目录同步当成「已删除 / 新发现」的项目
+
+    def upsert(self, project):
+        """新增或替换项目（按日期插入到对应位置）"""
+        with projects_lock:
+            self.ensure_loaded()
+            project = dict(project)
+            self.projects = [p for p in self.projects if p['id'] != project['id']]
+            date = project.get('date', '')
+            pos = next((i for i, p in enumerate(self.projects) if p.get('date', '') <= date), len(self.projects))
+            self.projects.insert(pos, project)
+            self.catalog.upsert_project(project)
+
+    def update(self, project_id, **fields):
+        """更新项目字段，返回更新后的副本；项目不存在时返回 None"""
+        with projects_lock:
+            self.ensure_loaded()
+            project = self.find(project_id)
+            if project is None:
+                return None
+            project.update(fields)
+            self.catalog.update_project(project_id, project)
+            return dict(project)
+
+    def remove(self, project_id):
+        """移除项目，返回被移除的记录；不存在时返回 None"""
+        with projects_lock:
+            self.ensure_loaded()
+            project = self.find(project_id)
+            if project is None:
+                return None
+            self.projects = [p for p in self.projects if p['id'] != project_id]
+            self.catalog.delete_project(project_id)
+            return project
+
+    def replace(self, projects):
+        """整体替换项目列表"""
+        with projects_lock:
+            self.catalog.replace_projects(projects)
+            self.projects = self.catalog.list_projects()
+
+
+PROJECTS_PAGE_SIZE = 30
+PROJECTS_PAGE_MAX = 200
+
+
+def encode_project_cursor(project, field='date'):
+    """分页游标：上一页最后一个项目的 (date, id)；回收站按 (deletedAt, id)"""
+    raw = json.dumps([project.get(field, ''), project['id']], ensure_ascii=False).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_project_cursor(cursor):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        date, project_id = json.loads(raw.decode('utf-8'))
+    except (binascii.Error, UnicodeDecodeError, TypeError, ValueError):
+        raise ValueError(f"invalid cursor: {cursor}")
+    if not isinstance(date, str) or not isinstance(project_id, str):
+        raise ValueError(f"invalid cursor: {cursor}")
+    return date, project_id
+
+
+project_catalog = ProjectCatalog(
+    CATALOG_FILE,
+    export_files=(PROJECTS_FILE, DELETED_PROJECTS_FILE) if CATALOG_OPTIONS.get('export_json', False) else None,
+    writer=metadata_writer
+)
+project_catalog.migrate_json(PROJECTS_FILE, DELETED_PROJECTS_FILE)
+project_index = ProjectIndex(project_catalog, project_layout)
+
+
+# ==================== 回收站 ====================
+
+# 回收站保留策略（默认关闭，回收站永久保留）：超过保留天数、或总占用超过上限
+# （从最早删除的开始）的项目被彻底删除
+RECYCLE_OPTIONS = CONFIG.get('recycle_bin', {})
+RECYCLE_RETENTION_DAYS = float(RECYCLE_OPTIONS.get('retention_days', 0))  # 0 表示不按时间清理
+RECYCLE_MAX_BYTES = int(float(RECYCLE_OPTIONS.get('max_size_mb', 0)) * 1024 * 1024)  # 0 表示不限大小
+RECYCLE_PURGE_INTERVAL = float(RECYCLE_OPTIONS.get('purge_interval_minutes', 60)) * 60
+DELETED_PAGE_SIZE = 50
+DELETED_PAGE_MAX = 200
+
+
+def folder_sizes(folder):
+    """统计项目文件夹占用，返回 (总字节数, 可回收字节数)
+
+    可回收字节数只计彻底删除后真正释放的文件：与其它项目共享的硬链接（写时复制的副本、
+    去重存储中的图片）不计入，去重存储自身持有的一个链接不算共享。
+    """
+    total = reclaimable = 0
+    root = os.path.abspath(folder)
+    for dirpath, _, filenames in os.walk(root):
+        top = os.path.relpath(dirpath, root).split(os.sep, 1)[0]
+        store_links = 1 if ASSET_DEDUPE and top in ASSET_DIRS else 0
+        for filename in filenames:
+            try:
+                st = os.lstat(os.path.join(dirpath, filename))
+            except OSError:
+                continue
+            total += st.st_size
+            if st.st_nlink - store_links <= 1:
+                reclaimable += st.st_size
+    return total, reclaimable
+
+
+class RecycleBin:
+    """回收站管理：后台统计已删除项目的占用，并按保留天数 / 总大小上限彻底删除
+
+    删除项目的请求只需 wake()，统计和清理都在后台线程中进行，不占用请求处理时间。
+    """
+
+    def __init__(self, catalog, deleted_dir, retention_days, max_bytes, interval):
+        self.catalog = catalog
+        self.deleted_dir = deleted_dir
+        self.retention_days = retention_days
+        self.max_bytes = max_bytes
+        self.interval = interval
+        self.event = threading.Event()
+
+    def wake(self):
+        """有项目移入回收站：尽快统计占用并检查是否超出上限"""
+        self.event.set()
+
+    def measure(self):
+        """重新统计所有已删除项目的占用（硬链接共享关系会随其它项目的删除 / 复制变化）"""
+        for project_id, _, _ in self.catalog.deleted_oldest_first():
+            folder = os.path.join(self.deleted_dir, project_id)
+            size_bytes, reclaimable_bytes = folder_sizes(folder) if os.path.isdir(folder) else (0, 0)
+            self.catalog.set_deleted_size(project_id, size_bytes, reclaimable_bytes)
+
+    def purge(self, project_id):
+        """彻底删除回收站中的项目，返回是否删除"""
+        with projects_lock:
+            if not self.catalog.get_deleted(project_id):
+                return False
+            folder = os.path.join(self.deleted_dir, project_id)
+            metadata_writer.discard_dir(folder)
+            shutil.rmtree(folder, ignore_errors=True)
+            self.catalog.delete_deleted(project_id)
+        return True
+
+    def compact(self):
+        """清理过期 / 超出大小上限的项目，返回 (删除数量, 释放字节数)"""
+        self.measure()
+        cutoff = None
+        if self.retention_days > 0:
+            cutoff = (datetime.datetime.now() - datetime.timedelta(days=self.retention_days)).strftime('%Y-%m-%d %H:%M:%S')
+        entries = self.catalog.deleted_oldest_first()
+        total = sum(reclaimable for _, _, reclaimable in entries)
+        purged = freed = 0
+        for project_id, deleted_at, reclaimable in entries:
+            # 没有删除时间的旧数据不按时间清理，只参与大小上限
+            expired = cutoff is not None and deleted_at and deleted_at < cutoff
+            oversized = self.max_bytes > 0 and total > self.max_bytes
+            if not (expired or oversized):
+                continue
+            if self.purge(project_id):
+                purged += 1
+                freed += reclaimable
+                total -= reclaimable
+        if purged:
+            if ASSET_DEDUPE:
+                blob_store.gc()
+            print(f"[回收站] 彻底删除 {purged} 个项目，释放 {freed // 1024} KB")
+        return purged, freed
+
+    def run(self):
+        while True:
+            try:
+                self.compact()
+            except Exception as e:
+                print(f"[回收站] 清理失败: {e}")
+            self.event.wait(self.interval if self.interval > 0 else None)
+            self.event.clear()
+
+
+recycle_bin = RecycleBin(project_catalog, DELETED_DIR, RECYCLE_RETENTION_DAYS, RECYCLE_MAX_BYTES, RECYCLE_PURGE_INTERVAL)
+
+
+# ==================== 全文检索 ====================
+
+SEARCH_LIMIT_DEFAULT = 20
+SEARCH_LIMIT_MAX = 100
+
+search_index = SearchIndex(project_catalog)
+
+
+def read_text_file(path):
+    return cold_storage.read_text(path)
+
+
+def index_project_search(project_id, name=None):
+    """重建一个项目的检索索引：项目名称、prompt.txt、record.json、prd/*.md"""
+    try:
+        if name is None:
+            project = project_index.get(project_id)
+            name = project.get('name', '') if project else ''
+        project_folder = project_layout.path(project_id)
+        prd_dir = os.path.join(project_folder, 'prd')
+        prd_text = ''
+        if os.path.isdir(prd_dir):
+            prd_text = '\n'.join(
+                read_text_file(os.path.join(prd_dir, filename))
+                for filename in sorted(os.listdir(prd_dir)) if filename.endswith('.md')
+            )
+        record = metadata_writer.read(os.path.join(project_folder, 'record.json'), {})
+        search_index.index_document(project_id, {
+            'name': name,
+            'record': record_text(record),
+            'prd': prd_text,
+            'prompt': read_text_file(os.path.join(project_folder, 'prompt.txt'))
+        })
+    except Exception as e:
+        print(f"[检索] 索引失败 {project_id}: {e}")
+
+
+def backfill_search_index():
+    """为尚未建立索引的项目补建索引（升级后首次启动、外部工具创建的项目）"""
+    pruned = search_index.prune()
+    missing = search_index.unindexed_projects()
+    for project_id in missing:
+        index_project_search(project_id)
+    if missing or pruned:
+        print(f"[检索] 补建索引 {len(missing)} 个项目，清理 {pruned} 个")
+
+
+search_backfill_requested = threading.Event()
+search_backfill_lock = threading.Lock()
+
+
+def schedule_search_backfill():
+    """在后台线程补建检索索引；补建线程已在运行时只做标记，由它再补一轮"""
+    search_backfill_requested.set()
+    if search_backfill_lock.acquire(blocking=False):
+        threading.Thread(target=run_search_backfill, name='search-backfill', daemon=True).start()
+
+
+def run_search_backfill():
+    """补建线程：持有 search_backfill_lock，直到没有新的补建请求"""
+    while True:
+        try:
+            while search_backfill_requested.is_set():
+                search_backfill_requested.clear()
+                try:
+                    backfill_search_index()
+                except Exception as e:
+                    print(f"[检索] 补建索引失败: {e}")
+        finally:
+            search_backfill_lock.release()
+        # 释放锁的同时到来的请求由本线程接着处理
+        if not (search_backfill_requested.is_set() and search_backfill_lock.acquire(blocking=False)):
+            return
+
+
+# ==================== 项目摘要 ====================
+
+def compute_project_summary(project_id):
+    """项目摘要（随项目记录保存，列表接口直接返回，无需再逐个读取 record.json / 解析 HTML）
+
+    pageCount / pageNames：HTML 中解析出的页面，HTML 尚未生成时取 record.json 中的页面；
+    referenceImages：参考图数量；htmlSize：index.html 字节数；githubUrl：GitHub Pages 发布地址。
+    解析出的完整页面列表连同 HTML 的 mtime 另存在项目目录的 project_pages 表中，
+    供 /api/pages 在 HTML 未变化时直接返回（不随项目记录出现在列表接口中）。
+    """
+    project_folder = project_layout.path(project_id)
+    record = metadata_writer.read(os.path.join(project_folder, 'record.json'), {})
+    if not isinstance(record, dict):
+        record = {}
+    
+    html_pages = []
+    html_size = 0
+    html_mtime = None
+    html_path = os.path.join(project_folder, 'index.html')
+    try:
+        html_size, html_mtime = cold_storage.stat(html_path)
+        html_pages = CustomHandler.extract_pages_from_html(read_text_file(html_path))
+    except OSError:
+        pass
+    
+    if html_mtime is not None:
+        project_catalog.set_pages(project_id, html_mtime, html_pages)
+    
+    if html_pages:
+        page_names = [page['label'] for page in html_pages]
+    else:
+        page_names = [page.get('name') for page in record.get('pages', [])
+                      if isinstance(page, dict) and page.get('name')]
+    
+    reference_images = 0
+    try:
+        with os.scandir(os.path.join(project_folder, 'reference')) as entries:
+            reference_images = sum(1 for entry in entries if entry.is_file())
+    except OSError:
+        pass
+    
+    return {
+        'pageCount': len(page_names),
+        'pageNames': page_names,
+        'referenceImages': reference_images,
+        'htmlSize': html_size,
+        'githubUrl': record.get('github_url') or None
+    }
+
+
+def refresh_project_summary(project_id):
+    """项目文件写入后重新计算摘要并保存到项目索引"""
+    try:
+        return project_index.update(project_id, summary=compute_project_summary(project_id))
+    except Exception as e:
+        print(f"[摘要] 计算失败 {project_id}: {e}")
+        return None
+
+
+def backfill_project_summaries():
+    """为尚无摘要、或摘要中仍带页面列表（旧版本）的项目补算（升级后首次启动）"""
+    missing = [p['id'] for p in project_index.list() if 'summary' not in p or 'htmlPages' in p['summary']]
+    for project_id in missing:
+        refresh_project_summary(project_id)
+    if missing:
+        print(f"[摘要] 补算 {len(missing)} 个项目")
+
+
+# ==================== SSE 事件推送 ====================
+
+SSE_HEARTBEAT = 15  # 心跳间隔（秒）
+SSE_RETRY_MS = 3000  # 浏览器断线重连间隔
+# 每个 SSE 连接常驻占用一个工作线程；单线程模式下不提供 SSE（前端自动回退为轮询）
+if SERVER_OPTIONS.get('concurrency', 'threaded') == 'single':
+    SSE_MAX_CLIENTS = 0
+else:
+    SSE_MAX_CLIENTS = SERVER_OPTIONS.get('max_sse_clients', max(1, int(SERVER_OPTIONS.get('max_workers', 32)) // 4))
+sse_clients = 0
+sse_clients_lock = threading.Lock()
+
+
 class CustomHandler(http.server.SimpleHTTPRequestHandler):
     
+    # HTTP/1.1 长连接：所有响应必须带正确的 Content-Length
+    protocol_version = 'HTTP/1.1'
+    # 空闲连接超时（秒），防止长连接长期占用工作线程
+    timeout = SERVER_OPTIONS.get('keep_alive_timeout', 15)
+    # 长连接下头部与正文分两次写出，关闭 Nagle 避免 40ms 延迟确认
+    disable_nagle_algorithm = True
+    
+    # 当前响应的 Cache-Control，未设置时使用 CACHE_NO_STORE
+    cache_control = None
+    
     def end_headers(self):
-        """添加禁用缓存的响应头"""
-        self.send_header('Cache-Control', 'no-cache, no-store, must-revalidate')
-        self.send_header('Pragma', 'no-cache')
-        self.send_header('Expires', '0')
+        """添加缓存控制响应头（默认禁用缓存，静态文件由 send_head 指定策略）"""
+        cache_control = self.cache_control or CACHE_NO_STORE
+        self.cache_control = None
+        self.send_header('Cache-Control', cache_control)
+        if cache_control == CACHE_NO_STORE:
+            self.send_header('Pragma', 'no-cache')
+            self.send_header('Expires', '0')
         super().end_headers()
     
+    def translate_path(self, path):
+        """/projects/<id>/... 映射到项目文件夹的实际位置（分片布局）"""
+        path = super().translate_path(path)
+        projects_root = os.path.join(os.path.abspath(self.directory), PROJECTS_DIR)
+        rel = os.path.relpath(path, projects_root)
+        if rel == os.curdir or rel.startswith(os.pardir):
+            return path
+        project_id, _, rest = rel.partition(os.sep)
+        if project_id.startswith('.') or os.path.isdir(os.path.join(projects_root, project_id)):
+            return path
+        folder = project_layout.path(project_id)
+        if not os.path.isdir(folder):
+            return path
+        resolved = os.path.join(os.path.abspath(folder), rest)
+        return resolved + '/' if path.endswith('/') and not resolved.endswith('/') else resolved
+
+    def send_head(self):
+        """静态文件响应头：基于 mtime + size 的 ETag / Last-Modified 协商缓存，未变化时返回 304"""
+        url_path = urllib.parse.urlsplit(self.path).path
+        path = self.translate_path(self.path)
+        # 合并写入器中尚未落盘的元数据（record.json 等）先写出，保证读到最新版本
+        metadata_writer.flush(path)
+        if os.path.isdir(path):
+            index_path = os.path.join(path, 'index.html')
+            if not url_path.endswith('/') or not os.path.isfile(index_path):
+                # 目录重定向 / 目录列表沿用默认实现
+                return super().send_head()
+            path = index_path
+        if path.endswith('/'):
+            self.send_error(404, "File not found")
+            return None
+        if not os.path.exists(path) and os.path.isfile(cold_storage.cold_path(path)):
+            return self.send_cold_head(path, url_path)
+        try:
+            f = open(path, 'rb')
+        except OSError:
+            self.send_error(404, "File not found")
+            return None
+        
+        try:
+            fs = os.fstat(f.fileno())
+            ctype = self.guess_type(path)
+            compressible = GZIP_ENABLED and is_compressible_type(ctype) and fs.st_size >= GZIP_MIN_SIZE
+            range_enabled = url_path.startswith(RANGE_DIRS)
+            ranged = range_enabled and self.command == 'GET' and 'Range' in self.headers
+            # Range 区间针对原始字节，分段请求不做压缩
+            encoding = 'gzip' if compressible and not ranged and self.accepts_gzip() else None
+            etag = make_etag(fs, encoding)
+            last_modified = self.date_time_string(fs.st_mtime)
+            
+            if self.is_not_modified(fs, etag):
+                self.cache_control = static_cache_control(url_path)
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.send_header('Last-Modified', last_modified)
+                if compressible:
+                    self.send_header('Vary', 'Accept-Encoding')
+                self.end_headers()
+                f.close()
+                return None
+            
+            if ranged and self.if_range_matches(etag, last_modified):
+                ranges = parse_range_header(self.headers['Range'], fs.st_size)
+                if ranges is not None:
+                    return self.send_range_head(f, fs, ranges, ctype, url_path, etag, last_modified, compressible)
+            
+            body = None
+            content_length = fs.st_size
+            if encoding:
+                body = io.BytesIO(gzip_cache.get(os.path.abspath(path), fs, f))
+                content_length = len(body.getbuffer())
+                f.close()
+            
+            self.cache_control = static_cache_control(url_path)
+            self.send_response(200)
+            self.send_header('Content-Type', ctype)
+            self.send_header('Content-Length', str(content_length))
+            self.send_header('Last-Modified', last_modified)
+            self.send_header('ETag', etag)
+            if range_enabled:
+                self.send_header('Accept-Ranges', 'bytes')
+            if compressible:
+                self.send_header('Vary', 'Accept-Encoding')
+            if encoding:
+                self.send_header('Content-Encoding', encoding)
+            self.end_headers()
+            return body or f
+        except:
+            f.close()
+            raise
+    
+    def send_cold_head(self, path, url_path):
+        """冷存储中的文件：客户端接受 gzip 时直接发送压缩文件，否则边解压边发送（不支持 Range）"""
+        gz_path = cold_storage.cold_path(path)
+        f = open(gz_path, 'rb')
+        try:
+            gz_stat = os.fstat(f.fileno())
+            # 以原始大小和 mtime 生成 ETag，与转入冷存储前一致
+            fs = types.SimpleNamespace(st_size=cold_storage.gzip_original_size(gz_path),
+                                       st_mtime=gz_stat.st_mtime, st_mtime_ns=gz_stat.st_mtime_ns)
+            ctype = self.guess_type(path)
+            encoding = 'gzip' if self.accepts_gzip() else None
+            etag = make_etag(fs, encoding)
+            last_modified = self.date_time_string(fs.st_mtime)
+            self.cache_control = static_cache_control(url_path)
+            
+            if self.is_not_modified(fs, etag):
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.send_header('Last-Modified', last_modified)
+                self.send_header('Vary', 'Accept-Encoding')
+                self.end_headers()
+                f.close()
+                return None
+            
+            if encoding:
+                body = f
+                content_length = gz_stat.st_size
+            else:
+                f.close()
+                body = gzip.open(gz_path, 'rb')
+                content_length = fs.st_size
+            
+            self.send_response(200)
+            self.send_header('Content-Type', ctype)
+            self.send_header('Content-Length', str(content_length))
+            self.send_header('Last-Modified', last_modified)
+            self.send_header('ETag', etag)
+            self.send_header('Vary', 'Accept-Encoding')
+            if encoding:
+                self.send_header('Content-Encoding', encoding)
+            self.end_headers()
+            return body
+        except:
+            f.close()
+            raise
+    
+    def copyfile(self, source, outputfile):
+        """发送响应体：满足条件时走 sendfile 零拷贝，否则沿用默认的复制循环"""
+        if SENDFILE_ENABLED and outputfile is self.wfile:
+            if isinstance(source, RangeBody) and source.length >= SENDFILE_MIN_SIZE:
+                self.sendfile_segments(source)
+                return
+            if isinstance(source, io.BufferedReader):
+                size = os.fstat(source.fileno()).st_size
+                offset = source.tell()
+                if size - offset >= SENDFILE_MIN_SIZE:
+                    self.sendfile_range(source, offset, size - offset)
+                    return
+        super().copyfile(source, outputfile)
+    
+    def sendfile_segments(self, body):
+        """按段发送 206 响应体：分隔头直接写出，文件区间用 sendfile"""
+        for seg in body.segments:
+            if isinstance(seg, bytes):
+                self.connection.sendall(seg)
+            else:
+                offset, length = seg
+                if length > 0:
+                    self.sendfile_range(body.file, offset, length)
+        body.segments.clear()
+    
+    def sendfile_range(self, f, offset, count):
+        sent = self.connection.sendfile(f, offset, count)
+        if sent < count:
+            # 文件在发送过程中被截断，已声明的 Content-Length 无法满足，只能断开连接
+            self.close_connection = True
+            raise ConnectionError(f"sendfile 发送不完整: {sent}/{count}")
+    
+    def if_range_matches(self, etag, last_modified):
+        """If-Range：资源未变化（ETag 强匹配或 Last-Modified 完全一致）时才按 Range 返回"""
+        if_range = self.headers.get('If-Range')
+        if not if_range:
+            return True
+        if_range = if_range.strip()
+        if if_range.startswith(('"', 'W/')):
+            return if_range == etag
+        return if_range == last_modified
+    
+    def send_range_head(self, f, fs, ranges, ctype, url_path, etag, last_modified, compressible):
+        """发送 206 / 416 响应头，返回区间响应体"""
+        self.cache_control = static_cache_control(url_path)
+        if not ranges:
+            self.send_response(416)
+            self.send_header('Content-Range', f'bytes */{fs.st_size}')
+            self.send_header('Content-Length', '0')
+            self.send_header('ETag', etag)
+            self.end_headers()
+            f.close()
+            return None
+        
+        if len(ranges) == 1:
+            start, end = ranges[0]
+            body = RangeBody.single(f, start, end)
+            content_type = ctype
+        else:
+            boundary = hashlib.md5(f'{etag}{time.time_ns()}'.encode()).hexdigest()
+            body = RangeBody.multipart(f, ranges, fs.st_size, ctype, boundary)
+            content_type = f'multipart/byteranges; boundary={boundary}'
+        
+        self.send_response(206)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(body.length))
+        if len(ranges) == 1:
+            self.send_header('Content-Range', f'bytes {start}-{end}/{fs.st_size}')
+        self.send_header('Last-Modified', last_modified)
+        self.send_header('ETag', etag)
+        self.send_header('Accept-Ranges', 'bytes')
+        if compressible:
+            self.send_header('Vary', 'Accept-Encoding')
+        self.end_headers()
+        return body
+    
+    def accepts_gzip(self):
+        """客户端是否通过 Accept-Encoding 接受 gzip"""
+        for item in self.headers.get('Accept-Encoding', '').split(','):
+            coding, _, params = item.strip().partition(';')
+            if coding.strip().lower() in ('gzip', '*'):
+                q = params.strip()
+                if q.startswith('q='):
+                    try:
+                        return float(q[2:]) > 0
+                    except ValueError:
+                        return False
+                return True
+        return False
+    
+    def is_not_modified(self, fs, etag):
+        """条件请求判断：If-None-Match 优先，其次 If-Modified-Since"""
+        if_none_match = self.headers.get('If-None-Match')
+        if if_none_match:
+            return etag_matches(if_none_match, etag)
+        
+        if_modified_since = self.headers.get('If-Modified-Since')
+        if if_modified_since:
+            try:
+                ims = email.utils.parsedate_to_datetime(if_modified_since)
+            except (TypeError, IndexError, OverflowError, ValueError):
+                return False
+            if ims.tzinfo is None:
+                ims = ims.replace(tzinfo=datetime.timezone.utc)
+            last_modif = datetime.datetime.fromtimestamp(int(fs.st_mtime), datetime.timezone.utc)
+            return last_modif <= ims
+        return False
+    
     def do_GET(self):
         """处理 GET 请求"""
         parsed_path = urllib.parse.urlparse(self.path)
@@ -351,14 +2100,21 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
             self.handle_get_flowchart(query)
         elif path == '/api/generation-status':
             self.handle_generation_status(query)
+        elif path == '/api/events':
+            self.handle_events(query)
         elif path == '/api/models':
             self.handle_get_models()
+        elif path == '/api/ai-cache':
+            self.handle_ai_cache_stats()
         elif path == '/api/github/config':
             self.handle_github_config_get()
+        elif path == '/api/projects':
+            self.handle_list_projects(query)
+        elif path == '/api/search':
+            self.handle_search(query)
         elif path == '/data/projects.json':
-            # 拦截项目列表请求，确保返回最新数据
-            self.load_projects()
-            super().do_GET()
+            # 拦截项目列表请求，直接返回内存中的最新数据（避免与并发写入的文件读写竞争）
+            self.send_json_response(self.load_projects())
         else:
             # 默认静态文件服务
             super().do_GET()
@@ -408,69 +2164,80 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
             self.send_error(404, "Not Found")
 
     def handle_upload(self):
-        """处理图片上传"""
+        """处理图片上传（流式解析 multipart，边接收边写盘）"""
         try:
-            content_type = self.headers['Content-Type']
+            content_type = self.headers['Content-Type'] or ''
             if not content_type.startswith('multipart/form-data'):
                 self.send_error(400, "Expected multipart/form-data")
                 return
             
-            boundary_match = re.search(r'boundary=([^;]+)', content_type)
+            boundary_match = re.search(r'boundary="?([^";]+)"?', content_type)
             if not boundary_match:
                 self.send_error(400, "Missing boundary")
                 return
             boundary = boundary_match.group(1).encode()
             
+            if self.headers['Content-Length'] is None:
+                self.send_error_response("缺少 Content-Length", 411)
+                return
             content_length = int(self.headers['Content-Length'])
-            body = self.rfile.read(content_length)
+            if content_length > UPLOAD_MAX_REQUEST_SIZE:
+                self.send_error_response(f"上传总大小超过限制 ({UPLOAD_MAX_REQUEST_SIZE // (1024 * 1024)}MB)", 413)
+                return
             
-            saved_paths = []
-            parts = body.split(b'--' + boundary)
+            parser = MultipartStreamParser(self.rfile, content_length, boundary, UPLOAD_DIR, UPLOAD_MAX_FILE_SIZE)
+            try:
+                saved_files = parser.parse()
+            except UploadTooLarge as e:
+                self.send_error_response(str(e), 413)
+                return
+            except MultipartError as e:
+                self.send_error_response(str(e), 400)
+                return
             
-            for part in parts:
-                if not part or part == b'--\r\n' or part == b'--':
-                    continue
-                if part.startswith(b'\r\n'):
-                    part = part[2:]
-                if part.endswith(b'\r\n'):
-                    part = part[:-2]
-                    
-                header_end = part.find(b'\r\n\r\n')
-                if header_end == -1:
-                    continue
-                    
-                headers = part[:header_end].decode('utf-8', errors='ignore')
-                file_data = part[header_end+4:]
-                
-                filename_match = re.search(r'filename="([^"]+)"', headers)
-                if filename_match:
-                    filename = filename_match.group(1)
-                    filename = os.path.basename(filename)
-                    
-                    save_path = os.path.join(UPLOAD_DIR, filename)
-                    with open(save_path, 'wb') as f:
-                        f.write(file_data)
-                        
-                    saved_paths.append({
-                        'name': filename,
-                        'path': os.path.abspath(save_path),
-                        'url': f'/{UPLOAD_DIR}/{filename}'
-                    })
+            saved_paths = []
+            for filename in saved_files:
+                save_path = os.path.join(UPLOAD_DIR, filename)
+                saved_paths.append({
+                    'name': filename,
+                    'path': os.path.abspath(save_path),
+                    'url': f'/{UPLOAD_DIR}/{filename}'
+                })
 
             self.send_json_response({'files': saved_paths})
             
         except Exception as e:
             self.send_error_response(str(e))
 
+    def read_generate_request(self):
+        """流式读取生成请求，返回 (data, 暂存图片路径列表)；失败时已发送错误响应并返回 None"""
+        content_length = int(self.headers['Content-Length'])
+        if content_length > UPLOAD_MAX_REQUEST_SIZE:
+            self.send_error_response(f"请求体超过大小限制 ({UPLOAD_MAX_REQUEST_SIZE // (1024 * 1024)}MB)", 413)
+            return None
+        reader = JSONImageStreamReader(self.rfile, content_length)
+        try:
+            data, images = reader.read()
+        except UploadTooLarge as e:
+            self.send_error_response(str(e), 413)
+            return None
+        except ValueError as e:
+            self.send_error_response(f"请求体解析失败: {e}", 400)
+            return None
+        return data, images
+
     def handle_generate(self):
         """处理AI生成请求（支持增量更新）"""
+        staged_images = []
         try:
-            content_length = int(self.headers['Content-Length'])
-            body = self.rfile.read(content_length)
-            data = json.loads(body.decode('utf-8'))
+            # 参考图片在读取请求体时直接解码到暂存目录，images 为暂存文件路径
+            reader = self.read_generate_request()
+            if not reader:
+                return
+            data, images = reader
+            staged_images = images
             
             prompt = data.get('prompt', '')
-            images = data.get('images', [])  # base64 images
             project_name = data.get('projectName', '未命名项目')
             form_data = data.get('formData', {})  # 用户输入的表单数据
             
@@ -478,6 +2245,7 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
             is_incremental = data.get('incremental', False)
             source_project_id = data.get('sourceProjectId', None)
             changes = data.get('changes', None)
+            use_cache = not data.get('noCache', False)
             
             if not prompt:
                 self.send_error_response("缺少 prompt")
@@ -487,7 +2255,7 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
             
             # 生成项目ID（日期时间_英文名）
             project_id = generate_project_id(project_name)
-            project_folder = os.path.join(PROJECTS_DIR, project_id)
+            project_folder = project_layout.new_path(project_id)
             os.makedirs(project_folder, exist_ok=True)
             
             # 保存用户上传的参考图片
@@ -499,7 +2267,8 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
             
             # ==================== 增量更新处理 ====================
             if is_incremental and source_project_id and changes:
-                source_folder = os.path.join(PROJECTS_DIR, source_project_id)
+                source_folder = project_layout.path(source_project_id)
+                cold_tier.thaw(source_folder)
                 
                 # 检查是否完全无变化
                 if not changes.get('hasChanges', True):
@@ -509,12 +2278,11 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
                 # 复制原项目的reference图片（未变化的页面）
                 source_ref_folder = os.path.join(source_folder, 'reference')
                 if os.path.exists(source_ref_folder):
-                    import shutil
                     for f in os.listdir(source_ref_folder):
                         src = os.path.join(source_ref_folder, f)
                         dst = os.path.join(ref_images_folder, f)
                         if os.path.isfile(src):
-                            shutil.copy2(src, dst)
+                            copy_asset_file(src, dst)
                     print(f"[增量] 复制原项目参考图片")
                 
                 # 读取原项目的HTML
@@ -528,21 +2296,16 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
                 source_images_folder = os.path.join(source_folder, 'images')
                 dest_images_folder = os.path.join(project_folder, 'images')
                 if os.path.exists(source_images_folder):
-                    import shutil
-                    shutil.copytree(source_images_folder, dest_images_folder)
+                    shutil.copytree(source_images_folder, dest_images_folder, copy_function=copy_asset_file)
                     print(f"[增量] 复制原项目images文件夹")
                 
                 reused_pages = len(changes.get('pagesUnchanged', []))
                 print(f"[增量] 未变化页面数: {reused_pages}, 变化页面数: {len(changes.get('pagesChanged', []))}")
             
             # 保存新上传的图片并记录文件名
-            saved_image_names = []
-            for i, img_base64 in enumerate(images):
-                filename = f"ref_{i+1}"
-                saved = save_base64_image(img_base64, ref_images_folder, filename)
-                if saved:
-                    saved_image_names.append(saved)
-                    print(f"[保存参考图] {saved}")
+            images, saved_image_names = adopt_staged_images(images, ref_images_folder)
+            for saved in saved_image_names:
+                print(f"[保存参考图] {saved}")
             
             # 构建并保存record.json（用户输入记录）
             record = {
@@ -574,8 +2337,7 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
             
             # 保存record.json
             record_path = os.path.join(project_folder, 'record.json')
-            with open(record_path, 'w', encoding='utf-8') as f:
-                json.dump(record, f, ensure_ascii=False, indent=2)
+            metadata_writer.write(record_path, record)
             print(f"[保存] record.json")
             
             # ==================== 决定是否调用AI ====================
@@ -586,10 +2348,12 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
                 # 在prompt中提示AI参考原有内容
                 enhanced_prompt = prompt + f"\n\n# 重要提示\n这是一个增量更新任务。原项目中有{reused_pages}个页面内容未变化。请保持整体风格一致，重点关注变化的部分。"
                 print(f"[增量] 使用增强prompt调用AI")
-                html_content = self.call_ai_model(enhanced_prompt, images)
+                html_content = self.call_ai_model(enhanced_prompt, images, StreamProgress(folder=project_folder),
+                                                  use_cache=use_cache)
             else:
                 # 正常调用AI
-                html_content = self.call_ai_model(prompt, images)
+                html_content = self.call_ai_model(prompt, images, StreamProgress(folder=project_folder),
+                                                  use_cache=use_cache)
             
             if not html_content:
                 self.send_error_response("AI未返回有效内容")
@@ -598,14 +2362,14 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
             # 下载HTML中的外部图片并替换URL
             print("[处理] 下载HTML中的外部图片...")
             html_content = download_html_images(html_content, project_folder)
+            share_project_assets(project_folder)
             
             # 注入页面切换消息监听器（用于 viewer.html 的页面导航）
             html_content = self.inject_page_navigation_listener(html_content)
             
             # 保存 HTML
             html_path = os.path.join(project_folder, 'index.html')
-            with open(html_path, 'w', encoding='utf-8') as f:
-                f.write(html_content)
+            write_new_file(html_path, html_content)
             
             # 从HTML中提取title作为项目名称
             html_title = extract_title_from_html(html_content)
@@ -613,11 +2377,11 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
                 print(f"[提取] HTML title: {html_title}")
                 # 使用HTML中的title重新生成项目ID
                 new_project_id = generate_project_id(html_title)
-                new_project_folder = os.path.join(PROJECTS_DIR, new_project_id)
+                new_project_folder = project_layout.new_path(new_project_id)
                 
                 # 重命名文件夹
                 if not os.path.exists(new_project_folder):
-                    import shutil
+                    metadata_writer.flush_dir(project_folder)
                     shutil.move(project_folder, new_project_folder)
                     project_folder = new_project_folder
                     project_id = new_project_id
@@ -626,29 +2390,23 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
             
             # 保存 prompt (用于调试)
             prompt_path = os.path.join(project_folder, 'prompt.txt')
-            with open(prompt_path, 'w', encoding='utf-8') as f:
-                f.write(prompt)
+            write_new_file(prompt_path, prompt)
             
             # 获取当前选中的模型名称
             current_model = get_selected_model()
             current_model_name = current_model.get('name', '') if current_model else ''
             
-            # 更新项目列表
-            projects = self.load_projects()
+            # 更新项目列表（已存在则替换，避免重复）
             new_project = {
                 'id': project_id,
                 'name': project_name,
                 'model_name': current_model_name,
                 'url': f'/projects/{project_id}/index.html',
-                'date': datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                'date': datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                'summary': compute_project_summary(project_id)
             }
-            # 检查是否已存在（避免重复）
-            existing_idx = next((i for i, p in enumerate(projects) if p['id'] == project_id), None)
-            if existing_idx is not None:
-                projects[existing_idx] = new_project
-            else:
-                projects.insert(0, new_project)
-            self.save_projects(projects)
+            project_index.upsert(new_project)
+            index_project_search(project_id, project_name)
             
             print(f"[完成] 项目已保存: {project_folder}")
             
@@ -666,21 +2424,27 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
             import traceback
             traceback.print_exc()
             self.send_error_response(str(e))
+        finally:
+            # 未被 adopt_staged_images 移入项目的暂存图片（提前返回或出错）
+            discard_staged_images(staged_images)
 
     def handle_generate_async(self):
         """异步处理AI生成请求：立即返回项目信息，后台线程完成生成"""
+        staged_images = []
         try:
-            content_length = int(self.headers['Content-Length'])
-            body = self.rfile.read(content_length)
-            data = json.loads(body.decode('utf-8'))
+            reader = self.read_generate_request()
+            if not reader:
+                return
+            data, images = reader
+            staged_images = images
             
             prompt = data.get('prompt', '')
-            images = data.get('images', [])
             project_name = data.get('projectName', '未命名项目')
             form_data = data.get('formData', {})
             is_incremental = data.get('incremental', False)
             source_project_id = data.get('sourceProjectId', None)
             changes = data.get('changes', None)
+            use_cache = not data.get('noCache', False)
             
             if not prompt:
                 self.send_error_response("缺少 prompt")
@@ -688,19 +2452,15 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
             
             # 生成项目ID
             project_id = generate_project_id(project_name)
-            project_folder = os.path.join(PROJECTS_DIR, project_id)
+            project_folder = project_layout.new_path(project_id)
             os.makedirs(project_folder, exist_ok=True)
             
             # 保存参考图片
             ref_images_folder = os.path.join(project_folder, 'reference')
             os.makedirs(ref_images_folder, exist_ok=True)
             
-            saved_image_names = []
-            for i, img_base64 in enumerate(images):
-                filename = f"ref_{i+1}"
-                saved = save_base64_image(img_base64, ref_images_folder, filename)
-                if saved:
-                    saved_image_names.append(saved)
+            # 后台任务只持有图片文件路径，调用 AI 时再读取编码
+            images, saved_image_names = adopt_staged_images(images, ref_images_folder)
             
             # 创建初始 record.json
             record = {
@@ -730,38 +2490,31 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
                 record['pages'].append(page_record)
             
             record_path = os.path.join(project_folder, 'record.json')
-            with open(record_path, 'w', encoding='utf-8') as f:
-                json.dump(record, f, ensure_ascii=False, indent=2)
+            metadata_writer.write(record_path, record)
             
             # 保存 prompt
             prompt_path = os.path.join(project_folder, 'prompt.txt')
-            with open(prompt_path, 'w', encoding='utf-8') as f:
-                f.write(prompt)
+            write_new_file(prompt_path, prompt)
             
             # 获取当前选中的模型名称
             current_model = get_selected_model()
             current_model_name = current_model.get('name', '') if current_model else ''
             
             # 更新项目列表（带 generating 状态）
-            projects = self.load_projects()
             new_project = {
                 'id': project_id,
                 'name': project_name,
                 'model_name': current_model_name,
                 'status': STATUS_GENERATING,
                 'url': f'/projects/{project_id}/index.html',
-                'date': datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                'date': datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                'summary': compute_project_summary(project_id)
             }
-            projects.insert(0, new_project)
-            self.save_projects(projects)
+            project_index.upsert(new_project)
+            index_project_search(project_id, project_name)
             
             # 注册异步任务
-            with tasks_lock:
-                generating_tasks[project_id] = {
-                    'status': STATUS_GENERATING,
-                    'progress': 0,
-                    'error': ''
-                }
+            update_task(project_id, status=STATUS_GENERATING, progress=0, error='')
             
             # 启动后台线程
             def generate_in_background():
@@ -769,14 +2522,14 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
                     print(f"[异步] 开始后台生成: {project_id}")
                     
                     # 更新进度
-                    with tasks_lock:
-                        generating_tasks[project_id]['progress'] = 10
+                    update_task(project_id, progress=10)
                     
                     # 增量处理
                     source_html_content = None
                     reused_pages = 0
                     if is_incremental and source_project_id and changes:
-                        source_folder = os.path.join(PROJECTS_DIR, source_project_id)
+                        source_folder = project_layout.path(source_project_id)
+                        cold_tier.thaw(source_folder)
                         source_html_path = os.path.join(source_folder, 'index.html')
                         if os.path.exists(source_html_path):
                             with open(source_html_path, 'r', encoding='utf-8') as f:
@@ -788,12 +2541,11 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
                         if os.path.exists(source_images_folder):
                             import shutil
                             if not os.path.exists(dest_images_folder):
-                                shutil.copytree(source_images_folder, dest_images_folder)
+                                shutil.copytree(source_images_folder, dest_images_folder, copy_function=copy_asset_file)
                         
                         reused_pages = len(changes.get('pagesUnchanged', []))
                     
-                    with tasks_lock:
-                        generating_tasks[project_id]['progress'] = 20
+                    update_task(project_id, progress=20)
                     
                     # 调用AI（这里复用现有逻辑）
                     enhanced_prompt = prompt
@@ -801,44 +2553,34 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
                         enhanced_prompt += f"\n\n# 重要提示\n这是一个增量更新任务。原项目中有{reused_pages}个页面内容未变化。请保持整体风格一致。"
                     
                     # 使用类似 call_ai_model 的逻辑
-                    html_content = self._call_ai_for_async(enhanced_prompt, images)
+                    html_content = self._call_ai_for_async(enhanced_prompt, images,
+                                                           StreamProgress(project_id, project_folder),
+                                                           use_cache=use_cache)
                     
-                    with tasks_lock:
-                        generating_tasks[project_id]['progress'] = 80
+                    update_task(project_id, progress=80)
                     
                     if not html_content:
                         raise Exception("AI未返回有效内容")
                     
                     # 下载图片
                     html_content = download_html_images(html_content, project_folder)
+                    share_project_assets(project_folder)
                     
                     # 注入导航监听器
                     html_content = self.inject_page_navigation_listener(html_content)
                     
                     # 保存HTML
                     html_path = os.path.join(project_folder, 'index.html')
-                    with open(html_path, 'w', encoding='utf-8') as f:
-                        f.write(html_content)
+                    write_new_file(html_path, html_content)
                     
-                    # 更新项目状态
-                    projects = self.load_projects()
-                    for p in projects:
-                        if p['id'] == project_id:
-                            p['status'] = None  # 清除 generating 状态
-                            break
-                    self.save_projects(projects)
+                    # 更新项目状态（清除 generating 状态）
+                    project_index.update(project_id, status=None)
+                    refresh_project_summary(project_id)
                     
                     # 更新record.json状态
-                    if os.path.exists(record_path):
-                        with open(record_path, 'r', encoding='utf-8') as f:
-                            record = json.load(f)
-                        record['status'] = STATUS_COMPLETED
-                        with open(record_path, 'w', encoding='utf-8') as f:
-                            json.dump(record, f, ensure_ascii=False, indent=2)
+                    metadata_writer.update(record_path, lambda record: record.update(status=STATUS_COMPLETED))
                     
-                    with tasks_lock:
-                        generating_tasks[project_id]['status'] = STATUS_COMPLETED
-                        generating_tasks[project_id]['progress'] = 100
+                    update_task(project_id, status=STATUS_COMPLETED, progress=100)
                     
                     print(f"[异步] 生成完成: {project_id}")
                     
@@ -848,17 +2590,10 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
                     traceback.print_exc()
                     
                     # 更新失败状态
-                    with tasks_lock:
-                        generating_tasks[project_id]['status'] = STATUS_FAILED
-                        generating_tasks[project_id]['error'] = str(e)
+                    update_task(project_id, status=STATUS_FAILED, error=str(e))
                     
                     # 更新项目列表状态
-                    projects = self.load_projects()
-                    for p in projects:
-                        if p['id'] == project_id:
-                            p['status'] = STATUS_FAILED
-                            break
-                    self.save_projects(projects)
+                    project_index.update(project_id, status=STATUS_FAILED)
             
             # 启动线程
             thread = threading.Thread(target=generate_in_background, daemon=True)
@@ -876,58 +2611,55 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
             import traceback
             traceback.print_exc()
             self.send_error_response(str(e))
+        finally:
+            # 未被 adopt_staged_images 移入项目的暂存图片（提前返回或出错）
+            discard_staged_images(staged_images)
 
-    def _call_ai_for_async(self, prompt, images):
+    def _call_ai_for_async(self, prompt, images, stream_progress=None, use_cache=True):
         """异步生成专用的AI调用（复用现有逻辑）"""
-        return self.call_ai_model(prompt, images)
+        return self.call_ai_model(prompt, images, stream_progress, use_cache=use_cache)
 
     def copy_project(self, source_project_id, new_project_name):
         """复制项目（当内容完全无变化时）"""
         try:
             import shutil
             
-            source_folder = os.path.join(PROJECTS_DIR, source_project_id)
+            source_folder = project_layout.path(source_project_id)
             if not os.path.exists(source_folder):
                 self.send_error_response(f"源项目不存在: {source_project_id}")
                 return
             
             # 生成新项目ID
             project_id = generate_project_id(new_project_name)
-            project_folder = os.path.join(PROJECTS_DIR, project_id)
+            project_folder = project_layout.new_path(project_id)
             
             # 如果目标目录已存在，先删除
             if os.path.exists(project_folder):
+                metadata_writer.discard_dir(project_folder)
                 shutil.rmtree(project_folder)
             
             # 复制整个文件夹
-            shutil.copytree(source_folder, project_folder)
+            metadata_writer.flush_dir(source_folder)
+            copy_project_folder(source_folder, project_folder)
             print(f"[复制] {source_folder} -> {project_folder}")
             
             # 更新record.json的时间戳
             record_path = os.path.join(project_folder, 'record.json')
-            if os.path.exists(record_path):
-                with open(record_path, 'r', encoding='utf-8') as f:
-                    record = json.load(f)
-                record['createdAt'] = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                record['copiedFrom'] = source_project_id
-                with open(record_path, 'w', encoding='utf-8') as f:
-                    json.dump(record, f, ensure_ascii=False, indent=2)
+            metadata_writer.update(record_path, lambda record: record.update(
+                createdAt=datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                copiedFrom=source_project_id
+            ))
             
             # 更新项目列表
-            projects = self.load_projects()
             new_project = {
                 'id': project_id,
                 'name': new_project_name,
                 'url': f'/projects/{project_id}/index.html',
                 'date': datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
             }
-            # 检查是否已存在（避免重复）
-            existing_idx = next((i for i, p in enumerate(projects) if p['id'] == project_id), None)
-            if existing_idx is not None:
-                projects[existing_idx] = new_project
-            else:
-                projects.insert(0, new_project)
-            self.save_projects(projects)
+            new_project['summary'] = compute_project_summary(project_id)
+            project_index.upsert(new_project)
+            index_project_search(project_id, new_project_name)
             
             print(f"[完成] 项目已复制: {project_folder} (0 API调用)")
             self.send_json_response({
@@ -944,8 +2676,12 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
             traceback.print_exc()
             self.send_error_response(str(e))
 
-    def call_ai_model(self, prompt, images):
-        """调用AI大模型 (使用 requests 库)"""
+    def call_ai_model(self, prompt, images, stream_progress=None, use_cache=True):
+        """调用AI大模型 (使用 requests 库)
+
+        启用流式时 stream_progress 接收增量内容（写入 partial 文件、上报首 token 耗时和已接收字节数）。
+        use_cache 为 False 时不读取响应缓存（请求的 noCache），结果仍写入缓存。
+        """
         try:
             # 构建消息
             user_content = []
@@ -954,11 +2690,11 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
                 "text": prompt
             })
             
-            # 添加图片
-            for img_base64 in images:
+            # 添加图片（本地文件路径在此时才编码为 data URL）
+            for image in images:
                 user_content.append({
                     "type": "image_url",
-                    "image_url": {"url": img_base64}
+                    "image_url": {"url": image_to_data_url(image)}
                 })
             
             # 从配置读取 system prompt
@@ -985,6 +2721,24 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
                 "temperature": AI_OPTIONS.get('temperature', 0.7)
             }
             
+            # 响应缓存：相同模型、参数、prompt 和参考图直接返回上次的输出
+            response_key = None
+            if ai_response_cache:
+                response_key = cache_key(selected_model.get('id'), model_name, payload['temperature'],
+                                         payload['max_tokens'], system_prompt, prompt, images)
+                cached = ai_response_cache.get(response_key) if use_cache else None
+                if cached:
+                    print(f"[AI缓存] 命中，跳过模型调用 ({len(cached[0])} 字符)")
+                    return self.extract_html(cached[0])
+            
+            stream = selected_model.get('stream', AI_OPTIONS.get('stream', False))
+            if stream:
+                payload['stream'] = True
+                stream_progress = stream_progress or StreamProgress()
+            else:
+                # 非流式调用没有增量进度，不上报 / 不写 partial 文件
+                stream_progress = None
+            
             url = f"{base_url}/chat/completions"
             headers = {
                 'Content-Type': 'application/json',
@@ -994,51 +2748,57 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
             timeout = AI_OPTIONS.get('timeout', 300)
             print(f"[AI] 正在调用大模型... (超时: {timeout}s)")
             
-            result = None
-            max_retries = 3
-            last_error = None
-            
-            for attempt in range(max_retries):
-                try:
-                    if attempt > 0:
-                        print(f"[AI] 重试第 {attempt+1} 次...")
-                        
-                    # 每次重试创建新 Session，确保无状态污染
-                    session = requests.Session()
-                    session.trust_env = False # 强制直连，不使用系统代理 (针对国内 API 域名优化)
-                    
-                    # 伪装浏览器，并禁用长连接
-                    session.headers.update({
-                        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-                        'Connection': 'close'
-                    })
-
-                    # 使用 session 发送请求，verify=False 忽略 SSL 验证
+            # 单次请求：复用该模型的长连接会话（连接出错时会话被丢弃，重试使用新连接）
+            def attempt_request():
+                with ai_session_pool.session(base_url, api_key) as session:
+                    if stream:
+                        stream_progress.start()
+                    # verify=False 忽略 SSL 验证；流式时 timeout 为两次数据之间的最长等待
                     response = session.post(
                         url, 
                         json=payload, 
                         headers=headers, 
                         timeout=timeout, 
-                        verify=False
+                        verify=False,
+                        stream=stream
                     )
                     
-                    response.raise_for_status() # 检查 HTTP 错误
-                    result = response.json()
-                    break # 成功则跳出循环
-                except Exception as e:
-                    print(f"[AI] 调用失败 (第 {attempt+1}/{max_retries} 次): {e}")
-                    last_error = e
-                    if attempt < max_retries - 1:
-                        import time
-                        time.sleep(1)
+                    with response:
+                        response.raise_for_status() # 检查 HTTP 错误
+                        if stream:
+                            return read_chat_stream(response, stream_progress.feed)
+                        return response.json()
             
-            # 如果 requests 全部失败，尝试使用 curl 命令行兜底
-            if not result:
-                print("[AI] 尝试使用 curl 命令行兜底...")
-                result = self.call_ai_model_via_curl(url, headers, payload, timeout)
-            
-            if not result:
-                raise last_error
+            result = None
+            breaker = ai_breakers.get(selected_model.get('id') or model_name)
+            try:
+                result = ai_retry_policy.call(attempt_request, breaker=breaker)
+            except Exception as e:
+                # 仅连接 / TLS 层失败时改用备用传输兜底；
+                # 服务端已返回 HTTP 错误、或模型处于熔断中（CircuitOpenError）时直接失败
+                if classify(e).kind != KIND_CONNECTION or AI_FALLBACK_TRANSPORT == 'none':
+                    if stream_progress:
+                        stream_progress.finish(False)
+                    raise
+                try:
+                    if AI_FALLBACK_TRANSPORT == 'curl':
+                        print("[AI] 尝试使用 curl 命令行兜底...")
+                        curl_payload = {key: value for key, value in payload.items() if key != 'stream'}
+                        result = self.call_ai_model_via_curl(url, headers, curl_payload, timeout)
+                    else:
+                        # 备用传输的错误（含服务端返回的 HTTP 状态）直接抛出，不被原来的连接错误掩盖
+                        result = self.call_ai_model_via_http_client(url, headers, payload, timeout, stream_progress)
+                except Exception:
+                    if stream_progress:
+                        stream_progress.finish(False)
+                    raise
+                if not result:
+                    if stream_progress:
+                        stream_progress.finish(False)
+                    raise
+            
+            if stream_progress:
+                stream_progress.finish(True)
             
             content = result['choices'][0]['message']['content']
             finish_reason = result['choices'][0].get('finish_reason', '')
@@ -1048,6 +2808,9 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
             if finish_reason == 'length':
                 print("[警告] AI响应可能被截断!")
             
+            if response_key:
+                ai_response_cache.put(response_key, content, finish_reason)
+            
             # 提取HTML代码
             return self.extract_html(content)
             
@@ -1057,6 +2820,23 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
             traceback.print_exc()
             raise
 
+    def call_ai_model_via_http_client(self, url, headers, payload, timeout, stream_progress=None):
+        """使用 http.client 备用传输调用 AI（独立的 TLS 设置，请求体流式上传）
+
+        失败时抛出异常：服务端返回的 HTTP 错误为 urllib.error.HTTPError。
+        """
+        print("[AI] 尝试使用 http.client 备用传输...")
+        try:
+            if payload.get('stream'):
+                stream_progress.start()
+            with ai_fallback_transport.post(url, payload, headers, timeout) as response:
+                if payload.get('stream'):
+                    return read_chat_stream(response, stream_progress.feed)
+                return response.json()
+        except Exception as e:
+            print(f"[AI] http.client 备用传输失败: {e}")
+            raise
+
     def call_ai_model_via_curl(self, url, headers, payload, timeout):
         """使用系统 curl 命令调用 AI (解决 SSL 问题)"""
         try:
@@ -1154,29 +2934,22 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
                 return
 
             project_id = project_meta.get('id', generate_project_id(project_meta.get('name', 'project')))
-            project_folder = os.path.join(PROJECTS_DIR, project_id)
+            project_folder = project_layout.path(project_id)
             os.makedirs(project_folder, exist_ok=True)
+            cold_tier.thaw(project_folder)
             
             file_path = os.path.join(project_folder, 'index.html')
-            with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(html_content)
+            write_new_file(file_path, html_content)
                 
-            projects = self.load_projects()
-            existing_idx = next((i for i, p in enumerate(projects) if p['id'] == project_id), None)
-            
             new_record = {
                 "id": project_id,
                 "name": project_meta['name'],
                 "url": f"/projects/{project_id}/index.html",
-                "date": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                "date": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "summary": compute_project_summary(project_id)
             }
-            
-            if existing_idx is not None:
-                projects[existing_idx] = new_record
-            else:
-                projects.insert(0, new_record)
-                
-            self.save_projects(projects)
+            project_index.upsert(new_record)
+            index_project_search(project_id, new_record['name'])
             self.send_json_response({'success': True, 'project': new_record})
 
         except Exception as e:
@@ -1194,32 +2967,33 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
                 self.send_error_response("Missing project ID")
                 return
 
-            projects = self.load_projects()
-            project = next((p for p in projects if p['id'] == project_id), None)
-            
-            if project:
-                # 移动文件夹到deleted目录
-                project_folder = os.path.join(PROJECTS_DIR, project_id)
-                deleted_folder = os.path.join(DELETED_DIR, project_id)
-                if os.path.exists(project_folder):
-                    import shutil
-                    # 如果目标已存在，先删除
-                    if os.path.exists(deleted_folder):
-                        shutil.rmtree(deleted_folder)
-                    shutil.move(project_folder, deleted_folder)
-                    print(f"[删除] 项目移动到回收站: {project_id}")
+            with projects_lock:
+                project = project_index.get(project_id)
+            
+                if project:
+                    # 移动文件夹到deleted目录
+                    project_folder = project_layout.path(project_id)
+                    deleted_folder = os.path.join(DELETED_DIR, project_id)
+                    if os.path.exists(project_folder):
+                        import shutil
+                        # 如果目标已存在，先删除
+                        if os.path.exists(deleted_folder):
+                            metadata_writer.discard_dir(deleted_folder)
+                            shutil.rmtree(deleted_folder)
+                        metadata_writer.flush_dir(project_folder)
+                        shutil.move(project_folder, deleted_folder)
+                        print(f"[删除] 项目移动到回收站: {project_id}")
                 
-                # 从项目列表移除
-                projects = [p for p in projects if p['id'] != project_id]
-                self.save_projects(projects)
+                    # 从项目列表移除
+                    project_index.remove(project_id)
+                    search_index.remove(project_id)
                 
-                # 添加到已删除列表
-                deleted_projects = self.load_deleted_projects()
-                project['deletedAt'] = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                project['url'] = f'/deleted/{project_id}/index.html'
-                deleted_projects.insert(0, project)
-                self.save_deleted_projects(deleted_projects)
+                    # 添加到已删除列表
+                    project['deletedAt'] = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+                    project['url'] = f'/deleted/{project_id}/index.html'
+                    project_catalog.upsert_deleted(project)
 
+            recycle_bin.wake()
             self.send_json_response({'success': True})
 
         except Exception as e:
@@ -1242,48 +3016,54 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
                 self.send_error_response("Missing new name")
                 return
 
-            projects = self.load_projects()
-            project = next((p for p in projects if p['id'] == project_id), None)
+            with projects_lock:
+                project = project_index.get(project_id)
             
-            if not project:
-                self.send_error_response("Project not found")
-                return
+                if not project:
+                    self.send_error_response("Project not found")
+                    return
             
-            old_name = project['name']
-            old_folder = os.path.join(PROJECTS_DIR, project_id)
+                old_name = project['name']
+                old_folder = project_layout.path(project_id)
             
-            # 生成新的文件夹名称（新名称 + 原时间戳）
-            # 从原ID中提取时间戳部分
-            parts = project_id.rsplit('_', 2)
-            if len(parts) >= 3:
-                timestamp = '_'.join(parts[-2:])  # 例如 "20260114_11-20-20"
-            else:
-                timestamp = datetime.datetime.now().strftime('%Y%m%d_%H-%M-%S')
-            
-            # 处理新名称，移除不安全字符
-            safe_new_name = re.sub(r'[\\/:*?"<>|]', '', new_name)
-            safe_new_name = safe_new_name.replace(' ', '_')
-            if len(safe_new_name) > 30:
-                safe_new_name = safe_new_name[:30]
-            
-            new_project_id = f"{safe_new_name}_{timestamp}"
-            new_folder = os.path.join(PROJECTS_DIR, new_project_id)
-            
-            # 重命名文件夹
-            if os.path.exists(old_folder) and old_folder != new_folder:
-                import shutil
-                if os.path.exists(new_folder):
-                    # 如果目标已存在，添加随机后缀
-                    new_project_id = f"{safe_new_name}_{timestamp}_{datetime.datetime.now().strftime('%S')}"
-                    new_folder = os.path.join(PROJECTS_DIR, new_project_id)
-                shutil.move(old_folder, new_folder)
-                print(f"[重命名文件夹] {project_id} -> {new_project_id}")
-            
-            # 更新项目信息
-            project['id'] = new_project_id
-            project['name'] = new_name
-            project['url'] = f'/projects/{new_project_id}/index.html'
-            self.save_projects(projects)
+                # 生成新的文件夹名称（新名称 + 原时间戳）
+                # 从原ID中提取时间戳部分
+                parts = project_id.rsplit('_', 2)
+                if len(parts) >= 3:
+                    timestamp = '_'.join(parts[-2:])  # 例如 "20260114_11-20-20"
+                else:
+                    timestamp = datetime.datetime.now().strftime('%Y%m%d_%H-%M-%S')
+            
+                # 处理新名称，移除不安全字符
+                safe_new_name = re.sub(r'[\\/:*?"<>|]', '', new_name)
+                safe_new_name = safe_new_name.replace(' ', '_')
+                if len(safe_new_name) > 30:
+                    safe_new_name = safe_new_name[:30]
+            
+                new_project_id = f"{safe_new_name}_{timestamp}"
+                new_folder = project_layout.new_path(new_project_id)
+            
+                # 重命名文件夹
+                if os.path.exists(old_folder) and old_folder != new_folder:
+                    import shutil
+                    if os.path.exists(new_folder):
+                        # 如果目标已存在，添加随机后缀
+                        new_project_id = f"{safe_new_name}_{timestamp}_{datetime.datetime.now().strftime('%S')}"
+                        new_folder = project_layout.new_path(new_project_id)
+                    metadata_writer.flush_dir(old_folder)
+                    shutil.move(old_folder, new_folder)
+                    print(f"[重命名文件夹] {project_id} -> {new_project_id}")
+            
+                # 更新项目信息
+                project = project_index.update(
+                    project_id,
+                    id=new_project_id,
+                    name=new_name,
+                    url=f'/projects/{new_project_id}/index.html'
+                )
+            if project:
+                search_index.remove(project_id)
+                index_project_search(new_project_id, new_name)
             
             print(f"[重命名] {old_name} -> {new_name}")
             self.send_json_response({'success': True, 'project': project})
@@ -1305,42 +3085,36 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
                 self.send_error_response("Missing project ID")
                 return
 
-            deleted_projects = self.load_deleted_projects()
-            project = next((p for p in deleted_projects if p['id'] == project_id), None)
+            with projects_lock:
+                project = project_catalog.get_deleted(project_id)
             
-            if not project:
-                self.send_error_response("Deleted project not found")
-                return
+                if not project:
+                    self.send_error_response("Deleted project not found")
+                    return
             
-            # 移动文件夹回projects目录
-            deleted_folder = os.path.join(DELETED_DIR, project_id)
-            project_folder = os.path.join(PROJECTS_DIR, project_id)
-            
-            if os.path.exists(deleted_folder):
-                import shutil
-                # 如果目标已存在，先删除
-                if os.path.exists(project_folder):
-                    shutil.rmtree(project_folder)
-                shutil.move(deleted_folder, project_folder)
-                print(f"[恢复] 项目从回收站恢复: {project_id}")
-            
-            # 从已删除列表移除
-            deleted_projects = [p for p in deleted_projects if p['id'] != project_id]
-            self.save_deleted_projects(deleted_projects)
-            
-            # 添加回项目列表
-            projects = self.load_projects()
-            # 移除deletedAt字段，更新url
-            if 'deletedAt' in project:
-                del project['deletedAt']
-            project['url'] = f'/projects/{project_id}/index.html'
-            # 检查是否已存在（避免重复）
-            existing_idx = next((i for i, p in enumerate(projects) if p['id'] == project_id), None)
-            if existing_idx is not None:
-                projects[existing_idx] = project
-            else:
-                projects.insert(0, project)
-            self.save_projects(projects)
+                # 移动文件夹回projects目录
+                deleted_folder = os.path.join(DELETED_DIR, project_id)
+                project_folder = project_layout.new_path(project_id)
+            
+                if os.path.exists(deleted_folder):
+                    import shutil
+                    # 如果目标已存在，先删除
+                    if os.path.exists(project_folder):
+                        metadata_writer.discard_dir(project_folder)
+                        shutil.rmtree(project_folder)
+                    metadata_writer.flush_dir(deleted_folder)
+                    shutil.move(deleted_folder, project_folder)
+                    print(f"[恢复] 项目从回收站恢复: {project_id}")
+            
+                # 从已删除列表移除
+                project_catalog.delete_deleted(project_id)
+            
+                # 添加回项目列表（移除deletedAt字段，更新url；已存在则替换）
+                if 'deletedAt' in project:
+                    del project['deletedAt']
+                project['url'] = f'/projects/{project_id}/index.html'
+                project_index.upsert(project)
+            index_project_search(project_id, project.get('name', ''))
             
             self.send_json_response({'success': True, 'project': project})
 
@@ -1364,36 +3138,30 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
                 self.send_error_response("缺少新项目名称")
                 return
             
-            source_folder = os.path.join(PROJECTS_DIR, source_project_id)
+            source_folder = project_layout.path(source_project_id)
             if not os.path.exists(source_folder):
                 self.send_error_response("源项目不存在")
                 return
             
             # 生成新项目ID
             new_project_id = generate_project_id(new_project_name)
-            new_folder = os.path.join(PROJECTS_DIR, new_project_id)
+            new_folder = project_layout.new_path(new_project_id)
             
             # 复制整个文件夹
-            import shutil
-            shutil.copytree(source_folder, new_folder)
+            metadata_writer.flush_dir(source_folder)
+            copy_project_folder(source_folder, new_folder)
             print(f"[复制项目] {source_project_id} -> {new_project_id}")
             
-            # 更新项目列表 (load_projects会自动同步新文件夹)
-            projects = self.load_projects()
+            # 更新项目列表（索引可能已自动同步到新文件夹，upsert 会替换为用户指定的名称）
             new_project = {
                 'id': new_project_id,
                 'name': new_project_name,
                 'url': f'/projects/{new_project_id}/index.html',
                 'date': datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
             }
-            # 检查是否已被load_projects自动添加，避免重复
-            existing_idx = next((i for i, p in enumerate(projects) if p['id'] == new_project_id), None)
-            if existing_idx is not None:
-                # 更新名称为用户指定的名称
-                projects[existing_idx] = new_project
-            else:
-                projects.insert(0, new_project)
-            self.save_projects(projects)
+            new_project['summary'] = compute_project_summary(new_project_id)
+            project_index.upsert(new_project)
+            index_project_search(new_project_id, new_project_name)
             
             self.send_json_response({'success': True, 'project': new_project})
             
@@ -1402,155 +3170,116 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
             traceback.print_exc()
             self.send_error_response(str(e))
 
+    def handle_list_projects(self, query):
+        """分页查询项目列表：?cursor=&limit=&q=&status=&model=，按日期倒序（keyset 分页）"""
+        try:
+            try:
+                limit = int(query.get('limit', [PROJECTS_PAGE_SIZE])[0])
+            except ValueError:
+                limit = PROJECTS_PAGE_SIZE
+            limit = max(1, min(limit, PROJECTS_PAGE_MAX))
+            
+            cursor = query.get('cursor', [''])[0]
+            after = None
+            if cursor:
+                try:
+                    after = decode_project_cursor(cursor)
+                except ValueError:
+                    self.send_error_response("无效的 cursor", 400)
+                    return
+            
+            project_index.sync()
+            projects, has_more = project_catalog.query_projects(
+                limit,
+                after=after,
+                q=query.get('q', [''])[0].strip() or None,
+                status=query.get('status', [''])[0] or None,
+                model=query.get('model', [''])[0] or None
+            )
+            # 摘要尚未补算的项目（升级后首次访问）当场计算
+            for project in projects:
+                if 'summary' not in project:
+                    updated = refresh_project_summary(project['id'])
+                    if updated:
+                        project['summary'] = updated.get('summary')
+            next_cursor = encode_project_cursor(projects[-1]) if has_more and projects else None
+            self.send_json_response({'projects': projects, 'nextCursor': next_cursor})
+        except Exception as e:
+            self.send_error_response(str(e))
+
+    def handle_search(self, query):
+        """全文检索：?q=&limit=，按相关度返回项目"""
+        try:
+            q = query.get('q', [''])[0].strip()
+            try:
+                limit = int(query.get('limit', [SEARCH_LIMIT_DEFAULT])[0])
+            except ValueError:
+                limit = SEARCH_LIMIT_DEFAULT
+            limit = max(1, min(limit, SEARCH_LIMIT_MAX))
+            if not q:
+                self.send_json_response({'projects': [], 'took_ms': 0})
+                return
+            
+            started = time.perf_counter()
+            project_index.sync()
+            projects = []
+            for project_id, score in search_index.search(q, limit):
+                project = project_index.get(project_id)
+                if project:
+                    project['score'] = round(score, 4)
+                    projects.append(project)
+            took_ms = round((time.perf_counter() - started) * 1000, 2)
+            self.send_json_response({'projects': projects, 'took_ms': took_ms})
+        except Exception as e:
+            self.send_error_response(str(e))
+
     def handle_get_deleted_projects(self):
-        """获取已删除项目列表"""
+        """分页获取已删除项目列表：Body { cursor, limit }，按删除时间倒序，附带占用统计"""
         try:
-            deleted_projects = self.load_deleted_projects()
-            self.send_json_response({'success': True, 'projects': deleted_projects})
+            content_length = int(self.headers.get('Content-Length', 0))
+            data = json.loads(self.rfile.read(content_length).decode('utf-8') or '{}') if content_length else {}
+            try:
+                limit = int(data.get('limit') or DELETED_PAGE_SIZE)
+            except (TypeError, ValueError):
+                limit = DELETED_PAGE_SIZE
+            limit = max(1, min(limit, DELETED_PAGE_MAX))
+            
+            after = None
+            cursor = data.get('cursor')
+            if cursor:
+                try:
+                    after = decode_project_cursor(str(cursor))
+                except ValueError:
+                    self.send_error_response("无效的 cursor", 400)
+                    return
+            
+            projects, has_more = project_catalog.query_deleted(limit, after=after)
+            next_cursor = encode_project_cursor(projects[-1], 'deletedAt') if has_more and projects else None
+            self.send_json_response({
+                'success': True,
+                'projects': projects,
+                'nextCursor': next_cursor,
+                'stats': project_catalog.deleted_stats(),
+                'policy': {'retentionDays': RECYCLE_RETENTION_DAYS, 'maxBytes': RECYCLE_MAX_BYTES}
+            })
         except Exception as e:
             self.send_error_response(str(e))
 
     def load_projects(self):
-        """加载项目列表（自动与文件夹同步）"""
-        projects = []
-        if os.path.exists(PROJECTS_FILE):
-            try:
-                with open(PROJECTS_FILE, 'r', encoding='utf-8') as f:
-                    projects = json.load(f)
-            except:
-                pass
-        
-        # 扫描projects文件夹获取实际存在的项目
-        # 包含有 index.html 的项目 和 有 record.json 的占位项目
-        existing_folders = set()
-        folders_with_html = set()  # 有 index.html 的文件夹
-        if os.path.exists(PROJECTS_DIR):
-            for folder_name in os.listdir(PROJECTS_DIR):
-                folder_path = os.path.join(PROJECTS_DIR, folder_name)
-                if os.path.isdir(folder_path):
-                    has_html = os.path.exists(os.path.join(folder_path, 'index.html'))
-                    has_record = os.path.exists(os.path.join(folder_path, 'record.json'))
-                    if has_html or has_record:
-                        existing_folders.add(folder_name)
-                    if has_html:
-                        folders_with_html.add(folder_name)
-        
-        original_count = len(projects)
-        original_ids = [p['id'] for p in projects]
-        status_updated = False
-        
-        # 1. 移除不存在的项目
-        projects = [p for p in projects if p['id'] in existing_folders]
-        
-        # 2. 去重：确保每个ID只出现一次（保留第一个）
-        seen_ids = set()
-        unique_projects = []
-        for p in projects:
-            if p['id'] not in seen_ids:
-                seen_ids.add(p['id'])
-                unique_projects.append(p)
-        projects = unique_projects
-        
-        # 3. 检查并更新占位项目状态（pending_external -> 正常）
-        for p in projects:
-            if p.get('status') == 'pending_external' and p['id'] in folders_with_html:
-                # 占位项目现在有 index.html 了，更新状态
-                print(f"[状态更新] 项目 {p['id']} 已完成外部生成")
-                p['status'] = None  # 清除 pending 状态
-                p['name'] = p['name'].replace(' (待外部生成)', '')  # 移除后缀
-                p['url'] = f"/projects/{p['id']}/index.html"  # 更新URL
-                status_updated = True
-        
-        # 4. 添加新发现的项目（不在列表中的文件夹）
-        existing_ids = {p['id'] for p in projects}
-        new_added = False
-        for folder_name in existing_folders:
-            if folder_name not in existing_ids:
-                # 从文件夹名称提取项目名和日期
-                parts = folder_name.rsplit('_', 2)
-                if len(parts) >= 3:
-                    name = parts[0]
-                    date_part = parts[1]
-                    time_part = parts[2]
-                    
-                    # 解析日期
-                    try:
-                        year = date_part[:4]
-                        month = date_part[4:6]
-                        day = date_part[6:8]
-                        date_str = f"{year}-{month}-{day}"
-                    except:
-                        date_str = datetime.datetime.now().strftime('%Y-%m-%d')
-                    
-                    # 解析时间 (format: 4-15-23pm)
-                    try:
-                        # 移除am/pm后缀
-                        is_pm = time_part.lower().endswith('pm')
-                        time_pure = time_part[:-2] if (time_part.lower().endswith('am') or time_part.lower().endswith('pm')) else time_part
-                        
-                        t_parts = time_pure.split('-')
-                        if len(t_parts) >= 3:
-                            h = int(t_parts[0])
-                            m = int(t_parts[1])
-                            s = int(t_parts[2])
-                            
-                            # 转换12小时制到24小时制
-                            if is_pm and h < 12:
-                                h += 12
-                            elif not is_pm and h == 12:  # 12am is 00:00
-                                h = 0
-                                
-                            time_str = f"{h:02d}:{m:02d}:{s:02d}"
-                        else:
-                            time_str = "00:00:00"
-                    except:
-                        time_str = "00:00:00"
-                        
-                    date = f"{date_str} {time_str}"
-                else:
-                    name = folder_name
-                    date = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                
-                new_project = {
-                    'id': folder_name,
-                    'name': name,
-                    'url': f'/projects/{folder_name}/index.html',
-                    'date': date
-                }
-                projects.append(new_project)
-                new_added = True
-                print(f"[同步] 发现新项目: {folder_name}")
-        
-        # 按日期排序（新的在前）
-        projects.sort(key=lambda p: p.get('date', ''), reverse=True)
-        
-        # 只在有变化时保存
-        new_ids = [p['id'] for p in projects]
-        if len(projects) != original_count or new_ids != original_ids or new_added or status_updated:
-            self.save_projects(projects)
-            print(f"[同步] 项目列表已更新: {len(projects)}个项目")
-        
-        return projects
+        """加载项目列表（来自内存索引，按需与文件夹同步）"""
+        return project_index.list()
 
     def save_projects(self, projects):
-        """保存项目列表"""
-        with open(PROJECTS_FILE, 'w', encoding='utf-8') as f:
-            json.dump(projects, f, ensure_ascii=False, indent=2)
+        """整体保存项目列表"""
+        project_index.replace(projects)
 
     def load_deleted_projects(self):
         """加载已删除项目列表"""
-        if os.path.exists(DELETED_PROJECTS_FILE):
-            try:
-                with open(DELETED_PROJECTS_FILE, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            except:
-                pass
-        return []
+        return project_catalog.list_deleted()
 
     def save_deleted_projects(self, projects):
-        """保存已删除项目列表"""
-        with open(DELETED_PROJECTS_FILE, 'w', encoding='utf-8') as f:
-            json.dump(projects, f, ensure_ascii=False, indent=2)
+        """整体保存已删除项目列表"""
+        project_catalog.replace_deleted(projects)
 
     def inject_page_navigation_listener(self, html_content):
         """在 HTML 中注入页面切换消息监听器"""
@@ -1637,7 +3366,9 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
                 return
             
             # 创建 PRD 目录
-            prd_dir = os.path.join(PROJECTS_DIR, project_id, 'prd')
+            project_folder = project_layout.path(project_id)
+            cold_tier.thaw(project_folder)
+            prd_dir = os.path.join(project_folder, 'prd')
             os.makedirs(prd_dir, exist_ok=True)
             
             # 保存 PRD 文件
@@ -1645,9 +3376,9 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
             safe_page_name = re.sub(r'[^\w\u4e00-\u9fff-]', '_', page_name)
             prd_file = os.path.join(prd_dir, f'{safe_page_name}.md')
             
-            with open(prd_file, 'w', encoding='utf-8') as f:
-                f.write(content)
+            write_new_file(prd_file, content)
             
+            index_project_search(project_id)
             print(f"[PRD] 保存: {project_id}/{safe_page_name}.md")
             self.send_json_response({'success': True, 'file': f'{safe_page_name}.md'})
             
@@ -1667,6 +3398,13 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
         except Exception as e:
             self.send_error_response(str(e))
     
+    def handle_ai_cache_stats(self):
+        """AI 响应缓存的条目数、占用和命中统计"""
+        if not ai_response_cache:
+            self.send_json_response({'success': True, 'enabled': False})
+            return
+        self.send_json_response({'success': True, 'enabled': True, 'stats': ai_response_cache.summary()})
+    
     def handle_model_select(self):
         """切换选中的模型"""
         try:
@@ -1773,8 +3511,10 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
                 self.send_error_response("未选中任何元素")
                 return
             
-            # 读取当前 HTML
-            html_file = os.path.join(PROJECTS_DIR, project_id, 'index.html')
+            # 读取当前 HTML（修改前先从冷存储解压）
+            project_folder = project_layout.path(project_id)
+            cold_tier.thaw(project_folder)
+            html_file = os.path.join(project_folder, 'index.html')
             if not os.path.exists(html_file):
                 self.send_error_response("项目不存在")
                 return
@@ -1815,22 +3555,21 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
 
             # 调用 AI
             try:
-                modified_html = self.call_ai_model(ai_prompt, [])
+                modified_html = self.call_ai_model(ai_prompt, [], use_cache=not data.get('noCache', False))
                 
                 if not modified_html or len(modified_html) < 100:
                     self.send_error_response("AI 返回内容无效")
                     return
                 
                 # 备份原文件
-                backup_file = os.path.join(PROJECTS_DIR, project_id, 'index.html.bak')
-                with open(backup_file, 'w', encoding='utf-8') as f:
-                    f.write(current_html)
+                backup_file = os.path.join(project_layout.path(project_id), 'index.html.bak')
+                write_new_file(backup_file, current_html)
                 print(f"[Inspector] 备份已创建: {backup_file}")
                 
                 # 保存修改后的 HTML
-                with open(html_file, 'w', encoding='utf-8') as f:
-                    f.write(modified_html)
+                write_new_file(html_file, modified_html)
                 
+                refresh_project_summary(project_id)
                 print(f"[Inspector] HTML 已更新: {html_file}")
                 self.send_json_response({
                     'success': True, 
@@ -1862,11 +3601,11 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
             
             # 清理页面名称
             safe_page_name = re.sub(r'[^\w\u4e00-\u9fff-]', '_', page_name)
-            prd_file = os.path.join(PROJECTS_DIR, project_id, 'prd', f'{safe_page_name}.md')
+            prd_file = os.path.join(project_layout.path(project_id), 'prd', f'{safe_page_name}.md')
             
             content = ''
-            if os.path.exists(prd_file):
-                with open(prd_file, 'r', encoding='utf-8') as f:
+            if cold_storage.exists(prd_file):
+                with cold_storage.open_file(prd_file, 'r', encoding='utf-8') as f:
                     content = f.read()
             
             self.send_json_response({'content': content, 'pageName': safe_page_name})
@@ -1884,15 +3623,24 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
                 self.send_error_response("缺少 projectId")
                 return
             
-            html_file = os.path.join(PROJECTS_DIR, project_id, 'index.html')
-            if not os.path.exists(html_file):
+            html_file = os.path.join(project_layout.path(project_id), 'index.html')
+            if not cold_storage.exists(html_file):
                 self.send_error_response("项目不存在")
                 return
             
-            with open(html_file, 'r', encoding='utf-8') as f:
+            # HTML 未变化时直接返回缓存的页面列表
+            cached_mtime, cached_pages = project_catalog.get_pages(project_id)
+            if cached_pages is not None and cached_mtime == cold_storage.stat(html_file)[1]:
+                self.send_json_response({'pages': cached_pages})
+                return
+            project = project_index.get(project_id)
+            
+            with cold_storage.open_file(html_file, 'r', encoding='utf-8') as f:
                 html_content = f.read()
             
             pages = self.extract_pages_from_html(html_content)
+            if project:
+                refresh_project_summary(project_id)
             self.send_json_response({'pages': pages})
             
         except Exception as e:
@@ -1908,12 +3656,12 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
                 self.send_error_response("缺少 projectId")
                 return
             
-            html_file = os.path.join(PROJECTS_DIR, project_id, 'index.html')
-            if not os.path.exists(html_file):
+            html_file = os.path.join(project_layout.path(project_id), 'index.html')
+            if not cold_storage.exists(html_file):
                 self.send_error_response("项目不存在")
                 return
             
-            with open(html_file, 'r', encoding='utf-8') as f:
+            with cold_storage.open_file(html_file, 'r', encoding='utf-8') as f:
                 html_content = f.read()
             
             flowchart = self.generate_flowchart_from_html(html_content)
@@ -1925,7 +3673,8 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
             traceback.print_exc()
             self.send_error_response(str(e))
     
-    def extract_pages_from_html(self, html_content):
+    @classmethod
+    def extract_pages_from_html(cls, html_content):
         """从 HTML 中提取页面列表"""
         pages = []
         seen_names = set()
@@ -1944,7 +3693,7 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
                 seen_names.add(page)
                 pages.append({
                     'name': page,
-                    'label': self.get_page_label(page),
+                    'label': cls.get_page_label(page),
                     'type': 'currentPage'
                 })
         
@@ -1965,7 +3714,7 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
                     seen_names.add(page_name)
                     pages.append({
                         'name': page_name,
-                        'label': self.get_page_label(page_name),
+                        'label': cls.get_page_label(page_name),
                         'type': 'router',
                         'routePath': route_path
                     })
@@ -1975,7 +3724,8 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
         
         return pages
     
-    def get_page_label(self, page_name):
+    @staticmethod
+    def get_page_label(page_name):
         """获取页面的中文标签"""
         label_map = {
             'home': '首页',
@@ -2178,19 +3928,30 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
         }
 
     def send_json_response(self, data):
-        """发送JSON响应"""
+        """发送JSON响应（客户端支持时 gzip 压缩）"""
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        compressed = GZIP_ENABLED and len(body) >= GZIP_MIN_SIZE and self.accepts_gzip()
+        if compressed:
+            body = gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
         self.send_response(200)
         self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
         self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Vary', 'Accept-Encoding')
+        if compressed:
+            self.send_header('Content-Encoding', 'gzip')
         self.end_headers()
-        self.wfile.write(json.dumps(data, ensure_ascii=False).encode('utf-8'))
+        self.wfile.write(body)
 
-    def send_error_response(self, message):
-        """发送错误响应"""
-        self.send_response(500)
+    def send_error_response(self, message, status=500):
+        """发送错误响应（请求体可能未读完，响应后关闭连接）"""
+        body = json.dumps({'error': message}, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
         self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Connection', 'close')
         self.end_headers()
-        self.wfile.write(json.dumps({'error': message}, ensure_ascii=False).encode('utf-8'))
+        self.wfile.write(body)
 
     def handle_generation_status(self, query):
         """查询项目生成状态"""
@@ -2200,20 +3961,18 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
                 self.send_error_response("缺少project_id")
                 return
             
-            # 检查任务状态
+            # 检查任务状态（锁内只取快照，避免发送响应时持有锁）
             with tasks_lock:
-                if project_id in generating_tasks:
-                    task_info = generating_tasks[project_id]
-                    self.send_json_response({
-                        'status': task_info['status'],
-                        'progress': task_info.get('progress', 0),
-                        'error': task_info.get('error', '')
-                    })
-                    return
+                task_info = generating_tasks.get(project_id)
+                snapshot = task_snapshot(project_id, task_info) if task_info else None
+            if snapshot:
+                snapshot.pop('id')
+                self.send_json_response(snapshot)
+                return
             
             # 检查是否已完成
-            html_path = os.path.join(PROJECTS_DIR, project_id, 'index.html')
-            if os.path.exists(html_path):
+            html_path = os.path.join(project_layout.path(project_id), 'index.html')
+            if cold_storage.exists(html_path):
                 self.send_json_response({'status': STATUS_COMPLETED, 'progress': 100})
             else:
                 self.send_json_response({'status': 'not_found', 'progress': 0})
@@ -2222,6 +3981,74 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
             print(f"[错误] 查询状态失败: {e}")
             self.send_error_response(str(e))
 
+    def handle_events(self, query):
+        """SSE 推送生成任务进度（/api/events）
+
+        连接建立后先发送全部任务快照（snapshot），之后每次任务变化推送一条
+        task 事件；空闲时每 SSE_HEARTBEAT 秒发送一次心跳注释。断线重连时浏览器
+        自动携带 Last-Event-ID，能补发的事件直接补发，否则重新发送快照。
+        """
+        global sse_clients
+        with sse_clients_lock:
+            if sse_clients >= SSE_MAX_CLIENTS:
+                self.send_error(503, "Too many event streams")
+                return
+            sse_clients += 1
+        
+        try:
+            last_event_id = self.headers.get('Last-Event-ID') or query.get('lastEventId', [''])[0]
+            try:
+                last_event_id = int(last_event_id)
+            except ValueError:
+                last_event_id = None
+            
+            # 无 Content-Length 的流式响应，结束即关闭连接
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream; charset=utf-8')
+            self.send_header('Connection', 'close')
+            self.send_header('X-Accel-Buffering', 'no')
+            self.end_headers()
+            self.wfile.write(f'retry: {SSE_RETRY_MS}\n\n'.encode('utf-8'))
+            
+            missed = task_events.events_after(last_event_id) if last_event_id is not None else None
+            if missed is None:
+                cursor = self.send_task_snapshot()
+            else:
+                for event in missed:
+                    self.send_sse_event(*event)
+                cursor = missed[-1][0] if missed else last_event_id
+            
+            while not task_events.closed:
+                latest = task_events.wait(cursor, SSE_HEARTBEAT)
+                if latest == cursor:
+                    self.wfile.write(b': ping\n\n')
+                    continue
+                events = task_events.events_after(cursor)
+                if events is None:
+                    # 推送太慢被挤出缓冲区，退回全量快照
+                    cursor = self.send_task_snapshot()
+                    continue
+                for event in events:
+                    self.send_sse_event(*event)
+                cursor = events[-1][0] if events else latest
+        except (BrokenPipeError, ConnectionResetError, TimeoutError):
+            pass
+        finally:
+            with sse_clients_lock:
+                sse_clients -= 1
+    
+    def send_task_snapshot(self):
+        """发送全部任务的快照事件，返回快照对应的事件 id"""
+        with tasks_lock:
+            cursor = task_events.last_id
+            tasks = [task_snapshot(pid, info) for pid, info in generating_tasks.items()]
+        self.send_sse_event(cursor, 'snapshot', {'tasks': tasks})
+        return cursor
+    
+    def send_sse_event(self, event_id, event_type, data):
+        payload = json.dumps(data, ensure_ascii=False)
+        self.wfile.write(f'id: {event_id}\nevent: {event_type}\ndata: {payload}\n\n'.encode('utf-8'))
+
     def handle_create_placeholder(self):
         """创建占位项目（不调用AI，用于复制Prompt功能）"""
         try:
@@ -2241,7 +4068,7 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
             print(f"[占位] 创建项目: {project_name} ({project_id})")
             
             # 创建项目文件夹
-            project_folder = os.path.join(PROJECTS_DIR, project_id)
+            project_folder = project_layout.new_path(project_id)
             os.makedirs(project_folder, exist_ok=True)
             
             # 保存参考图片
@@ -2255,6 +4082,7 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
                     saved = save_base64_image(img_base64, ref_images_folder, filename)
                     if saved:
                         saved_image_names.append(saved)
+            share_project_assets(project_folder)
             
             # 构建record.json
             record = {
@@ -2265,15 +4093,13 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
             }
             
             record_path = os.path.join(project_folder, 'record.json')
-            with open(record_path, 'w', encoding='utf-8') as f:
-                json.dump(record, f, ensure_ascii=False, indent=2)
+            metadata_writer.write(record_path, record)
             
             # 获取当前选中的模型名称
             current_model = get_selected_model()
             current_model_name = current_model.get('name', '') if current_model else ''
             
             # 更新项目列表
-            projects = self.load_projects()
             new_project = {
                 'id': project_id,
                 'name': project_name + ' (待外部生成)',
@@ -2282,8 +4108,9 @@ class CustomHandler(http.server.SimpleHTTPRequestHandler):
                 'url': f'/projects/{project_id}/record.json',  # 暂无HTML
                 'date': datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
             }
-            projects.insert(0, new_project)
-            self.save_projects(projects)
+            new_project['summary'] = compute_project_summary(project_id)
+            project_index.upsert(new_project)
+            index_project_search(project_id, new_project['name'])
             
             print(f"[完成] 占位项目已创建: {project_folder}")
             self.send_json_response({'success': True, 'project': new_project})
@@ -2540,17 +4367,15 @@ function copyLink(url, btn) {{
             )
 
             # 清除本地 record.json 中的 github_url
-            project_dir = os.path.join(PROJECTS_DIR, project_id)
+            project_dir = project_layout.path(project_id)
             record_path = os.path.join(project_dir, 'record.json')
-            if os.path.exists(record_path):
-                with open(record_path, 'r', encoding='utf-8') as f:
-                    record = json.load(f)
+            def clear_github_fields(record):
                 record.pop('github_url', None)
                 record.pop('github_published_at', None)
                 record.pop('github_mode', None)
-                with open(record_path, 'w', encoding='utf-8') as f:
-                    json.dump(record, f, ensure_ascii=False, indent=2)
+            if metadata_writer.update(record_path, clear_github_fields) is not None:
                 print(f"[GitHub] 本地 record.json 已清除 github_url")
+            refresh_project_summary(project_id)
 
             self.send_json_response({'success': True, 'message': '已取消发布，GitHub 文件已删除'})
 
@@ -2576,7 +4401,7 @@ function copyLink(url, btn) {{
                 self.send_error_response("缺少 projectId")
                 return
 
-            project_dir = os.path.join(PROJECTS_DIR, project_id)
+            project_dir = project_layout.path(project_id)
             if not os.path.exists(project_dir):
                 self.send_error_response(f"项目不存在: {project_id}")
                 return
@@ -2590,7 +4415,8 @@ function copyLink(url, btn) {{
             ep = importlib.util.module_from_spec(spec)
             spec.loader.exec_module(ep)
 
-            export_dir = ep.export_project(project_id, mode=mode)
+            metadata_writer.flush_dir(project_layout.path(project_id))
+            export_dir = ep.export_project(project_id, mode=mode, cold_tier=cold_tier)
 
             # 自动打开导出目录（Windows）
             try:
@@ -2729,7 +4555,7 @@ function copyLink(url, btn) {{
                 self.send_error_response("请先在设置中配置 GitHub Token 和用户名")
                 return
 
-            project_dir = os.path.join(PROJECTS_DIR, project_id)
+            project_dir = project_layout.path(project_id)
             if not os.path.exists(project_dir):
                 self.send_error_response(f"项目不存在: {project_id}")
                 return
@@ -2831,7 +4657,8 @@ function copyLink(url, btn) {{
             ep = importlib.util.module_from_spec(spec)
             spec.loader.exec_module(ep)
             
-            export_dir = ep.export_project(project_id, mode=mode)
+            metadata_writer.flush_dir(project_layout.path(project_id))
+            export_dir = ep.export_project(project_id, mode=mode, cold_tier=cold_tier)
             print(f"[GitHub] 导出目录: {export_dir}")
 
             # ---- 5. 上传项目文件 ----
@@ -2883,19 +4710,16 @@ function copyLink(url, btn) {{
             record_path = os.path.join(project_dir, 'record.json')
             project_name = project_id  # 默认用 ID
             try:
-                record = {}
-                if os.path.exists(record_path):
-                    with open(record_path, 'r', encoding='utf-8') as f:
-                        record = json.load(f)
+                record = metadata_writer.update(record_path, lambda record: record.update(
+                    github_url=pages_url_result,
+                    github_published_at=datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+                    github_mode=mode
+                ), default={})
                 project_name = record.get('title', record.get('name', project_id))
-                record['github_url'] = pages_url_result
-                record['github_published_at'] = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                record['github_mode'] = mode
-                with open(record_path, 'w', encoding='utf-8') as f:
-                    json.dump(record, f, ensure_ascii=False, indent=2)
                 print(f"[GitHub] 'record.json' 已更新。")
             except Exception as e:
                 print(f"[GitHub] 警告: 更新 'record.json' 失败（非致命错误）: {e}")
+            refresh_project_summary(project_id)
 
             # 更新 GitHub 列表页
             try:
@@ -2925,6 +4749,49 @@ function copyLink(url, btn) {{
             self.send_error_response(f"GitHub 发布失败: {str(e)}")
 
 
+# ==================== 并发服务 ====================
+
+class BoundedThreadingServer(socketserver.TCPServer):
+    """有界线程池 HTTP 服务器
+
+    每个连接交给线程池中的工作线程处理，长耗时的 AI 调用（/generate、
+    /api/inspector/apply、/api/export 等）不再阻塞静态文件和状态轮询。
+    工作线程全部繁忙时，新连接在线程池队列中排队等待。
+    """
+    allow_reuse_address = True
+    request_queue_size = 128
+
+    def __init__(self, server_address, handler_class, max_workers=32):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='http-worker')
+        super().__init__(server_address, handler_class)
+
+    def process_request(self, request, client_address):
+        self.executor.submit(self.process_request_worker, request, client_address)
+
+    def process_request_worker(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.executor.shutdown(wait=False)
+
+
+def create_server():
+    """根据 config.json 的 server.concurrency 创建服务器（threaded | single）"""
+    mode = SERVER_OPTIONS.get('concurrency', 'threaded')
+    if mode == 'single':
+        print("[服务] 单线程模式")
+        return socketserver.TCPServer(("", PORT), CustomHandler)
+    max_workers = max(1, int(SERVER_OPTIONS.get('max_workers', 32)))
+    print(f"[服务] 多线程模式，最大工作线程数: {max_workers}")
+    return BoundedThreadingServer(("", PORT), CustomHandler, max_workers=max_workers)
+
+
 print(f"=" * 50)
 print(f"原型生成器服务启动")
 print(f"地址: http://localhost:{PORT}/src/")
@@ -2933,10 +4800,20 @@ print(f"=" * 50)
 
 socketserver.TCPServer.allow_reuse_address = True
 
+# 后台补建检索索引 / 项目摘要（升级后首次启动）
+schedule_search_backfill()
+threading.Thread(target=backfill_project_summaries, name='summary-backfill', daemon=True).start()
+threading.Thread(target=asset_gc_loop, name='asset-gc', daemon=True).start()
+threading.Thread(target=recycle_bin.run, name='recycle-bin', daemon=True).start()
+threading.Thread(target=cold_storage_loop, name='cold-storage', daemon=True).start()
+
 try:
-    with socketserver.TCPServer(("", PORT), CustomHandler) as httpd:
+    with create_server() as httpd:
         httpd.serve_forever()
 except KeyboardInterrupt:
     print("\n服务已停止")
 except Exception as e:
     print(f"\n服务错误: {e}")
+finally:
+    task_events.close()
+    metadata_writer.close()
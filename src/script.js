@@ -6,8 +6,16 @@
 // ==================== 状态管理 ====================
 let pages = [];
 let pageFiles = {};
-let allProjects = [];
+let allProjects = [];            // 已加载的项目（分页累积）
 let searchQuery = '';
+let projectsCursor = null;        // 下一页游标，null 表示已加载完
+let projectsLoading = false;
+let projectsRequestId = 0;        // 搜索条件变化时丢弃过期的分页响应
+let projectListObserver = null;
+let searchDebounceTimer = null;
+const PROJECTS_PAGE_SIZE = 30;
+let recycleBinProjects = [];      // 回收站已加载的项目（分页累积）
+let recycleBinCursor = null;      // 回收站下一页游标
 let currentRecordProject = null; // 当前查看的记录项目
 
 // ==================== 模型管理 ====================
@@ -53,6 +61,9 @@ function setupEventListeners() {
     $('projectSearch').oninput = (e) => {
         searchQuery = e.target.value.toLowerCase();
         renderProjectList();
+        // 服务端按名称搜索，输入停顿后重新分页加载
+        clearTimeout(searchDebounceTimer);
+        searchDebounceTimer = setTimeout(loadProjects, 250);
     };
 
     // 记录模态框关闭
@@ -101,17 +112,74 @@ function createNewProject() {
 }
 
 function loadProjects() {
-    fetch('/data/projects.json?t=' + Date.now())
+    // 重新从第一页加载（初始化 / 搜索条件变化）
+    allProjects = [];
+    projectsCursor = null;
+    projectsLoading = false;
+    fetchProjectsPage(true);
+}
+
+function fetchProjectsPage(reset = false) {
+    if (projectsLoading || (!reset && !projectsCursor)) return;
+    projectsLoading = true;
+    const requestId = ++projectsRequestId;
+
+    const params = new URLSearchParams({ limit: PROJECTS_PAGE_SIZE });
+    if (!reset && projectsCursor) params.set('cursor', projectsCursor);
+    if (searchQuery) params.set('q', searchQuery);
+
+    fetch('/api/projects?' + params.toString())
         .then(res => res.json())
         .then(data => {
-            allProjects = data || [];
+            if (requestId !== projectsRequestId) return;
+            const known = new Set(allProjects.map(p => p.id));
+            (data.projects || []).forEach(p => {
+                if (!known.has(p.id)) allProjects.push(p);
+            });
+            projectsCursor = data.nextCursor || null;
+            projectsLoading = false;
             renderProjectList();
         })
         .catch(() => {
-            $('projectList').innerHTML = '<div class="text-center py-8 text-gray-400 text-sm">暂无项目</div>';
+            if (requestId !== projectsRequestId) return;
+            projectsLoading = false;
+            if (allProjects.length === 0) {
+                $('projectList').innerHTML = '<div class="text-center py-8 text-gray-400 text-sm">暂无项目</div>';
+            }
         });
 }
 
+function observeProjectListEnd() {
+    // 列表底部哨兵进入可视区域时加载下一页（无限滚动）
+    if (projectListObserver) projectListObserver.disconnect();
+    const sentinel = $('projectListSentinel');
+    if (!sentinel) return;
+    if (!('IntersectionObserver' in window)) {
+        sentinel.onclick = () => fetchProjectsPage();
+        return;
+    }
+    projectListObserver = new IntersectionObserver((entries) => {
+        if (entries.some(e => e.isIntersecting)) fetchProjectsPage();
+    }, { root: $('projectList'), rootMargin: '200px' });
+    projectListObserver.observe(sentinel);
+}
+
+// 项目摘要（列表接口随项目返回）：页面数、参考图数量、HTML 大小、发布状态
+function projectSummaryHTML(summary) {
+    if (!summary) return '';
+    const parts = [];
+    if (summary.pageCount) parts.push(`<span title="${(summary.pageNames || []).join('、').replace(/"/g, '&quot;')}"><i class="fas fa-layer-group text-[9px] mr-0.5"></i>${summary.pageCount} 页</span>`);
+    if (summary.referenceImages) parts.push(`<span><i class="fas fa-image text-[9px] mr-0.5"></i>${summary.referenceImages}</span>`);
+    if (summary.htmlSize) parts.push(`<span>${(summary.htmlSize / 1024).toFixed(summary.htmlSize < 10240 ? 1 : 0)} KB</span>`);
+    if (summary.githubUrl) parts.push(`<a href="${summary.githubUrl}" target="_blank" onclick="event.stopPropagation()" class="text-indigo-400 hover:text-indigo-600" title="已发布到 GitHub Pages"><i class="fab fa-github"></i></a>`);
+    if (parts.length === 0) return '';
+    return `<p class="text-[11px] text-gray-400 mt-0.5 flex items-center gap-2">${parts.join('')}</p>`;
+}
+
+function generatingLabel(p) {
+    return `生成中${p.progress ? ` ${p.progress}%` : ''}${p.bytesReceived ? ` · ${formatBytes(p.bytesReceived)}` : ''}`;
+}
+
 function renderProjectList() {
     const container = $('projectList');
     let filtered = allProjects;
@@ -120,18 +188,22 @@ function renderProjectList() {
         filtered = allProjects.filter(p => p.name.toLowerCase().includes(searchQuery));
     }
 
-    if (filtered.length === 0) {
+    if (filtered.length === 0 && !projectsCursor) {
         container.innerHTML = '<div class="text-center py-8 text-gray-400 text-sm">暂无项目</div>';
         return;
     }
 
+    const sentinelHTML = projectsCursor
+        ? '<div id="projectListSentinel" class="text-center py-3 text-gray-400 text-xs cursor-pointer"><i class="fas fa-spinner fa-spin mr-1"></i>加载更多...</div>'
+        : '';
+
     container.innerHTML = filtered.map(p => {
         // 状态标签
         let statusHTML = '';
         if (p.status === 'generating') {
             statusHTML = `
                 <span class="inline-flex items-center gap-1 px-2 py-0.5 rounded-full text-xs font-medium bg-blue-50 text-blue-600 animate-pulse">
-                    <i class="fas fa-spinner fa-spin text-[10px]"></i>生成中
+                    <i class="fas fa-spinner fa-spin text-[10px]"></i><span data-progress-for="${p.id}">${generatingLabel(p)}</span>
                 </span>`;
         } else if (p.status === 'failed') {
             statusHTML = `
@@ -162,6 +234,7 @@ function renderProjectList() {
                 </div>
                 <p class="text-xs text-gray-400">${p.date}</p>
                 ${p.model_name ? `<p class="text-[11px] text-indigo-400 mt-0.5 flex items-center gap-1"><i class="fas fa-robot text-[9px]"></i>${p.model_name}</p>` : ''}
+                ${projectSummaryHTML(p.summary)}
             </div>
             <div class="flex items-center border-t border-gray-100 bg-gray-50/50 px-2 py-1.5 transition-opacity duration-150"
                  onclick="event.stopPropagation()">
@@ -192,7 +265,8 @@ function renderProjectList() {
             </div>
         </div>
     `;
-    }).join('');
+    }).join('') + sentinelHTML;
+    observeProjectListEnd();
 }
 
 function deleteProject(id, name) {
@@ -296,17 +370,24 @@ async function openRecycleBin() {
     $('recycleBinModal').classList.remove('hidden');
     $('recycleBinModal').classList.add('flex');
     $('recycleBinContent').innerHTML = '<div class="text-center py-8 text-gray-400 text-sm">加载中...</div>';
+    recycleBinProjects = [];
+    recycleBinCursor = null;
+    await loadRecycleBinPage();
+}
 
+async function loadRecycleBinPage(cursor = null) {
     try {
         const response = await fetch('/deleted-projects', {
             method: 'POST',
             headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify({})
+            body: JSON.stringify(cursor ? { cursor } : {})
         });
 
         const data = await response.json();
         if (data.success) {
-            renderRecycleBin(data.projects || []);
+            recycleBinProjects = recycleBinProjects.concat(data.projects || []);
+            recycleBinCursor = data.nextCursor || null;
+            renderRecycleBin(recycleBinProjects, data.stats, data.policy);
         } else {
             $('recycleBinContent').innerHTML = '<div class="text-center py-8 text-red-400 text-sm">加载失败</div>';
         }
@@ -315,24 +396,46 @@ async function openRecycleBin() {
     }
 }
 
-function renderRecycleBin(projects) {
+function formatBytes(bytes) {
+    if (bytes < 1024 * 1024) return `${(bytes / 1024).toFixed(bytes < 10240 ? 1 : 0)} KB`;
+    return `${(bytes / 1024 / 1024).toFixed(1)} MB`;
+}
+
+function recycleBinPolicyText(policy) {
+    if (!policy || (!policy.retentionDays && !policy.maxBytes)) return '回收站中的项目永久保留，不会自动清理';
+    const rules = [];
+    if (policy.retentionDays) rules.push(`删除超过 ${policy.retentionDays} 天`);
+    if (policy.maxBytes) rules.push(`总占用超过 ${formatBytes(policy.maxBytes)}（从最早删除的开始）`);
+    return `${rules.join('或')}的项目将被自动彻底删除`;
+}
+
+function renderRecycleBin(projects, stats, policy) {
+    const policyLine = `<div class="px-3 pb-2 text-xs text-gray-400">${recycleBinPolicyText(policy)}</div>`;
     if (projects.length === 0) {
-        $('recycleBinContent').innerHTML = '<div class="text-center py-8 text-gray-400 text-sm">回收站为空</div>';
+        $('recycleBinContent').innerHTML = policyLine + '<div class="text-center py-8 text-gray-400 text-sm">回收站为空</div>';
         return;
     }
 
-    $('recycleBinContent').innerHTML = projects.map(p => `
+    const header = policyLine + (stats ? `
+        <div class="px-3 pb-2 mb-1 text-xs text-gray-500 border-b border-gray-100">
+            共 ${stats.count} 个项目，占用 ${formatBytes(stats.sizeBytes)}，可释放 ${formatBytes(stats.reclaimableBytes)}
+        </div>` : '');
+    const more = recycleBinCursor ? `
+        <button onclick="loadRecycleBinPage(recycleBinCursor)"
+                class="w-full py-2 mt-2 text-sm text-indigo-600 hover:bg-indigo-50 rounded-lg transition">加载更多</button>` : '';
+
+    $('recycleBinContent').innerHTML = header + projects.map(p => `
         <div class="flex items-start justify-between p-3 rounded-lg hover:bg-gray-50 transition-all border-b border-gray-100 last:border-0">
             <div class="flex-1 min-w-0">
                 <p class="text-sm font-medium text-gray-900 line-clamp-2" title="${p.name}">${p.name}</p>
-                <p class="text-xs text-gray-400 mt-1">删除于: ${p.deletedAt || p.date}</p>
+                <p class="text-xs text-gray-400 mt-1">删除于: ${p.deletedAt || p.date}${p.sizeBytes != null ? ` · ${formatBytes(p.sizeBytes)}` : ''}${p.reclaimableBytes != null && p.reclaimableBytes !== p.sizeBytes ? `（可释放 ${formatBytes(p.reclaimableBytes)}）` : ''}</p>
             </div>
             <button onclick="restoreProject('${p.id}')" 
                     class="flex-shrink-0 ml-2 px-3 py-1.5 text-sm text-indigo-600 hover:bg-indigo-50 rounded-lg transition flex items-center gap-1">
                 <i class="fas fa-undo"></i> 恢复
             </button>
         </div>
-    `).join('');
+    `).join('') + more;
 }
 
 function closeRecycleBinModal() {
@@ -1126,11 +1229,13 @@ async function generateWithAI() {
 
     try {
         // 构建请求数据
+        // 取消勾选“复用相同输入的结果”时跳过服务端 AI 响应缓存
         const requestData = {
             prompt: prompt,
             images: allImages,
             projectName: projectName,
-            formData: formData
+            formData: formData,
+            noCache: !$('aiCacheToggle').checked
         };
 
         // 如果使用增量更新，添加额外信息
@@ -1162,8 +1267,8 @@ async function generateWithAI() {
             renderProjectList();
             showToast('🔵 已开始生成 "' + result.project.name + '"，请查看左侧列表');
 
-            // 开始轮询状态
-            pollGenerationStatus(result.project.id);
+            // 订阅生成进度（SSE 推送，不可用时自动回退为轮询）
+            watchGenerationStatus(result.project.id);
 
             // 重置增量更新状态
             sourceProjectId = null;
@@ -1177,7 +1282,100 @@ async function generateWithAI() {
     }
 }
 
-// ==================== 异步状态轮询 ====================
+// ==================== 异步状态推送（SSE） ====================
+const watchedProjects = new Set(); // 等待生成结果的项目ID
+let generationEvents = null;       // 共享的 /api/events 连接
+
+function watchGenerationStatus(projectId) {
+    watchedProjects.add(projectId);
+
+    if (!window.EventSource) {
+        watchedProjects.delete(projectId);
+        pollGenerationStatus(projectId);
+        return;
+    }
+    if (generationEvents) return;
+
+    let opened = false;
+    generationEvents = new EventSource('/api/events');
+    generationEvents.onopen = () => {
+        opened = true;
+        console.log('[SSE] 已连接生成进度推送');
+    };
+    generationEvents.addEventListener('snapshot', (e) => {
+        const data = JSON.parse(e.data);
+        (data.tasks || []).forEach(handleGenerationEvent);
+    });
+    generationEvents.addEventListener('task', (e) => {
+        handleGenerationEvent(JSON.parse(e.data));
+    });
+    generationEvents.onerror = () => {
+        // 已连接后的断线由浏览器携带 Last-Event-ID 自动重连；
+        // 从未连上（如服务端单线程模式返回 503）则回退为轮询
+        if (opened && generationEvents.readyState !== EventSource.CLOSED) return;
+        console.warn('[SSE] 推送不可用，回退为轮询');
+        generationEvents.close();
+        generationEvents = null;
+        watchedProjects.forEach(id => pollGenerationStatus(id));
+        watchedProjects.clear();
+    };
+}
+
+function handleGenerationEvent(data) {
+    if (!watchedProjects.has(data.id)) return;
+    console.log('[SSE] 状态:', data);
+
+    if (applyGenerationStatus(data.id, data)) {
+        watchedProjects.delete(data.id);
+        // 没有待等待的项目时关闭连接，释放服务端工作线程
+        if (watchedProjects.size === 0 && generationEvents) {
+            generationEvents.close();
+            generationEvents = null;
+        }
+    }
+}
+
+// 根据状态更新项目列表，返回 true 表示生成已结束（完成或失败）
+function applyGenerationStatus(projectId, data) {
+    const projectIndex = allProjects.findIndex(p => p.id === projectId);
+    if (projectIndex === -1) return false;
+
+    if (data.status === 'completed') {
+        // 生成完成
+        allProjects[projectIndex].status = null; // 清除 generating 状态
+        renderProjectList();
+        showToast('✅ "' + allProjects[projectIndex].name + '" 生成完成！');
+
+        // 自动打开预览
+        setTimeout(() => {
+            window.open(`/projects/${projectId}/index.html`, '_blank');
+        }, 500);
+        return true;
+
+    } else if (data.status === 'failed') {
+        // 生成失败
+        allProjects[projectIndex].status = 'failed';
+        renderProjectList();
+        showToast('❌ "' + allProjects[projectIndex].name + '" 生成失败: ' + (data.error || '未知错误'), 'error');
+        return true;
+
+    } else if (data.status === 'generating') {
+        // 流式生成：只更新该项目卡片的进度文字，不重建整个列表
+        const project = allProjects[projectIndex];
+        project.progress = data.progress;
+        project.bytesReceived = data.bytes_received;
+        const label = document.querySelector(`[data-progress-for="${CSS.escape(projectId)}"]`);
+        if (label) {
+            label.textContent = generatingLabel(project);
+        } else if (project.status !== 'generating') {
+            project.status = 'generating';
+            renderProjectList();
+        }
+    }
+    return false;
+}
+
+// ==================== 异步状态轮询（SSE 不可用时的回退） ====================
 function pollGenerationStatus(projectId) {
     const POLL_INTERVAL = 3000; // 每3秒轮询一次
     const MAX_POLLS = 120; // 最多轮询120次（6分钟超时）
@@ -1193,29 +1391,8 @@ function pollGenerationStatus(projectId) {
 
             console.log('[轮询] 状态:', data);
 
-            // 更新列表中的项目状态
-            const projectIndex = allProjects.findIndex(p => p.id === projectId);
-            if (projectIndex !== -1) {
-                if (data.status === 'completed') {
-                    // 生成完成
-                    allProjects[projectIndex].status = null; // 清除 generating 状态
-                    renderProjectList();
-                    showToast('✅ "' + allProjects[projectIndex].name + '" 生成完成！');
-
-                    // 自动打开预览
-                    setTimeout(() => {
-                        window.open(`/projects/${projectId}/index.html`, '_blank');
-                    }, 500);
-                    return; // 停止轮询
-
-                } else if (data.status === 'failed') {
-                    // 生成失败
-                    allProjects[projectIndex].status = 'failed';
-                    renderProjectList();
-                    showToast('❌ "' + allProjects[projectIndex].name + '" 生成失败: ' + (data.error || '未知错误'), 'error');
-                    return; // 停止轮询
-                }
-            }
+            // 更新列表中的项目状态，生成结束则停止轮询
+            if (applyGenerationStatus(projectId, data)) return;
 
             // 继续轮询
             if (pollCount < MAX_POLLS) {